@@ -12,7 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.database import Base
 from app.core.config import get_settings
-from app.models import user, writeup, comment
+from app.models import user, writeup, comment, scan_job, cve
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,56 @@
+"""Add cves table with full-text index for the local NVD mirror
+
+Revision ID: add_cves_table
+Revises: add_scan_jobs_table
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_cves_table'
+down_revision: Union[str, None] = 'add_scan_jobs_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'cves',
+        sa.Column('id', sa.String(32), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('vuln_status', sa.String(32), nullable=True),
+        sa.Column('published', sa.DateTime(), nullable=True),
+        sa.Column('last_modified', sa.DateTime(), nullable=True),
+        sa.Column('cvss_version', sa.String(8), nullable=True),
+        sa.Column('cvss_score', sa.Float(), nullable=True),
+        sa.Column('severity', sa.String(16), nullable=True),
+        sa.Column('cvss_vector', sa.String(128), nullable=True),
+        sa.Column('cwes', sa.JSON(), nullable=True),
+        sa.Column('references', sa.JSON(), nullable=True),
+        sa.Column('ingested_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cves_severity_score', 'cves', ['severity', 'cvss_score'])
+    op.create_index('ix_cves_published', 'cves', ['published'])
+
+    # Weighted full-text vector (id > description) maintained by Postgres itself
+    op.execute("""
+        ALTER TABLE cves ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', id), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_cves_search_vector ON cves USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_cves_search_vector")
+    op.drop_index('ix_cves_published', table_name='cves')
+    op.drop_index('ix_cves_severity_score', table_name='cves')
+    op.drop_table('cves')
@@ -0,0 +1,49 @@
+"""Add scan_jobs table for background scanner jobs
+
+Revision ID: add_scan_jobs_table
+Revises: add_comment_replies
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_scan_jobs_table'
+down_revision: Union[str, None] = 'add_comment_replies'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scan_jobs',
+        sa.Column('id', sa.String(32), nullable=False),
+        sa.Column('owner', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(32), nullable=False),
+        sa.Column('target', sa.String(), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(16), nullable=False, server_default='queued'),
+        sa.Column('findings', sa.JSON(), nullable=True),
+        sa.Column('timings', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scan_jobs_owner', 'scan_jobs', ['owner'])
+    op.create_index('ix_scan_jobs_status', 'scan_jobs', ['status'])
+    op.create_index('ix_scan_jobs_updated_at', 'scan_jobs', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scan_jobs_updated_at', table_name='scan_jobs')
+    op.drop_index('ix_scan_jobs_status', table_name='scan_jobs')
+    op.drop_index('ix_scan_jobs_owner', table_name='scan_jobs')
+    op.drop_table('scan_jobs')
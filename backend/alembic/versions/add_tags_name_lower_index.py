@@ -0,0 +1,50 @@
+"""Merge tags that differ only in case and index lower(name)
+
+Revision ID: add_tags_name_lower_index
+Revises: add_writeup_processing_status
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_tags_name_lower_index'
+down_revision: Union[str, None] = 'add_writeup_processing_status'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # Tags are matched case-insensitively with whitespace collapsed
+    # ("Linux" and "linux", "port  scanning" and "port scanning"). Keep the
+    # oldest tag of each group and move the others' writeup links onto it.
+    keep = {}
+    for tag_id, name in conn.execute(sa.text("SELECT id, name FROM tags ORDER BY id")).fetchall():
+        clean = " ".join(name.split())
+        key = clean.lower()
+        if key not in keep:
+            keep[key] = tag_id
+            if clean != name:
+                conn.execute(sa.text("UPDATE tags SET name = :name WHERE id = :id"), {"name": clean, "id": tag_id})
+            continue
+        params = {"keep": keep[key], "dup": tag_id}
+        conn.execute(sa.text(
+            "INSERT INTO writeup_tags (writeup_id, tag_id) "
+            "SELECT writeup_id, :keep FROM writeup_tags WHERE tag_id = :dup "
+            "AND writeup_id NOT IN (SELECT writeup_id FROM writeup_tags WHERE tag_id = :keep)"
+        ), params)
+        conn.execute(sa.text("DELETE FROM writeup_tags WHERE tag_id = :dup"), params)
+        conn.execute(sa.text("DELETE FROM tags WHERE id = :dup"), params)
+
+    op.create_index('ix_tags_name_lower', 'tags', [sa.text('lower(name)')], unique=True)
+
+
+def downgrade() -> None:
+    # Merged tags are not split again
+    op.drop_index('ix_tags_name_lower', table_name='tags')
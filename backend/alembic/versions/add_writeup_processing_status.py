@@ -0,0 +1,29 @@
+"""Add upload processing status to writeups
+
+Revision ID: add_writeup_processing_status
+Revises: add_writeups_created_at_id_index
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_writeup_processing_status'
+down_revision: Union[str, None] = 'add_writeups_created_at_id_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing writeups are complete
+    op.add_column('writeups', sa.Column('processing_status', sa.String(length=16), nullable=False, server_default='ready'))
+    op.add_column('writeups', sa.Column('upload_job_id', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('writeups', 'upload_job_id')
+    op.drop_column('writeups', 'processing_status')
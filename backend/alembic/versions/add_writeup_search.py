@@ -0,0 +1,105 @@
+"""Add weighted full-text search vector to writeups
+
+Revision ID: add_writeup_search
+Revises: add_cves_table
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_writeup_search'
+down_revision: Union[str, None] = 'add_cves_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE writeups ADD COLUMN search_vector tsvector")
+
+    # title (A) > tags (B) > summary (C) > markdown content (D). Tags live in
+    # another table, so the vector is kept current by triggers rather than
+    # being a generated column. Content is capped well below tsvector's 1MB
+    # limit so a huge writeup can never make the write fail.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION writeup_search_vector(
+            p_id integer, p_title text, p_summary text, p_content text
+        ) RETURNS tsvector LANGUAGE sql STABLE AS $$
+            SELECT
+                setweight(to_tsvector('english', coalesce(p_title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce((
+                    SELECT string_agg(t.name, ' ')
+                    FROM writeup_tags wt JOIN tags t ON t.id = wt.tag_id
+                    WHERE wt.writeup_id = p_id
+                ), '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(p_summary, '')), 'C') ||
+                setweight(to_tsvector('english', left(coalesce(p_content, ''), 200000)), 'D')
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION writeups_search_vector_refresh() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := writeup_search_vector(NEW.id, NEW.title, NEW.summary, NEW.writeup_content);
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER writeups_search_vector_refresh
+        BEFORE INSERT OR UPDATE OF title, summary, writeup_content ON writeups
+        FOR EACH ROW EXECUTE FUNCTION writeups_search_vector_refresh()
+    """)
+
+    # Tag links are written after the writeup row, so re-index on link changes
+    op.execute("""
+        CREATE OR REPLACE FUNCTION writeup_tags_search_vector_refresh() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE writeups
+            SET search_vector = writeup_search_vector(id, title, summary, writeup_content)
+            WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.writeup_id ELSE NEW.writeup_id END;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER writeup_tags_search_vector_refresh
+        AFTER INSERT OR DELETE ON writeup_tags
+        FOR EACH ROW EXECUTE FUNCTION writeup_tags_search_vector_refresh()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tags_search_vector_refresh() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE writeups w
+            SET search_vector = writeup_search_vector(w.id, w.title, w.summary, w.writeup_content)
+            FROM writeup_tags wt
+            WHERE wt.tag_id = NEW.id AND wt.writeup_id = w.id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tags_search_vector_refresh
+        AFTER UPDATE OF name ON tags
+        FOR EACH ROW EXECUTE FUNCTION tags_search_vector_refresh()
+    """)
+
+    op.execute("UPDATE writeups SET search_vector = writeup_search_vector(id, title, summary, writeup_content)")
+    op.execute("CREATE INDEX ix_writeups_search_vector ON writeups USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS tags_search_vector_refresh ON tags")
+    op.execute("DROP TRIGGER IF EXISTS writeup_tags_search_vector_refresh ON writeup_tags")
+    op.execute("DROP TRIGGER IF EXISTS writeups_search_vector_refresh ON writeups")
+    op.execute("DROP FUNCTION IF EXISTS tags_search_vector_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS writeup_tags_search_vector_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS writeups_search_vector_refresh()")
+    op.execute("DROP FUNCTION IF EXISTS writeup_search_vector(integer, text, text, text)")
+    op.execute("DROP INDEX IF EXISTS ix_writeups_search_vector")
+    op.drop_column('writeups', 'search_vector')
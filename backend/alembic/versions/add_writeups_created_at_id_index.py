@@ -0,0 +1,26 @@
+"""Add (created_at, id) index for keyset pagination of writeups
+
+Revision ID: add_writeups_created_at_id_index
+Revises: add_writeup_search
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_writeups_created_at_id_index'
+down_revision: Union[str, None] = 'add_writeup_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Scanned backwards for ORDER BY created_at DESC, id DESC
+    op.create_index('ix_writeups_created_at_id', 'writeups', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_writeups_created_at_id', table_name='writeups')
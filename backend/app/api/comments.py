@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import logging
  # from supabase import create_client, Client
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.security import get_current_admin_user
 from app.core.config import settings
 from app.models.comment import Comment
 from app.models.user import User
+from app.utils.metrics import track_dependency
+from app.utils import response_cache
 from app.schemas.comment import CommentCreate, CommentReply, Comment as CommentSchema, CommentUpdate
 from app.utils.spam_filter import is_spam
 from app.utils.email_templates import reply_notification_email
@@ -33,37 +37,52 @@ async def send_reply_notification(recipient_email: str, commenter_name: str, rep
     """Send email notification when someone replies to a comment"""
     if RESEND_CLIENT and settings.ADMIN_EMAIL:
         try:
-            RESEND_CLIENT.Emails.send({
-                "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
-                "to": recipient_email,
-                "subject": f"💬 {commenter_name} replied to your comment",
-                "html": reply_notification_email(commenter_name, reply_preview, writeup_id)
-            })
+            with track_dependency("resend", "send_email"):
+                RESEND_CLIENT.Emails.send({
+                    "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
+                    "to": recipient_email,
+                    "subject": f"💬 {commenter_name} replied to your comment",
+                    "html": reply_notification_email(commenter_name, reply_preview, writeup_id)
+                })
             logger.info(f"Reply notification sent to {recipient_email}")
         except Exception as e:
             logger.error(f"Error sending reply notification: {e}")
 
 
+def comment_fields(comment: Comment) -> dict:
+    """Column values of a comment, without touching its lazy relationships"""
+    return {column.key: getattr(comment, column.key) for column in Comment.__table__.columns}
+
+
 def build_comment_tree(comments: list, parent_id: int = None) -> list:
     """Build nested comment tree structure"""
     tree = []
     for comment in comments:
         if comment.reply_to_id == parent_id:
+            # Build response objects rather than assigning to the ORM
+            # relationship, which points at the parent comment
+            node = comment_fields(comment)
             # Find all replies to this comment
-            comment.replies = build_comment_tree(comments, comment.id)
-            tree.append(comment)
+            node["replies"] = build_comment_tree(comments, comment.id)
+            tree.append(CommentSchema.model_validate(node))
     return tree
 
 
 @router.get("/{writeup_id}", response_model=List[CommentSchema])
-async def get_comments(writeup_id: str, db: Session = Depends(get_db)):
+async def get_comments(writeup_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all approved comments for a writeup with nested replies"""
+    cached = await response_cache.lookup(request, (f"comments:{writeup_id}",))
+    if cached.response:
+        return cached.response
+    
     # Get all approved comments for this writeup (including replies)
-    all_comments = db.query(Comment).filter(
-        Comment.writeup_id == writeup_id,
-        Comment.is_approved == True,
-        Comment.is_spam == False,
-    ).order_by(Comment.created_at.asc()).all()
+    all_comments = (await db.scalars(
+        select(Comment).where(
+            Comment.writeup_id == writeup_id,
+            Comment.is_approved == True,
+            Comment.is_spam == False,
+        ).order_by(Comment.created_at.asc())
+    )).all()
     
     # Build nested tree structure - only return top-level comments with their replies
     top_level_comments = build_comment_tree(all_comments, None)
@@ -71,7 +90,7 @@ async def get_comments(writeup_id: str, db: Session = Depends(get_db)):
     # Reverse to show newest first
     top_level_comments.reverse()
     
-    return top_level_comments
+    return cached.store(top_level_comments, List[CommentSchema])
 
 @router.post("/", response_model=CommentSchema, status_code=status.HTTP_201_CREATED)
 async def create_comment(
@@ -94,10 +113,11 @@ async def create_comment(
     db.add(comment)
     db.commit()
     db.refresh(comment)
+    await response_cache.invalidate(f"comments:{comment.writeup_id}")
     
     # Supabase integration removed
     
-    return comment
+    return {**comment_fields(comment), "replies": []}
 
 @router.post("/{comment_id}/reply", response_model=CommentSchema, status_code=status.HTTP_201_CREATED)
 async def reply_to_comment(
@@ -132,6 +152,7 @@ async def reply_to_comment(
     db.add(reply_comment)
     db.commit()
     db.refresh(reply_comment)
+    await response_cache.invalidate(f"comments:{reply_comment.writeup_id}")
     
     # Send notification to original commenter
     if parent_comment.user_email != reply_data.user_email:  # Don't notify if replying to own comment
@@ -143,18 +164,20 @@ async def reply_to_comment(
             reply_data.writeup_id
         )
     
-    return reply_comment
+    return {**comment_fields(reply_comment), "replies": []}
 
 @router.get("/admin/pending", response_model=List[CommentSchema])
 async def get_pending_comments(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get all pending/spam comments for moderation (Admin only)"""
-    comments = db.query(Comment).filter(
-        (Comment.is_approved == False) | (Comment.is_spam == True)
-    ).order_by(Comment.created_at.desc()).all()
-    return comments
+    comments = (await db.scalars(
+        select(Comment).where(
+            (Comment.is_approved == False) | (Comment.is_spam == True)
+        ).order_by(Comment.created_at.desc())
+    )).all()
+    return [{**comment_fields(comment), "replies": []} for comment in comments]
 
 @router.patch("/{comment_id}", response_model=CommentSchema)
 async def moderate_comment(
@@ -177,7 +200,8 @@ async def moderate_comment(
     
     db.commit()
     db.refresh(comment)
-    return comment
+    await response_cache.invalidate(f"comments:{comment.writeup_id}")
+    return {**comment_fields(comment), "replies": []}
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_comment(
@@ -193,6 +217,8 @@ async def delete_comment(
             detail="Comment not found"
         )
     
+    writeup_id = comment.writeup_id
     db.delete(comment)
     db.commit()
+    await response_cache.invalidate(f"comments:{writeup_id}")
     return None
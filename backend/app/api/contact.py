@@ -1,22 +1,20 @@
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, BackgroundTasks
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime, timedelta
-from collections import defaultdict
 import httpx
 import os
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, get_async_db
 from app.core.config import settings
 from app.models.contact import ContactMessage, SpamLog
 from app.utils.email_templates import contact_confirmation_email, admin_notification_email
-from sqlalchemy import func
+from app.utils.rate_limit import RateLimiter
+from app.utils.metrics import track_dependency
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 router = APIRouter()
 
-# In-memory rate limiting cache
-ip_request_times = defaultdict(list)
-email_request_times = defaultdict(list)
-
 class ContactRequest(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: EmailStr
@@ -38,20 +36,25 @@ RATE_LIMIT_PER_IP = 5  # requests per hour
 RATE_LIMIT_PER_EMAIL = 3  # requests per hour
 WINDOW_SECONDS = 3600  # 1 hour
 
+# Shared rate limit counters (see app.utils.rate_limit)
+ip_limiter = RateLimiter("contact-ip", RATE_LIMIT_PER_IP, WINDOW_SECONDS)
+email_limiter = RateLimiter("contact-email", RATE_LIMIT_PER_EMAIL, WINDOW_SECONDS)
+
 async def verify_hcaptcha(token: str) -> bool:
     """Verify hCaptcha token with hCaptcha service"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://hcaptcha.com/siteverify",
-                data={
-                    "secret": HCAPTCHA_SECRET,
-                    "response": token,
-                },
-                timeout=10,
-            )
-            result = response.json()
-            return result.get("success", False)
+        with track_dependency("hcaptcha", "siteverify"):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    "https://hcaptcha.com/siteverify",
+                    data={
+                        "secret": HCAPTCHA_SECRET,
+                        "response": token,
+                    },
+                    timeout=10,
+                )
+                result = response.json()
+        return result.get("success", False)
     except Exception as e:
         print(f"hCaptcha verification error: {e}")
         return False
@@ -62,29 +65,16 @@ def get_client_ip(request: Request) -> str:
         return request.client.host
     return "unknown"
 
-def check_rate_limit(ip: str, email: str) -> tuple[bool, str]:
-    """Check if request should be rate limited"""
-    current_time = datetime.now()
-    window = timedelta(seconds=WINDOW_SECONDS)
-    
-    # Clean old requests for IP
-    ip_request_times[ip] = [
-        req_time for req_time in ip_request_times[ip]
-        if current_time - req_time < window
-    ]
-    
-    # Clean old requests for email
-    email_request_times[email] = [
-        req_time for req_time in email_request_times[email]
-        if current_time - req_time < window
-    ]
-    
+async def check_rate_limit(ip: str, email: str) -> tuple[bool, str]:
+    """Check if request should be rate limited (submissions are recorded once accepted)"""
     # Check IP rate limit
-    if len(ip_request_times[ip]) >= RATE_LIMIT_PER_IP:
+    ip_allowed, _ = await ip_limiter.check(ip)
+    if not ip_allowed:
         return False, f"Too many requests from your IP. Please try again in 1 hour."
     
     # Check email rate limit
-    if len(email_request_times[email]) >= RATE_LIMIT_PER_EMAIL:
+    email_allowed, _ = await email_limiter.check(email)
+    if not email_allowed:
         return False, f"Too many requests from this email. Please try again in 1 hour."
     
     return True, ""
@@ -110,12 +100,13 @@ async def send_confirmation_email(name: str, email: str):
     """Send confirmation email via Resend (background task)"""
     if RESEND_CLIENT:
         try:
-            RESEND_CLIENT.Emails.send({
-                "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
-                "to": email,
-                "subject": "We received your message ✓",
-                "html": contact_confirmation_email(name)
-            })
+            with track_dependency("resend", "send_email"):
+                RESEND_CLIENT.Emails.send({
+                    "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
+                    "to": email,
+                    "subject": "We received your message ✓",
+                    "html": contact_confirmation_email(name)
+                })
             print(f"Confirmation email sent to {email}")
         except Exception as e:
             print(f"Error sending confirmation email to {email}: {e}")
@@ -124,12 +115,13 @@ async def send_admin_notification(name: str, email: str, subject: str, message:
     """Send admin notification email (background task)"""
     if RESEND_CLIENT and settings.ADMIN_EMAIL:
         try:
-            RESEND_CLIENT.Emails.send({
-                "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
-                "to": settings.ADMIN_EMAIL,
-                "subject": f"📬 New message from {name}: {subject}",
-                "html": admin_notification_email(name, email, subject, message)
-            })
+            with track_dependency("resend", "send_email"):
+                RESEND_CLIENT.Emails.send({
+                    "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
+                    "to": settings.ADMIN_EMAIL,
+                    "subject": f"📬 New message from {name}: {subject}",
+                    "html": admin_notification_email(name, email, subject, message)
+                })
             print(f"Admin notification sent to {settings.ADMIN_EMAIL}")
         except Exception as e:
             print(f"Error sending admin notification: {e}")
@@ -163,7 +155,7 @@ async def submit_contact(request: ContactRequest, req: Request, background_tasks
             )
         
         # Check rate limiting
-        rate_limited, error_msg = check_rate_limit(client_ip, request.email)
+        rate_limited, error_msg = await check_rate_limit(client_ip, request.email)
         if not rate_limited:
             log_spam_activity(
                 db, client_ip, request.email, request.name,
@@ -202,8 +194,8 @@ async def submit_contact(request: ContactRequest, req: Request, background_tasks
         db.refresh(contact_msg)
         
         # Update rate limit tracking
-        ip_request_times[client_ip].append(datetime.now())
-        email_request_times[request.email].append(datetime.now())
+        await ip_limiter.record(client_ip)
+        await email_limiter.record(request.email)
         
         # Send confirmation email to user (background task)
         background_tasks.add_task(send_confirmation_email, request.name, request.email)
@@ -234,36 +226,31 @@ async def submit_contact(request: ContactRequest, req: Request, background_tasks
         db.close()
 
 @router.get("/api/contact/stats")
-async def get_contact_stats(request: Request):
+async def get_contact_stats(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Get spam statistics (admin endpoint - requires authentication)
     """
-    db = SessionLocal()
-    try:
-        # Get total messages
-        total_messages = db.query(func.count(ContactMessage.id)).scalar()
-        
-        # Get spam logs in last 24 hours
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        spam_24h = db.query(func.count(SpamLog.id)).filter(
-            SpamLog.created_at >= yesterday
-        ).scalar()
-        
-        # Get spam by reason
-        spam_by_reason = db.query(
-            SpamLog.reason,
-            func.count(SpamLog.id)
-        ).filter(
-            SpamLog.created_at >= yesterday
-        ).group_by(SpamLog.reason).all()
-        
-        return {
-            "total_messages": total_messages,
-            "spam_logs_24h": spam_24h,
-            "spam_by_reason": [
-                {"reason": reason, "count": count}
-                for reason, count in spam_by_reason
-            ]
-        }
-    finally:
-        db.close()
+    # Get total messages
+    total_messages = await db.scalar(select(func.count(ContactMessage.id)))
+    
+    # Get spam logs in last 24 hours
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    spam_24h = await db.scalar(
+        select(func.count(SpamLog.id)).where(SpamLog.created_at >= yesterday)
+    )
+    
+    # Get spam by reason
+    spam_by_reason = (await db.execute(
+        select(SpamLog.reason, func.count(SpamLog.id))
+        .where(SpamLog.created_at >= yesterday)
+        .group_by(SpamLog.reason)
+    )).all()
+    
+    return {
+        "total_messages": total_messages,
+        "spam_logs_24h": spam_24h,
+        "spam_by_reason": [
+            {"reason": reason, "count": count}
+            for reason, count in spam_by_reason
+        ]
+    }
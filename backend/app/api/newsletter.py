@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import logging
 
-from ..core.database import get_db
+from ..core.database import get_db, get_async_db
 from ..core.config import settings
 from ..models.newsletter import Newsletter
 from ..models.user import User
 from ..schemas.newsletter import NewsletterCreate, NewsletterResponse, NewsletterSendRequest
 from ..core.security import get_current_admin_user
 from ..utils.email_templates import newsletter_welcome_email, newsletter_email
+from ..utils.metrics import track_dependency
 
 router = APIRouter(prefix="/api/newsletter", tags=["newsletter"])
 logger = logging.getLogger(__name__)
@@ -28,12 +31,13 @@ async def send_welcome_email(email: str):
     """Send welcome email when someone subscribes to newsletter"""
     if RESEND_CLIENT:
         try:
-            RESEND_CLIENT.Emails.send({
-                "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
-                "to": email,
-                "subject": "🎉 Welcome to my Cybersecurity Newsletter!",
-                "html": newsletter_welcome_email(email)
-            })
+            with track_dependency("resend", "send_email"):
+                RESEND_CLIENT.Emails.send({
+                    "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
+                    "to": email,
+                    "subject": "🎉 Welcome to my Cybersecurity Newsletter!",
+                    "html": newsletter_welcome_email(email)
+                })
             logger.info(f"Welcome email sent to {email}")
         except Exception as e:
             logger.error(f"Error sending welcome email to {email}: {e}")
@@ -144,12 +148,13 @@ async def send_newsletter(request: NewsletterSendRequest, db: Session = Depends(
         # Send to each subscriber
         for subscriber in subscribers:
             try:
-                RESEND_CLIENT.Emails.send({
-                    "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
-                    "to": subscriber.email,
-                    "subject": request.subject,
-                    "html": newsletter_email(request.subject, request.html_content, subscriber.email),
-                })
+                with track_dependency("resend", "send_email"):
+                    RESEND_CLIENT.Emails.send({
+                        "from": "Wiltord Ichingwa <wiltord@wiltordichingwa.dev>",
+                        "to": subscriber.email,
+                        "subject": request.subject,
+                        "html": newsletter_email(request.subject, request.html_content, subscriber.email),
+                    })
                 sent_count += 1
             except Exception as e:
                 logger.error(f"Error sending newsletter to {subscriber.email}: {e}")
@@ -170,10 +175,10 @@ async def send_newsletter(request: NewsletterSendRequest, db: Session = Depends(
 
 
 @router.get("/subscribers/count")
-async def get_subscriber_count(db: Session = Depends(get_db), current_user: User = Depends(get_current_admin_user)):
+async def get_subscriber_count(db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_admin_user)):
     """Get active subscriber count (admin only)"""
     try:
-        count = db.query(Newsletter).filter(Newsletter.is_active == True).count()
+        count = await db.scalar(select(func.count(Newsletter.id)).where(Newsletter.is_active == True))
         return {"active_subscribers": count}
     except Exception as e:
         logger.error(f"Error getting subscriber count: {e}")
@@ -1,19 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import ipaddress
+import json
+import logging
+import math
+import time
 import socket
-import nmap
-import requests
+import httpx
 import ssl
 from urllib.parse import urlparse, urljoin
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_admin_user
 from app.core.config import settings
 from app.models.user import User
+from app.utils.port_scanner import scan_ports, iter_scan_ports
+from app.utils.dns_cache import resolve_host
+from app.utils.ip_pinning import pin_host, pinned_address
+from app.utils.tls_cache import get_tls_details_cached
+from app.utils.tls_scanner import enumerate_tls
+from app.utils import cve_store
+from app.utils import http_client
+from app.utils.scan_pipeline import PipelineStage, iter_pipeline
+from app.utils.rate_limit import RateLimiter
+from app.utils.metrics import track_dependency
+from app.utils.bulk_scan import PolitenessScheduler, stream_as_completed, parse_target_list
+from app.utils.scan_jobs import scan_jobs, ScanJobContext, ScanJobError, JobQueueFull, UserJobLimitExceeded
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class ScanRequest(BaseModel):
     target_url: HttpUrl
@@ -44,18 +63,19 @@ class ApiAuditRequest(BaseModel):
     include_options_probe: bool = True
 
 # Rate limiting: Track scans per user
-scan_history = {}
-scan_window = timedelta(minutes=settings.SCANNER_RATE_WINDOW_MINUTES)
+scan_limiter = RateLimiter(
+    "scan", settings.SCANNER_MAX_SCANS_PER_USER, settings.SCANNER_RATE_WINDOW_MINUTES * 60
+)
 
 
-def _resolve_ip(hostname: str) -> str:
-    """Resolve hostname to IPv4/IPv6 string or raise."""
+async def _resolve_ips(hostname: str, detail: str = "Could not resolve target host") -> List[str]:
+    """Resolve hostname to all of its IPv4/IPv6 addresses (cached) or raise."""
     try:
-        return socket.gethostbyname(hostname)
+        return await resolve_host(hostname)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not resolve target host"
+            detail=detail
         )
 
 
@@ -74,11 +94,17 @@ def _is_private_or_local(ip_str: str) -> bool:
         return True
 
 
+def _any_private_or_local(addresses: List[str]) -> bool:
+    """A host is only public if every address it resolves to is public."""
+    return any(_is_private_or_local(ip) for ip in addresses)
+
+
 def _get_tls_details(hostname: str, port: int = 443) -> Dict[str, Any]:
     """Inspect TLS handshake for basic certificate and protocol details."""
     context = ssl.create_default_context()
     try:
-        with socket.create_connection((hostname, port), timeout=5) as sock:
+        # Connect to the pinned address; SNI and certificate checks still use hostname
+        with socket.create_connection((pinned_address(hostname), port), timeout=5) as sock:
             with context.wrap_socket(sock, server_hostname=hostname) as ssock:
                 cert = ssock.getpeercert()
                 proto = ssock.version() or "unknown"
@@ -95,14 +121,24 @@ def _get_tls_details(hostname: str, port: int = 443) -> Dict[str, Any]:
         return {"error": str(exc)}
 
 
-def _safe_request(method: str, url: str, timeout: int = 8, allow_redirects: bool = True) -> Dict[str, Any]:
+async def _inspect_tls(hostname: str, port: int = 443) -> Dict[str, Any]:
+    """Certificate details plus the full protocol/cipher matrix, probed concurrently."""
+    tls_info, enumeration = await asyncio.gather(
+        asyncio.to_thread(_get_tls_details, hostname, port),
+        enumerate_tls(hostname, port),
+    )
+    if "error" in tls_info:
+        return tls_info
+    return {**tls_info, "enumeration": enumeration}
+
+
+async def _safe_request(method: str, url: str, timeout: int = 8, allow_redirects: bool = True) -> Dict[str, Any]:
     try:
-        response = requests.request(
+        response = await http_client.request(
             method,
             url,
             timeout=timeout,
-            allow_redirects=allow_redirects,
-            headers={"User-Agent": "PortCyberScanner/1.0"},
+            follow_redirects=allow_redirects,
         )
         return {"response": response}
     except Exception as exc:
@@ -110,9 +146,11 @@ def _safe_request(method: str, url: str, timeout: int = 8, allow_redirects: bool
 
 def perform_port_scan(target: str) -> Dict[str, Any]:
     """Perform nmap port scan"""
+    import nmap  # imported when a scan first needs it
+
     nm = nmap.PortScanner()
     try:
-        nm.scan(target, arguments='-sV -sC')
+        nm.scan(pinned_address(target), arguments='-sV -sC')
         results = {}
         for host in nm.all_hosts():
             results[host] = {
@@ -133,7 +171,7 @@ def perform_port_scan(target: str) -> Dict[str, Any]:
     except Exception as e:
         return {'error': str(e)}
 
-def check_sql_injection(url: str) -> Dict[str, Any]:
+async def check_sql_injection(url: str) -> Dict[str, Any]:
     """Basic SQL injection detection"""
     test_payloads = [
         "' OR '1'='1",
@@ -142,30 +180,34 @@ def check_sql_injection(url: str) -> Dict[str, Any]:
         "admin'--"
     ]
     
+    # Payloads are independent, so send them together over the shared pool
+    responses = await asyncio.gather(
+        *(http_client.request("GET", url, timeout=5, params={"id": payload}) for payload in test_payloads),
+        return_exceptions=True,
+    )
+
     vulnerabilities = []
-    for payload in test_payloads:
-        try:
-            response = requests.get(f"{url}?id={payload}", timeout=5)
-            if "sql" in response.text.lower() or "syntax" in response.text.lower():
-                vulnerabilities.append({
-                    'type': 'SQL Injection',
-                    'severity': 'High',
-                    'payload': payload,
-                    'description': 'Potential SQL injection vulnerability detected'
-                })
-                break
-        except Exception:
+    for payload, response in zip(test_payloads, responses):
+        if isinstance(response, Exception):
             continue
+        if "sql" in response.text.lower() or "syntax" in response.text.lower():
+            vulnerabilities.append({
+                'type': 'SQL Injection',
+                'severity': 'High',
+                'payload': payload,
+                'description': 'Potential SQL injection vulnerability detected'
+            })
+            break
     
     return {'sql_injection': vulnerabilities}
 
-def check_xss(url: str) -> Dict[str, Any]:
+async def check_xss(url: str) -> Dict[str, Any]:
     """Basic XSS detection"""
     test_payload = "<script>alert('XSS')</script>"
     vulnerabilities = []
     
     try:
-        response = requests.get(f"{url}?search={test_payload}", timeout=5)
+        response = await http_client.request("GET", url, timeout=5, params={"search": test_payload})
         if test_payload in response.text:
             vulnerabilities.append({
                 'type': 'Cross-Site Scripting (XSS)',
@@ -178,64 +220,65 @@ def check_xss(url: str) -> Dict[str, Any]:
     
     return {'xss': vulnerabilities}
 
-def check_headers(url: str) -> Dict[str, Any]:
+async def check_headers(url: str) -> Dict[str, Any]:
     """Check security headers"""
     try:
-        response = requests.get(url, timeout=5)
-        headers = response.headers
-        
-        missing_headers = []
-        security_headers = [
-            'X-Frame-Options',
-            'X-Content-Type-Options',
-            'Strict-Transport-Security',
-            'Content-Security-Policy',
-            'X-XSS-Protection'
-        ]
-        
-        for header in security_headers:
-            if header not in headers:
-                missing_headers.append({
-                    'type': 'Missing Security Header',
-                    'severity': 'Low',
-                    'header': header,
-                    'description': f'Missing {header} header'
-                })
+        response = await http_client.request("GET", url, timeout=5)
+        return analyze_headers(response)
+    except Exception as e:
+        return {'error': str(e)}
 
-        cors_findings = []
-        allow_origin = headers.get('Access-Control-Allow-Origin')
-        allow_creds = headers.get('Access-Control-Allow-Credentials')
-        if allow_origin == "*" and allow_creds and allow_creds.lower() == "true":
-            cors_findings.append({
-                'type': 'CORS Misconfiguration',
-                'severity': 'Medium',
-                'description': 'Access-Control-Allow-Origin is * with credentials allowed; browsers will refuse but indicates lax policy'
-            })
 
-        directory_listing = []
-        if response.status_code == 200 and "Index of /" in response.text:
-            directory_listing.append({
-                'type': 'Directory Listing',
+def analyze_headers(response: httpx.Response) -> Dict[str, List[Dict[str, Any]]]:
+    """Security header, CORS and directory listing checks on an already fetched response"""
+    headers = response.headers
+    
+    missing_headers = []
+    security_headers = [
+        'X-Frame-Options',
+        'X-Content-Type-Options',
+        'Strict-Transport-Security',
+        'Content-Security-Policy',
+        'X-XSS-Protection'
+    ]
+    
+    for header in security_headers:
+        if header not in headers:
+            missing_headers.append({
+                'type': 'Missing Security Header',
                 'severity': 'Low',
-                'description': 'Directory listing appears enabled on root'
+                'header': header,
+                'description': f'Missing {header} header'
             })
 
-        return {
-            'headers': missing_headers,
-            'cors': cors_findings,
-            'directory_listing': directory_listing
-        }
-    except Exception as e:
-        return {'error': str(e)}
+    cors_findings = []
+    allow_origin = headers.get('Access-Control-Allow-Origin')
+    allow_creds = headers.get('Access-Control-Allow-Credentials')
+    if allow_origin == "*" and allow_creds and allow_creds.lower() == "true":
+        cors_findings.append({
+            'type': 'CORS Misconfiguration',
+            'severity': 'Medium',
+            'description': 'Access-Control-Allow-Origin is * with credentials allowed; browsers will refuse but indicates lax policy'
+        })
 
+    directory_listing = []
+    if response.status_code == 200 and "Index of /" in response.text:
+        directory_listing.append({
+            'type': 'Directory Listing',
+            'severity': 'Low',
+            'description': 'Directory listing appears enabled on root'
+        })
 
-@router.post("/advanced-scan")
-async def advanced_scan(
-    scan_request: AdvancedScanRequest,
-    current_user: User = Depends(get_current_user)
-):
-    """Safer advanced web scan with TLS inspection and optional port scan."""
-    parsed_url = urlparse(str(scan_request.target_url))
+    return {
+        'headers': missing_headers,
+        'cors': cors_findings,
+        'directory_listing': directory_listing
+    }
+
+
+async def _validate_scan_target(target_url: str) -> Tuple[str, List[str]]:
+    """Check scheme and block private/local targets. Returns the hostname and its addresses."""
+    parsed_url = urlparse(target_url)
     if parsed_url.scheme not in {"http", "https"}:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -249,127 +292,187 @@ async def advanced_scan(
             detail="Invalid target host"
         )
 
-    resolved_ip = _resolve_ip(hostname)
-    if _is_private_or_local(resolved_ip) and not settings.SCANNER_ALLOW_PRIVATE:
+    addresses = await _resolve_ips(hostname)
+    if _any_private_or_local(addresses) and not settings.SCANNER_ALLOW_PRIVATE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Target resolves to a private or local address; scanning blocked"
         )
+    return hostname, addresses
 
-    # Sliding window rate limit per user
-    user_scans = scan_history.get(current_user.username, [])
-    now = datetime.now()
-    user_scans = [t for t in user_scans if now - t < scan_window]
-    if len(user_scans) >= settings.SCANNER_MAX_SCANS_PER_USER:
+
+async def _check_scan_rate_limit(username: str) -> None:
+    """Sliding window rate limit per user; records the scan when allowed."""
+    allowed, retry_after = await scan_limiter.hit(username)
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Scan limit exceeded. Please try again later."
+            detail="Scan limit exceeded. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
         )
-    scan_history[current_user.username] = user_scans + [now]
 
-    target = str(scan_request.target_url)
-    findings: List[Dict[str, Any]] = []
-    metadata: Dict[str, Any] = {"target": target, "host": hostname}
 
-    primary = _safe_request("GET", target)
-    if "error" in primary:
+async def _submit_scan_job(current_user: User, kind: str, target: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        job = await scan_jobs.submit(current_user.username, kind, target, params)
+    except UserJobLimitExceeded as e:
         raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Target unreachable: {primary['error']}"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
         )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    return {
+        "job_id": job["job_id"],
+        "kind": kind,
+        "target": target,
+        "status": job["status"],
+        "status_url": f"/api/scanner/jobs/{job['job_id']}",
+        "created_at": job["created_at"],
+    }
 
-    resp = primary["response"]
-    metadata.update(
-        {
-            "status_code": resp.status_code,
-            "final_url": str(resp.url),
-            "redirects": len(resp.history),
-            "server": resp.headers.get("Server"),
-            "powered_by": resp.headers.get("X-Powered-By"),
-            "content_type": resp.headers.get("Content-Type"),
-        }
-    )
 
-    # Transport findings
-    if parsed_url.scheme != "https":
-        findings.append(
-            {
-                "type": "Insecure Transport",
-                "severity": "Medium",
-                "description": "Target served over HTTP; enable HTTPS with HSTS",
-            }
-        )
-    elif metadata.get("redirects") and str(resp.url).startswith("http://"):
-        findings.append(
+@router.post("/advanced-scan", status_code=status.HTTP_202_ACCEPTED)
+async def advanced_scan(
+    scan_request: AdvancedScanRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue a safer advanced web scan with TLS inspection and optional port scan.
+    Returns a job id; poll GET /jobs/{job_id} for progress and results.
+    """
+    target = str(scan_request.target_url)
+    _, addresses = await _validate_scan_target(target)
+    await _check_scan_rate_limit(current_user.username)
+    # The job connects to the address validated here rather than resolving again
+    params = {**scan_request.model_dump(mode="json"), "address": addresses[0]}
+    return await _submit_scan_job(current_user, "advanced-scan", target, params)
+
+
+class TargetUnreachable(Exception):
+    """The primary request to a scan target failed."""
+
+
+def _advanced_check_stages(
+    target: str,
+    hostname: str,
+    metadata: Dict[str, Any],
+    include_port_scan: bool = False,
+) -> List[PipelineStage]:
+    """
+    Stages of the advanced web scan.
+
+    The target is fetched once and that response feeds the transport, header,
+    cookie, cache and banner checks; the OPTIONS, TLS and port scan probes do
+    not need it and run concurrently with it. Every stage except
+    ``primary_request`` returns its list of findings; response details are
+    recorded in ``metadata``.
+    """
+    parsed_url = urlparse(target)
+
+    async def primary_request(results: Dict[str, Any]) -> httpx.Response:
+        primary = await _safe_request("GET", target)
+        if "error" in primary:
+            raise TargetUnreachable(primary["error"])
+        resp = primary["response"]
+        metadata.update(
             {
-                "type": "Redirect Downgrade",
-                "severity": "High",
-                "description": "Redirect chain ends on HTTP; enforce HTTPS redirects",
+                "status_code": resp.status_code,
+                "final_url": str(resp.url),
+                "redirects": len(resp.history),
+                "server": resp.headers.get("Server"),
+                "powered_by": resp.headers.get("X-Powered-By"),
+                "content_type": resp.headers.get("Content-Type"),
             }
         )
+        return resp
 
-    # Header-based checks
-    header_results = check_headers(target)
-    if isinstance(header_results, dict):
-        for bucket in ("headers", "cors", "directory_listing"):
-            if header_results.get(bucket):
-                findings.extend(header_results[bucket])
-
-    # Cookie flags
-    for cookie in resp.cookies:
-        if not cookie.secure:
+    async def transport(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        resp = results["primary_request"]
+        findings = []
+        if parsed_url.scheme != "https":
             findings.append(
                 {
-                    "type": "Cookie Missing Secure Flag",
+                    "type": "Insecure Transport",
                     "severity": "Medium",
-                    "description": f"Cookie '{cookie.name}' is not marked Secure",
+                    "description": "Target served over HTTP; enable HTTPS with HSTS",
                 }
             )
-        if not cookie.has_nonstandard_attr("HttpOnly"):
+        elif resp.history and str(resp.url).startswith("http://"):
             findings.append(
                 {
-                    "type": "Cookie Missing HttpOnly",
-                    "severity": "Medium",
-                    "description": f"Cookie '{cookie.name}' is not HttpOnly",
+                    "type": "Redirect Downgrade",
+                    "severity": "High",
+                    "description": "Redirect chain ends on HTTP; enforce HTTPS redirects",
                 }
             )
+        return findings
 
-    cache_control = resp.headers.get("Cache-Control")
-    if parsed_url.scheme == "https" and not cache_control:
-        findings.append(
-            {
-                "type": "Missing Cache-Control",
-                "severity": "Low",
-                "description": "Cache-Control header absent; set caching policy for sensitive responses",
-            }
-        )
-
-    if "server" in metadata and metadata["server"]:
-        findings.append(
-            {
-                "type": "Server Banner Exposed",
-                "severity": "Info",
-                "description": f"Server header reveals '{metadata['server']}'",
-            }
-        )
-
-    # OPTIONS probe
-    options_probe = _safe_request("OPTIONS", target, allow_redirects=False)
-    if "response" in options_probe:
-        allow_header = options_probe["response"].headers.get("Allow")
-        metadata["allow_methods"] = allow_header
-        if allow_header and any(m in allow_header for m in ["PUT", "DELETE", "TRACE"]):
+    async def headers(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        resp = results["primary_request"]
+        header_results = analyze_headers(resp)
+        findings = [f for bucket in ("headers", "cors", "directory_listing") for f in header_results[bucket]]
+        if parsed_url.scheme == "https" and not resp.headers.get("Cache-Control"):
             findings.append(
                 {
-                    "type": "Excessive Methods",
-                    "severity": "Medium",
-                    "description": f"OPTIONS advertises risky methods: {allow_header}",
+                    "type": "Missing Cache-Control",
+                    "severity": "Low",
+                    "description": "Cache-Control header absent; set caching policy for sensitive responses",
+                }
+            )
+        if metadata.get("server"):
+            findings.append(
+                {
+                    "type": "Server Banner Exposed",
+                    "severity": "Info",
+                    "description": f"Server header reveals '{metadata['server']}'",
                 }
             )
+        return findings
 
-    # TLS details
-    if parsed_url.scheme == "https":
-        tls_info = _get_tls_details(hostname)
+    async def cookies(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        findings = []
+        for cookie in results["primary_request"].cookies.jar:
+            if not cookie.secure:
+                findings.append(
+                    {
+                        "type": "Cookie Missing Secure Flag",
+                        "severity": "Medium",
+                        "description": f"Cookie '{cookie.name}' is not marked Secure",
+                    }
+                )
+            if not cookie.has_nonstandard_attr("HttpOnly"):
+                findings.append(
+                    {
+                        "type": "Cookie Missing HttpOnly",
+                        "severity": "Medium",
+                        "description": f"Cookie '{cookie.name}' is not HttpOnly",
+                    }
+                )
+        return findings
+
+    async def options_probe(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        findings = []
+        options = await _safe_request("OPTIONS", target, allow_redirects=False)
+        if "response" in options:
+            allow_header = options["response"].headers.get("Allow")
+            metadata["allow_methods"] = allow_header
+            if allow_header and any(m in allow_header for m in ["PUT", "DELETE", "TRACE"]):
+                findings.append(
+                    {
+                        "type": "Excessive Methods",
+                        "severity": "Medium",
+                        "description": f"OPTIONS advertises risky methods: {allow_header}",
+                    }
+                )
+        return findings
+
+    async def tls(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        findings = []
+        tls_info = await asyncio.to_thread(_get_tls_details, hostname)
         metadata["tls"] = tls_info
         proto = tls_info.get("protocol") if isinstance(tls_info, dict) else None
         if proto in {"TLSv1", "TLSv1.1"}:
@@ -380,10 +483,11 @@ async def advanced_scan(
                     "description": f"TLS protocol {proto} in use; upgrade to TLS 1.2+",
                 }
             )
+        return findings
 
-    # Optional port scan (quick)
-    if scan_request.include_port_scan:
-        port_results = perform_port_scan(hostname)
+    async def port_scan(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        findings = []
+        port_results = await asyncio.to_thread(perform_port_scan, hostname)
         if "error" not in port_results:
             for host, data in port_results.items():
                 for port_info in data.get("ports", []):
@@ -403,16 +507,160 @@ async def advanced_scan(
                     "description": port_results.get("error", "Port scan failed"),
                 }
             )
+        return findings
+
+    stages = [
+        PipelineStage("primary_request", primary_request),
+        PipelineStage("transport", transport, depends_on=["primary_request"]),
+        PipelineStage("headers", headers, depends_on=["primary_request"]),
+        PipelineStage("cookies", cookies, depends_on=["primary_request"]),
+        PipelineStage("options_probe", options_probe),
+    ]
+    if parsed_url.scheme == "https":
+        stages.append(PipelineStage("tls", tls))
+    if include_port_scan:
+        stages.append(PipelineStage("port_scan", port_scan))
+    return stages
+
+
+async def _run_advanced_checks(
+    target: str,
+    hostname: str,
+    include_port_scan: bool = False,
+    stage_wrapper: Optional[Callable[[str], Any]] = None,
+    report: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Advanced web scan as a dependency-aware pipeline.
 
+    ``report`` receives each stage's findings as soon as the stage finishes.
+    Returns findings in stage order and metadata including per-stage durations.
+    """
+    metadata: Dict[str, Any] = {"target": target, "host": hostname}
+    stages = _advanced_check_stages(target, hostname, metadata, include_port_scan)
+    stage_findings: Dict[str, List[Dict[str, Any]]] = {}
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    async for name, value, elapsed in iter_pipeline(stages, wrap=stage_wrapper):
+        timings[name] = elapsed
+        if name == "primary_request":
+            continue
+        stage_findings[name] = value
+        if report and value:
+            report(value)
+    metadata["timings"] = timings
+    metadata["duration"] = round(time.perf_counter() - start, 3)
+
+    findings = [f for stage in stages for f in stage_findings.get(stage.name, [])]
+    return {"findings": findings, "metadata": metadata}
+
+
+async def _run_advanced_scan(job: ScanJobContext) -> Dict[str, Any]:
+    """Execute an advanced scan job, reporting findings as each stage finishes."""
+    target = job.params["target_url"]
+    parsed_url = urlparse(target)
+    hostname = parsed_url.hostname or parsed_url.netloc or parsed_url.path
+    if job.params.get("address"):
+        pin_host(hostname, job.params["address"])
+
+    try:
+        outcome = await _run_advanced_checks(
+            target,
+            hostname,
+            include_port_scan=bool(job.params.get("include_port_scan")),
+            stage_wrapper=job.stage,
+            report=job.add_findings,
+        )
+    except TargetUnreachable as e:
+        raise ScanJobError(f"Target unreachable: {e}")
+
+    # Replace the completion-ordered progress list with the stable stage order
+    job.findings[:] = outcome["findings"]
+    outcome["metadata"]["address"] = job.params.get("address")
     return {
         "target": target,
         "status": "completed",
-        "findings": findings,
-        "metadata": metadata,
+        "findings": outcome["findings"],
+        "metadata": outcome["metadata"],
         "timestamp": datetime.now().isoformat(),
     }
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_advanced_checks(target: str, hostname: str, address: str, include_port_scan: bool = False):
+    """
+    Advanced web scan as a stream of SSE events.
+
+    Emits ``finding`` for every finding and ``stage`` for every completed stage
+    as soon as they are known, then a ``summary`` (or ``error``) event. Findings
+    are not retained, only counted, so memory does not grow with their number.
+    """
+    pin_host(hostname, address)
+    metadata: Dict[str, Any] = {"target": target, "host": hostname, "address": address}
+    stages = _advanced_check_stages(target, hostname, metadata, include_port_scan)
+    severity_counts: Dict[str, int] = {}
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    yield _sse("start", {"target": target, "host": hostname, "stages": [stage.name for stage in stages]})
+    try:
+        async for name, value, elapsed in iter_pipeline(stages):
+            timings[name] = elapsed
+            findings = value if name != "primary_request" else []
+            for finding in findings:
+                severity_counts[finding["severity"]] = severity_counts.get(finding["severity"], 0) + 1
+                yield _sse("finding", {"stage": name, **finding})
+            yield _sse("stage", {"name": name, "duration": elapsed, "findings": len(findings)})
+    except TargetUnreachable as e:
+        yield _sse("error", {"target": target, "detail": f"Target unreachable: {e}"})
+        return
+    except Exception as e:
+        logger.error(f"Streaming scan of {target} failed: {e}")
+        yield _sse("error", {"target": target, "detail": f"Scan failed: {str(e)}"})
+        return
+
+    metadata["timings"] = timings
+    metadata["duration"] = round(time.perf_counter() - start, 3)
+    yield _sse("summary", {
+        "target": target,
+        "status": "completed",
+        "total_findings": sum(severity_counts.values()),
+        "severity_counts": severity_counts,
+        "metadata": metadata,
+        "timestamp": datetime.now().isoformat(),
+    })
+
+
+@router.post("/advanced-scan/stream")
+async def advanced_scan_stream(
+    scan_request: AdvancedScanRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Run an advanced web scan and stream findings as Server-Sent Events.
+    Same checks and limits as /advanced-scan, without the job queue.
+    """
+    target = str(scan_request.target_url)
+    hostname, addresses = await _validate_scan_target(target)
+    await _check_scan_rate_limit(current_user.username)
+    return _sse_response(
+        _stream_advanced_checks(target, hostname, addresses[0], scan_request.include_port_scan)
+    )
+
+
 @router.post("/api-audit")
 async def api_audit(
     audit_request: ApiAuditRequest,
@@ -433,12 +681,13 @@ async def api_audit(
             detail="Invalid target host"
         )
 
-    resolved_ip = _resolve_ip(hostname)
-    if _is_private_or_local(resolved_ip) and not settings.SCANNER_ALLOW_PRIVATE:
+    addresses = await _resolve_ips(hostname)
+    if _any_private_or_local(addresses) and not settings.SCANNER_ALLOW_PRIVATE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Target resolves to a private or local address; scanning blocked"
         )
+    pin_host(hostname, addresses[0])
 
     target = str(audit_request.base_url).rstrip("/") + "/"
     endpoints = audit_request.endpoints or [
@@ -454,7 +703,7 @@ async def api_audit(
         full_url = urljoin(target, ep.path.lstrip("/"))
         probe_result: Dict[str, Any] = {"endpoint": ep.path, "method": ep.method, "url": full_url}
 
-        result = _safe_request(ep.method, full_url, allow_redirects=False)
+        result = await _safe_request(ep.method, full_url, allow_redirects=False)
         if "error" in result:
             findings.append(
                 {
@@ -506,7 +755,7 @@ async def api_audit(
             )
 
         if audit_request.include_options_probe:
-            opt = _safe_request("OPTIONS", full_url, allow_redirects=False)
+            opt = await _safe_request("OPTIONS", full_url, allow_redirects=False)
             allow_header = opt.get("response").headers.get("Allow") if opt.get("response") else None
             probe_result["allow_methods"] = allow_header
             if allow_header and any(m in allow_header for m in ["PUT", "DELETE", "TRACE"]):
@@ -538,85 +787,62 @@ async def api_audit(
         "timestamp": datetime.now().isoformat(),
     }
 
-@router.post("/scan", response_model=ScanResult)
+@router.post("/scan", status_code=status.HTTP_202_ACCEPTED)
 async def scan_target(
     scan_request: ScanRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
     """
-    Perform security scan on target URL
+    Queue a security scan on target URL.
+    Returns a job id; poll GET /jobs/{job_id} for progress and results.
     
     **Warning**: Only scan targets you have permission to test!
     """
-    parsed_url = urlparse(str(scan_request.target_url))
-    if parsed_url.scheme not in {"http", "https"}:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only http and https targets are supported"
-        )
-
-    hostname = parsed_url.hostname or parsed_url.netloc or parsed_url.path
-    if not hostname:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid target host"
-        )
-
-    resolved_ip = _resolve_ip(hostname)
-    if _is_private_or_local(resolved_ip) and not settings.SCANNER_ALLOW_PRIVATE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Target resolves to a private or local address; scanning blocked"
-        )
+    target = str(scan_request.target_url)
+    _, addresses = await _validate_scan_target(target)
+    await _check_scan_rate_limit(current_user.username)
+    params = {**scan_request.model_dump(mode="json"), "address": addresses[0]}
+    return await _submit_scan_job(current_user, "scan", target, params)
 
-    # Sliding window rate limit per user
-    user_scans = scan_history.get(current_user.username, [])
-    now = datetime.now()
-    user_scans = [t for t in user_scans if now - t < scan_window]
-    if len(user_scans) >= settings.SCANNER_MAX_SCANS_PER_USER:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Scan limit exceeded. Please try again later."
-        )
 
-    target = str(scan_request.target_url)
-    scan_history[current_user.username] = user_scans
-    # Rate limiting check
-    user_scans = scan_history.get(current_user.username, [])
-    if len(user_scans) >= 5:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Scan limit exceeded. Please try again later."
-        )
-    
-    vulnerabilities = []
+async def _run_basic_scan(job: ScanJobContext) -> Dict[str, Any]:
+    """Execute a basic/full/aggressive scan job, reporting findings per stage."""
+    target = job.params["target_url"]
+    scan_type = job.params.get("scan_type", "basic")
+    parsed_url = urlparse(target)
+    hostname = parsed_url.hostname or parsed_url.netloc or parsed_url.path
+    if job.params.get("address"):
+        pin_host(hostname, job.params["address"])
+    vulnerabilities = job.findings
     
-    try:
-        # Security header check (safe to run)
-        header_results = check_headers(target)
+    # Security header check (safe to run)
+    async with job.stage("headers"):
+        header_results = await check_headers(target)
         if 'headers' in header_results:
             vulnerabilities.extend(header_results['headers'])
         if 'cors' in header_results:
             vulnerabilities.extend(header_results['cors'])
         if 'directory_listing' in header_results:
             vulnerabilities.extend(header_results['directory_listing'])
-        
-        # Basic SQL injection check (limited payloads)
-        if scan_request.scan_type in ['full', 'aggressive']:
-            sql_results = check_sql_injection(target)
+    
+    # Basic SQL injection check (limited payloads)
+    if scan_type in ['full', 'aggressive']:
+        async with job.stage("sql_injection"):
+            sql_results = await check_sql_injection(target)
             if 'sql_injection' in sql_results:
                 vulnerabilities.extend(sql_results['sql_injection'])
-        
-        # XSS check
-        if scan_request.scan_type in ['full', 'aggressive']:
-            xss_results = check_xss(target)
+    
+    # XSS check
+    if scan_type in ['full', 'aggressive']:
+        async with job.stage("xss"):
+            xss_results = await check_xss(target)
             if 'xss' in xss_results:
                 vulnerabilities.extend(xss_results['xss'])
-        
-        # Port scan (only for aggressive scans)
-        if scan_request.scan_type == 'aggressive':
-            port_results = perform_port_scan(hostname)
+    
+    # Port scan (only for aggressive scans)
+    if scan_type == 'aggressive':
+        async with job.stage("port_scan"):
+            port_results = await asyncio.to_thread(perform_port_scan, hostname)
             if 'error' not in port_results:
                 for host, data in port_results.items():
                     for port_info in data.get('ports', []):
@@ -634,23 +860,170 @@ async def scan_target(
                     'severity': 'Info',
                     'description': port_results.get('error', 'Port scan failed')
                 })
-        
-        # Update scan history
-        scan_history.setdefault(current_user.username, []).append(now)
-        
-        return ScanResult(
-            target=target,
-            status="completed",
-            vulnerabilities=vulnerabilities,
-            scan_type=scan_request.scan_type,
-            timestamp=datetime.now().isoformat()
-        )
     
-    except Exception as e:
+    return ScanResult(
+        target=target,
+        status="completed",
+        vulnerabilities=vulnerabilities,
+        scan_type=scan_type,
+        timestamp=datetime.now().isoformat()
+    ).model_dump()
+
+
+scan_jobs.register("scan", _run_basic_scan)
+scan_jobs.register("advanced-scan", _run_advanced_scan)
+
+
+def _get_owned_job_or_404(job: Optional[Dict[str, Any]], current_user: User) -> Dict[str, Any]:
+    if not job or (job["owner"] != current_user.username and not current_user.is_admin):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Scan failed: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scan job not found"
         )
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_scan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get status, partial findings, timings and (when finished) the result of a scan job"""
+    return _get_owned_job_or_404(await scan_jobs.get(job_id), current_user)
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_scan_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a queued or running scan job"""
+    _get_owned_job_or_404(await scan_jobs.get(job_id), current_user)
+    if not await scan_jobs.cancel(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Scan job has already finished"
+        )
+    return await scan_jobs.get(job_id)
+
+class BulkScanRequest(BaseModel):
+    targets: List[str] = Field(..., min_length=1)
+    include_port_scan: bool = False
+
+
+BULK_TARGET_FILE_MAX_BYTES = 1024 * 1024
+
+
+async def _bulk_scan_target(
+    index: int,
+    raw_target: str,
+    scheduler: PolitenessScheduler,
+    include_port_scan: bool,
+) -> Dict[str, Any]:
+    """Validate and scan one bulk entry; every outcome becomes a result line."""
+    target = raw_target if "://" in raw_target else f"https://{raw_target}"
+    result: Dict[str, Any] = {"type": "result", "index": index, "input": raw_target, "target": target}
+    try:
+        hostname, addresses = await _validate_scan_target(target)
+    except HTTPException as e:
+        return {**result, "status": "rejected", "error": e.detail}
+
+    pin_host(hostname, addresses[0])
+    async with scheduler.slot(addresses[0]):
+        try:
+            outcome = await _run_advanced_checks(target, hostname, include_port_scan=include_port_scan)
+        except TargetUnreachable as e:
+            return {**result, "status": "failed", "error": f"Target unreachable: {e}"}
+        except Exception as e:
+            logger.error(f"Bulk scan of {target} failed: {e}")
+            return {**result, "status": "failed", "error": f"Scan failed: {str(e)}"}
+
+    return {
+        **result,
+        "status": "completed",
+        "findings": outcome["findings"],
+        "metadata": {**outcome["metadata"], "address": addresses[0]},
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+async def _stream_bulk_scan(targets: List[str], include_port_scan: bool):
+    scheduler = PolitenessScheduler(
+        settings.SCANNER_BULK_CONCURRENCY, settings.SCANNER_BULK_PER_HOST_CONCURRENCY
+    )
+    counts = {"completed": 0, "failed": 0, "rejected": 0}
+    start = time.perf_counter()
+    async for result in stream_as_completed(
+        _bulk_scan_target(i, t, scheduler, include_port_scan) for i, t in enumerate(targets)
+    ):
+        counts[result["status"]] += 1
+        yield json.dumps(result, default=str) + "\n"
+    yield json.dumps({
+        "type": "summary",
+        "total": len(targets),
+        **counts,
+        "duration": round(time.perf_counter() - start, 3),
+        "timestamp": datetime.now().isoformat(),
+    }) + "\n"
+
+
+def _start_bulk_scan(targets: List[str], include_port_scan: bool) -> StreamingResponse:
+    # Drop blanks and duplicates, keeping the submitted order
+    targets = list(dict.fromkeys(t.strip() for t in targets if t and t.strip()))
+    if not targets:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No targets provided"
+        )
+    if len(targets) > settings.SCANNER_BULK_MAX_TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many targets; the limit is {settings.SCANNER_BULK_MAX_TARGETS} per request"
+        )
+    return StreamingResponse(
+        _stream_bulk_scan(targets, include_port_scan),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/bulk-scan")
+async def bulk_scan(
+    scan_request: BulkScanRequest,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Advanced-scan a list of owned targets (admin only).
+
+    Streams one NDJSON line per target as it completes, then a summary line.
+    Every entry passes the same private/local address guard as single scans;
+    blocked or unresolvable entries are reported with status "rejected".
+    """
+    return _start_bulk_scan(scan_request.targets, scan_request.include_port_scan)
+
+
+@router.post("/bulk-scan/upload")
+async def bulk_scan_upload(
+    file: UploadFile = File(...),
+    include_port_scan: bool = Form(False),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Bulk scan from an uploaded target list (JSON array or one target per line)"""
+    content = await file.read(BULK_TARGET_FILE_MAX_BYTES + 1)
+    if len(content) > BULK_TARGET_FILE_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Target file too large (max 1MB)"
+        )
+    try:
+        targets = parse_target_list(content.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse target file: {str(e)}"
+        )
+    return _start_bulk_scan(targets, include_port_scan)
+
 
 @router.get("/disclaimer")
 async def get_disclaimer():
@@ -667,58 +1040,29 @@ async def get_disclaimer():
     }
 
 
-def _fetch_cve_results(query: str, limit: int = 8) -> Dict[str, Any]:
-    endpoint = "https://services.nvd.nist.gov/rest/json/cves/2.0"
-    params = {"keywordSearch": query, "resultsPerPage": limit}
+def _search_local_cves(query: str, severities: Optional[List[str]], min_score: Optional[float], limit: int, offset: int) -> Dict[str, Any]:
+    db = cve_store.get_session()
     try:
-        resp = requests.get(
-            endpoint,
-            params=params,
-            timeout=8,
-            headers={"User-Agent": "PortCyberScanner/1.0"},
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        vulns = data.get("vulnerabilities", [])
-        results = []
-        for item in vulns:
-            cve = item.get("cve", {})
-            metrics = cve.get("metrics", {})
-            cvss = None
-            for key in ["cvssMetricV31", "cvssMetricV30", "cvssMetricV2"]:
-                if metrics.get(key):
-                    cvss = metrics[key][0].get("cvssData", {})
-                    break
-            results.append(
-                {
-                    "id": cve.get("id"),
-                    "description": (cve.get("descriptions") or [{}])[0].get("value", ""),
-                    "published": cve.get("published"),
-                    "modified": cve.get("lastModified"),
-                    "severity": cvss.get("baseSeverity") if cvss else None,
-                    "score": cvss.get("baseScore") if cvss else None,
-                }
-            )
-        return {"source": "nvd", "results": results}
-    except Exception as exc:
-        return {
-            "source": "fallback",
-            "error": str(exc),
-            "results": [
-                {
-                    "id": "CVE-2023-0000",
-                    "description": "Sample CVE when upstream NVD is unreachable",
-                    "published": None,
-                    "modified": None,
-                    "severity": "Medium",
-                    "score": 5.0,
-                }
-            ],
-        }
+        # NVD lookups are answered from the local mirror; time them like any other dependency
+        with track_dependency("nvd_mirror", "search"):
+            results, total = cve_store.search(db, query, severities, min_score, limit, offset)
+        error = None
+        if not total and cve_store.is_empty(db):
+            error = "Local CVE database is empty; load NVD feeds with ingest_nvd.py"
+        return {"results": results, "total": total, "error": error}
+    finally:
+        db.close()
 
 
 @router.get("/cve/search")
-async def search_cves(q: str):
+async def search_cves(
+    q: str,
+    severity: Optional[str] = Query(None, description="Comma-separated: critical,high,medium,low"),
+    min_score: Optional[float] = Query(None, ge=0, le=10),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Search the local NVD mirror (ranked full-text match, no upstream calls)"""
     query = q.strip()
     if len(query) < 3:
         raise HTTPException(
@@ -726,13 +1070,34 @@ async def search_cves(q: str):
             detail="Query must be at least 3 characters",
         )
 
-    data = _fetch_cve_results(query)
+    severities = None
+    if severity:
+        severities = [s.strip().upper() for s in severity.split(",") if s.strip()]
+        unknown = [s for s in severities if s not in cve_store.SEVERITIES]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown severity: {', '.join(unknown)}",
+            )
+
+    try:
+        data = await asyncio.to_thread(_search_local_cves, query, severities, min_score, limit, offset)
+    except SQLAlchemyError as e:
+        logger.error(f"CVE store query failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="CVE database is not available",
+        )
+
     return {
         "query": query,
-        "count": len(data.get("results", [])),
-        "source": data.get("source"),
-        "results": data.get("results", []),
-        "error": data.get("error"),
+        "count": len(data["results"]),
+        "total": data["total"],
+        "limit": limit,
+        "offset": offset,
+        "source": "local",
+        "results": data["results"],
+        "error": data["error"],
         "timestamp": datetime.now().isoformat(),
     }
 
@@ -743,22 +1108,20 @@ async def search_cves(q: str):
 # ============================================================================
 
 # Rate limiting for public endpoints (per IP)
-public_scan_history: Dict[str, List[datetime]] = {}
 PUBLIC_RATE_LIMIT = 10  # scans per window
 PUBLIC_RATE_WINDOW = timedelta(minutes=5)
+public_scan_limiter = RateLimiter("public-scan", PUBLIC_RATE_LIMIT, PUBLIC_RATE_WINDOW.total_seconds())
 
 
-def _check_public_rate_limit(client_ip: str):
+async def _check_public_rate_limit(client_ip: str):
     """Check rate limit for public endpoints"""
-    now = datetime.now()
-    history = public_scan_history.get(client_ip, [])
-    history = [t for t in history if now - t < PUBLIC_RATE_WINDOW]
-    if len(history) >= PUBLIC_RATE_LIMIT:
+    allowed, retry_after = await public_scan_limiter.hit(client_ip)
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded. Please wait a few minutes before scanning again."
+            detail="Rate limit exceeded. Please wait a few minutes before scanning again.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
         )
-    public_scan_history[client_ip] = history + [now]
 
 
 class PublicScanRequest(BaseModel):
@@ -774,7 +1137,7 @@ async def public_scan(request: Request, scan_request: PublicScanRequest):
     Rate limited to 10 scans per 5 minutes per IP.
     """
     client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
+    await _check_public_rate_limit(client_ip)
     
     parsed_url = urlparse(str(scan_request.target_url))
     if parsed_url.scheme not in {"http", "https"}:
@@ -790,27 +1153,20 @@ async def public_scan(request: Request, scan_request: PublicScanRequest):
             detail="Invalid target host"
         )
 
-    try:
-        resolved_ip = _resolve_ip(hostname)
-        if _is_private_or_local(resolved_ip):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot scan private or local addresses"
-            )
-    except HTTPException:
-        raise
-    except Exception:
+    addresses = await _resolve_ips(hostname)
+    if _any_private_or_local(addresses):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not resolve target host"
+            detail="Cannot scan private or local addresses"
         )
+    pin_host(hostname, addresses[0])
 
     target = str(scan_request.target_url)
     vulnerabilities = []
 
     try:
         # Safe header check
-        header_results = check_headers(target)
+        header_results = await check_headers(target)
         if isinstance(header_results, dict):
             if 'headers' in header_results:
                 vulnerabilities.extend(header_results['headers'])
@@ -819,7 +1175,7 @@ async def public_scan(request: Request, scan_request: PublicScanRequest):
 
         # TLS check for HTTPS targets
         if parsed_url.scheme == "https":
-            tls_info = _get_tls_details(hostname)
+            tls_info = await asyncio.to_thread(_get_tls_details, hostname)
             if isinstance(tls_info, dict) and not tls_info.get("error"):
                 proto = tls_info.get("protocol")
                 if proto in {"TLSv1", "TLSv1.1"}:
@@ -856,17 +1212,9 @@ class PublicAdvancedScanRequest(BaseModel):
     include_port_scan: bool = False  # Disabled for public
 
 
-@router.post("/public/advanced-scan")
-async def public_advanced_scan(request: Request, scan_request: PublicAdvancedScanRequest):
-    """
-    Public advanced web scan endpoint.
-    Performs TLS, header, cookie, and method analysis.
-    Rate limited to 10 scans per 5 minutes per IP.
-    """
-    client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
-    
-    parsed_url = urlparse(str(scan_request.target_url))
+async def _validate_public_web_target(target_url: str) -> Tuple[str, List[str]]:
+    """Check scheme and host of a public scan target and refuse private/local addresses."""
+    parsed_url = urlparse(target_url)
     if parsed_url.scheme not in {"http", "https"}:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -880,110 +1228,44 @@ async def public_advanced_scan(request: Request, scan_request: PublicAdvancedSca
             detail="Invalid target host"
         )
 
-    try:
-        resolved_ip = _resolve_ip(hostname)
-        if _is_private_or_local(resolved_ip):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot scan private or local addresses"
-            )
-    except HTTPException:
-        raise
-    except Exception:
+    addresses = await _resolve_ips(hostname)
+    if _any_private_or_local(addresses):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not resolve target host"
+            detail="Cannot scan private or local addresses"
         )
+    return hostname, addresses
 
-    target = str(scan_request.target_url)
-    findings: List[Dict[str, Any]] = []
-    metadata: Dict[str, Any] = {"target": target, "host": hostname}
-
-    try:
-        primary = _safe_request("GET", target)
-        if "error" in primary:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail=f"Target unreachable: {primary['error']}"
-            )
-
-        resp = primary["response"]
-        metadata.update({
-            "status_code": resp.status_code,
-            "final_url": str(resp.url),
-            "redirects": len(resp.history),
-            "server": resp.headers.get("Server"),
-            "powered_by": resp.headers.get("X-Powered-By"),
-            "content_type": resp.headers.get("Content-Type"),
-        })
-
-        # Transport findings
-        if parsed_url.scheme != "https":
-            findings.append({
-                "type": "Insecure Transport",
-                "severity": "Medium",
-                "description": "Target served over HTTP; enable HTTPS with HSTS"
-            })
-
-        # Header checks
-        header_results = check_headers(target)
-        if isinstance(header_results, dict):
-            for bucket in ("headers", "cors", "directory_listing"):
-                if header_results.get(bucket):
-                    findings.extend(header_results[bucket])
-
-        # Cookie flags
-        for cookie in resp.cookies:
-            if not cookie.secure:
-                findings.append({
-                    "type": "Cookie Missing Secure Flag",
-                    "severity": "Medium",
-                    "description": f"Cookie '{cookie.name}' is not marked Secure"
-                })
-
-        # Server banner
-        if metadata.get("server"):
-            findings.append({
-                "type": "Server Banner Exposed",
-                "severity": "Info",
-                "description": f"Server header reveals '{metadata['server']}'"
-            })
-
-        # OPTIONS probe
-        options_probe = _safe_request("OPTIONS", target, allow_redirects=False)
-        if "response" in options_probe:
-            allow_header = options_probe["response"].headers.get("Allow")
-            metadata["allow_methods"] = allow_header
-            if allow_header and any(m in allow_header for m in ["PUT", "DELETE", "TRACE"]):
-                findings.append({
-                    "type": "Excessive Methods",
-                    "severity": "Medium",
-                    "description": f"OPTIONS advertises risky methods: {allow_header}"
-                })
 
-        # TLS details
-        if parsed_url.scheme == "https":
-            tls_info = _get_tls_details(hostname)
-            metadata["tls"] = tls_info
-            if isinstance(tls_info, dict):
-                proto = tls_info.get("protocol")
-                if proto in {"TLSv1", "TLSv1.1"}:
-                    findings.append({
-                        "type": "Deprecated TLS",
-                        "severity": "High",
-                        "description": f"TLS protocol {proto} in use; upgrade to TLS 1.2+"
-                    })
+@router.post("/public/advanced-scan")
+async def public_advanced_scan(request: Request, scan_request: PublicAdvancedScanRequest):
+    """
+    Public advanced web scan endpoint.
+    Performs TLS, header, cookie, and method analysis.
+    Rate limited to 10 scans per 5 minutes per IP.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    await _check_public_rate_limit(client_ip)
+    
+    hostname, addresses = await _validate_public_web_target(str(scan_request.target_url))
+    pin_host(hostname, addresses[0])
 
+    target = str(scan_request.target_url)
+    try:
+        outcome = await _run_advanced_checks(target, hostname)
         return {
             "target": target,
             "status": "completed",
-            "metadata": metadata,
-            "findings": findings,
+            "metadata": outcome["metadata"],
+            "findings": outcome["findings"],
             "timestamp": datetime.now().isoformat()
         }
 
-    except HTTPException:
-        raise
+    except TargetUnreachable as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Target unreachable: {e}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -991,6 +1273,21 @@ async def public_advanced_scan(request: Request, scan_request: PublicAdvancedSca
         )
 
 
+@router.post("/public/advanced-scan/stream")
+async def public_advanced_scan_stream(request: Request, scan_request: PublicAdvancedScanRequest):
+    """
+    Streaming variant of /public/advanced-scan (Server-Sent Events).
+    Shares its rate limit; port scanning stays disabled.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    await _check_public_rate_limit(client_ip)
+
+    hostname, addresses = await _validate_public_web_target(str(scan_request.target_url))
+    return _sse_response(
+        _stream_advanced_checks(str(scan_request.target_url), hostname, addresses[0])
+    )
+
+
 class PublicApiAuditRequest(BaseModel):
     base_url: HttpUrl
     endpoints: List[ApiEndpointTest] = Field(default_factory=list)
@@ -1004,7 +1301,7 @@ async def public_api_audit(request: Request, audit_request: PublicApiAuditReques
     Rate limited to 10 scans per 5 minutes per IP.
     """
     client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
+    await _check_public_rate_limit(client_ip)
     
     parsed_url = urlparse(str(audit_request.base_url))
     if parsed_url.scheme not in {"http", "https"}:
@@ -1020,20 +1317,13 @@ async def public_api_audit(request: Request, audit_request: PublicApiAuditReques
             detail="Invalid target host"
         )
 
-    try:
-        resolved_ip = _resolve_ip(hostname)
-        if _is_private_or_local(resolved_ip):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot scan private or local addresses"
-            )
-    except HTTPException:
-        raise
-    except Exception:
+    addresses = await _resolve_ips(hostname)
+    if _any_private_or_local(addresses):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not resolve target host"
+            detail="Cannot scan private or local addresses"
         )
+    pin_host(hostname, addresses[0])
 
     target = str(audit_request.base_url).rstrip("/")
     probes: List[Dict[str, Any]] = []
@@ -1051,7 +1341,7 @@ async def public_api_audit(request: Request, audit_request: PublicApiAuditReques
 
     for ep in endpoints:
         full_url = urljoin(target + "/", ep.path.lstrip("/"))
-        result = _safe_request(ep.method, full_url)
+        result = await _safe_request(ep.method, full_url)
         
         probe_result: Dict[str, Any] = {
             "endpoint": ep.path,
@@ -1077,7 +1367,7 @@ async def public_api_audit(request: Request, audit_request: PublicApiAuditReques
                     })
 
         # OPTIONS probe
-        opt = _safe_request("OPTIONS", full_url, allow_redirects=False)
+        opt = await _safe_request("OPTIONS", full_url, allow_redirects=False)
         if opt.get("response"):
             allow_header = opt["response"].headers.get("Allow")
             probe_result["allow_methods"] = allow_header
@@ -1108,22 +1398,6 @@ class PublicNetworkScanRequest(BaseModel):
     target: str = Field(..., min_length=1, max_length=255)
 
 
-def _check_port(host: str, port: int, timeout: float = 2.0) -> Dict[str, Any]:
-    """Attempt TCP connection to check if port is open."""
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        if result == 0:
-            return {"port": port, "state": "open", "protocol": "tcp"}
-        return {"port": port, "state": "closed", "protocol": "tcp"}
-    except socket.timeout:
-        return {"port": port, "state": "filtered", "protocol": "tcp"}
-    except Exception:
-        return {"port": port, "state": "filtered", "protocol": "tcp"}
-
-
 # Common ports to scan (limited set for public use)
 COMMON_PORTS = {
     21: "ftp",
@@ -1146,17 +1420,9 @@ COMMON_PORTS = {
 }
 
 
-@router.post("/public/network-scan")
-async def public_network_scan(request: Request, scan_request: PublicNetworkScanRequest):
-    """
-    Public network scan endpoint (no authentication required).
-    Performs safe TCP port checks on common ports.
-    Rate limited to 10 scans per 5 minutes per IP.
-    """
-    client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
-    
-    target = scan_request.target.strip()
+def _normalize_network_target(raw_target: str) -> str:
+    """Strip scheme, path and port from a network scan target."""
+    target = raw_target.strip()
     
     # Remove any protocol prefix
     if target.startswith("http://"):
@@ -1172,66 +1438,136 @@ async def public_network_scan(request: Request, scan_request: PublicNetworkScanR
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid target"
         )
-    
-    # Resolve and validate
-    try:
-        resolved_ip = _resolve_ip(target)
-        if _is_private_or_local(resolved_ip):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot scan private or local addresses"
-            )
-    except HTTPException:
-        raise
-    except Exception:
+    return target
+
+
+async def _validate_network_target(raw_target: str) -> Tuple[str, List[str]]:
+    target = _normalize_network_target(raw_target)
+    addresses = await _resolve_ips(target)
+    if _any_private_or_local(addresses):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not resolve target host"
+            detail="Cannot scan private or local addresses"
         )
+    return target, addresses
+
+
+def _classify_port(result: Dict[str, Any]) -> Optional[str]:
+    """Annotate a port result with its service; return the severity if it is open and risky."""
+    service = COMMON_PORTS[result["port"]]
+    result["service"] = service
+    if result["state"] != "open":
+        return None
+    # Classify severity based on service
+    if service in ("telnet", "ftp"):
+        result["severity"] = "critical"
+        result["note"] = f"Insecure protocol {service} exposed"
+    elif service in ("smb", "rdp", "mysql", "postgresql"):
+        result["severity"] = "high"
+        result["note"] = f"Sensitive service {service} exposed to internet"
+    elif service in ("smtp", "pop3", "imap"):
+        result["severity"] = "medium"
+    return result.get("severity")
+
+
+@router.post("/public/network-scan")
+async def public_network_scan(request: Request, scan_request: PublicNetworkScanRequest):
+    """
+    Public network scan endpoint (no authentication required).
+    Performs safe TCP port checks on common ports.
+    Rate limited to 10 scans per 5 minutes per IP.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    await _check_public_rate_limit(client_ip)
+    
+    # Resolve and validate
+    target, addresses = await _validate_network_target(scan_request.target)
     
     # Scan common ports
     ports = []
-    critical_count = 0
-    high_count = 0
-    medium_count = 0
+    counts = {"critical": 0, "high": 0, "medium": 0}
     
-    for port, service in COMMON_PORTS.items():
-        result = _check_port(resolved_ip, port, timeout=1.5)
-        result["service"] = service
-        
+    port_results = await scan_ports(addresses[0], COMMON_PORTS.keys(), timeout=1.5)
+    for result in port_results:
+        severity = _classify_port(result)
         if result["state"] == "open":
             ports.append(result)
-            # Classify severity based on service
-            if service in ("telnet", "ftp"):
-                critical_count += 1
-                result["severity"] = "critical"
-                result["note"] = f"Insecure protocol {service} exposed"
-            elif service in ("smb", "rdp", "mysql", "postgresql"):
-                high_count += 1
-                result["severity"] = "high"
-                result["note"] = f"Sensitive service {service} exposed to internet"
-            elif service in ("smtp", "pop3", "imap"):
-                medium_count += 1
-                result["severity"] = "medium"
+            if severity:
+                counts[severity] += 1
     
     # Try to get TLS info if 443 is open
     tls_info = None
     if any(p["port"] == 443 and p["state"] == "open" for p in ports):
-        tls_info = _get_tls_details(target)
+        pin_host(target, addresses[0])
+        tls_info = await asyncio.to_thread(_get_tls_details, target)
     
     return {
         "host": target,
-        "resolved_ip": resolved_ip,
+        "resolved_ip": addresses[0],
+        "resolved_ips": addresses,
         "ports": ports,
         "timestamp": datetime.now().isoformat(),
         "tls": tls_info,
-        "critical_count": critical_count,
-        "high_count": high_count,
-        "medium_count": medium_count,
+        "critical_count": counts["critical"],
+        "high_count": counts["high"],
+        "medium_count": counts["medium"],
         "total_open": len(ports)
     }
 
 
+async def _stream_network_scan(target: str, addresses: List[str]):
+    """Network scan as SSE: a ``port`` event per open port as it answers, then TLS and a summary."""
+    counts = {"critical": 0, "high": 0, "medium": 0}
+    total_open = 0
+    https_open = False
+    start = time.perf_counter()
+
+    yield _sse("start", {"host": target, "resolved_ip": addresses[0], "resolved_ips": addresses,
+                         "ports": len(COMMON_PORTS)})
+    async for result in iter_scan_ports(addresses[0], COMMON_PORTS.keys(), timeout=1.5):
+        severity = _classify_port(result)
+        if result["state"] != "open":
+            continue
+        total_open += 1
+        https_open = https_open or result["port"] == 443
+        if severity:
+            counts[severity] += 1
+        yield _sse("port", result)
+    yield _sse("stage", {"name": "port_scan", "duration": round(time.perf_counter() - start, 3)})
+
+    tls_info = None
+    if https_open:
+        tls_start = time.perf_counter()
+        pin_host(target, addresses[0])
+        tls_info = await asyncio.to_thread(_get_tls_details, target)
+        yield _sse("stage", {"name": "tls", "duration": round(time.perf_counter() - tls_start, 3), "tls": tls_info})
+
+    yield _sse("summary", {
+        "host": target,
+        "resolved_ip": addresses[0],
+        "tls": tls_info,
+        "critical_count": counts["critical"],
+        "high_count": counts["high"],
+        "medium_count": counts["medium"],
+        "total_open": total_open,
+        "duration": round(time.perf_counter() - start, 3),
+        "timestamp": datetime.now().isoformat(),
+    })
+
+
+@router.post("/public/network-scan/stream")
+async def public_network_scan_stream(request: Request, scan_request: PublicNetworkScanRequest):
+    """
+    Streaming variant of /public/network-scan (Server-Sent Events).
+    Shares its rate limit.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    await _check_public_rate_limit(client_ip)
+
+    target, addresses = await _validate_network_target(scan_request.target)
+    return _sse_response(_stream_network_scan(target, addresses))
+
+
 # ============================================================================
 # PUBLIC PHISHING DETECTION - Pattern-based analysis
 # ============================================================================
@@ -1248,7 +1584,7 @@ async def public_phishing_detect(request: Request, phish_request: PublicPhishing
     Rate limited to 10 requests per 5 minutes per IP.
     """
     client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
+    await _check_public_rate_limit(client_ip)
     
     email_content = phish_request.email.lower()
     
@@ -1354,7 +1690,7 @@ async def public_code_review(request: Request, code_request: PublicCodeReviewReq
     Note: Does not actually clone repos - provides educational analysis.
     """
     client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
+    await _check_public_rate_limit(client_ip)
     
     repo_url = code_request.repo_url
     language = code_request.language
@@ -1447,7 +1783,7 @@ async def public_tls_check(request: Request, tls_request: PublicTlsCheckRequest)
     Rate limited to 10 requests per 5 minutes per IP.
     """
     client_ip = request.client.host if request.client else "unknown"
-    _check_public_rate_limit(client_ip)
+    await _check_public_rate_limit(client_ip)
     
     domain = tls_request.domain.strip()
     
@@ -1465,23 +1801,16 @@ async def public_tls_check(request: Request, tls_request: PublicTlsCheckRequest)
         )
     
     # Resolve and validate
-    try:
-        resolved_ip = _resolve_ip(domain)
-        if _is_private_or_local(resolved_ip):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot check private or local addresses"
-            )
-    except HTTPException:
-        raise
-    except Exception:
+    addresses = await _resolve_ips(domain, detail="Could not resolve domain")
+    if _any_private_or_local(addresses):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Could not resolve domain"
+            detail="Cannot check private or local addresses"
         )
+    pin_host(domain, addresses[0])
     
-    # Get TLS details
-    tls_info = _get_tls_details(domain)
+    # Get TLS details (cached per domain, concurrent checks share one handshake)
+    tls_info, cache_info = await get_tls_details_cached(domain, 443, _inspect_tls)
     
     if "error" in tls_info:
         raise HTTPException(
@@ -1508,6 +1837,23 @@ async def public_tls_check(request: Request, tls_request: PublicTlsCheckRequest)
     elif protocol == "TLSv1.3":
         grade = "A"
     
+    # Protocols and ciphers the server also accepts, not just the negotiated ones
+    enumeration = tls_info.get("enumeration", {})
+    legacy_protocols = enumeration.get("legacy_protocols", [])
+    if legacy_protocols:
+        weaknesses.append(f"Legacy protocols still accepted: {', '.join(legacy_protocols)}")
+        recommendations.append("Disable TLS 1.0 and TLS 1.1")
+        grade = "C" if grade < "C" else grade
+    weak_ciphers = enumeration.get("weak_ciphers", [])
+    if weak_ciphers:
+        weaknesses.append(f"Weak cipher suites accepted: {', '.join(weak_ciphers)}")
+        recommendations.append("Remove NULL, anonymous, export, DES, 3DES and RC4 cipher suites")
+        grade = "C" if grade < "C" else grade
+    for family in enumeration.get("medium_ciphers", []):
+        warnings.append(f"{family} cipher suites accepted")
+    if enumeration.get("medium_ciphers"):
+        recommendations.append("Prefer ECDHE key exchange with AES-GCM or ChaCha20-Poly1305")
+    
     # Check certificate expiry
     not_after = tls_info.get("notAfter")
     days_remaining = None
@@ -1551,7 +1897,7 @@ async def public_tls_check(request: Request, tls_request: PublicTlsCheckRequest)
         grade = "C"
     
     # Add + for excellent configs
-    if grade == "A" and protocol == "TLSv1.3" and days_remaining and days_remaining > 60:
+    if grade == "A" and protocol == "TLSv1.3" and days_remaining and days_remaining > 60 and not warnings:
         grade = "A+"
     
     return {
@@ -1563,9 +1909,15 @@ async def public_tls_check(request: Request, tls_request: PublicTlsCheckRequest)
         "validTo": not_after or "Unknown",
         "daysRemaining": days_remaining,
         "protocol": protocol,
+        "supportedProtocols": enumeration.get("supported_protocols", []),
+        "cipherFamilies": {
+            family: {"supported": r.get("supported"), "strength": r.get("strength"), "cipher": r.get("cipher")}
+            for family, r in enumeration.get("cipher_families", {}).items()
+        },
         "grade": grade,
         "weaknesses": weaknesses,
         "warnings": warnings,
         "recommendations": recommendations,
+        "cache": cache_info,
         "timestamp": datetime.now().isoformat()
     }
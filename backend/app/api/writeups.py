@@ -1,95 +1,156 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import os
-import shutil
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, selectinload
+from typing import Optional
+import asyncio
 import re
 import json
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.security import get_current_admin_user
 from app.models.user import User
-from app.models.writeup import Writeup, Tag
+from app.models.writeup import SUMMARY_COLUMNS, Writeup
 from app.schemas.writeup import (
-    WriteupCreate,
     Writeup as WriteupSchema,
     WriteupList,
+    WriteupSearchList,
+    WriteupSearchResult,
     WriteupUpdate
 )
-from app.core.config import settings
-from app.utils.pdf_processor import extract_metadata_from_pdf, suggest_tags, extract_text_and_summary
-from app.utils.cloudinary_handler import upload_pdf_to_cloudinary, delete_pdf_from_cloudinary, generate_signed_url
-from app.utils.virus_scan import scan_bytes_for_viruses
-from app.utils.zip_processor import extract_and_process_zip, validate_readme_structure
+from app.utils.cloudinary_handler import delete_pdf_from_cloudinary, generate_signed_url
+from app.utils.scan_jobs import JobQueueFull, UserJobLimitExceeded
+from app.utils import upload_pipeline
 from app.utils.ai_generator import ai_generator
+from app.utils import writeup_search
+from app.utils.pagination import decode_cursor, encode_cursor, estimate_count
+from app.utils import response_cache
+from app.utils import tag_model
+from app.utils.tag_repository import get_or_create_tags
 import json
 
 router = APIRouter()
 
-def extract_summary_from_markdown(content: str, max_length: int = 200) -> str:
-    """Extract first non-heading paragraph from markdown as summary"""
-    lines = content.split('\n')
-    for line in lines:
-        # Skip empty lines and headings
-        line = line.strip()
-        if line and not line.startswith('#'):
-            # Remove markdown formatting
-            text = re.sub(r'[*_`\[\]()]', '', line)
-            return text[:max_length]
-    return ""
+async def _queue_upload(db: Session, writeup: Writeup, current_user: User, path: str, **kwargs) -> Writeup:
+    """Hand a stored upload to the upload pipeline and record the job on the writeup"""
+    try:
+        job = await upload_pipeline.submit_upload(current_user.username, writeup.id, path, **kwargs)
+    except (JobQueueFull, UserJobLimitExceeded) as e:
+        await asyncio.to_thread(upload_pipeline.discard_upload, path)
+        if kwargs["mode"] == "create":
+            db.delete(writeup)
+            db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE if isinstance(e, JobQueueFull) else status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+    writeup.upload_job_id = job["job_id"]
+    db.commit()
+    db.refresh(writeup)
+    return writeup
 
 @router.get("/", response_model=WriteupList)
 async def get_writeups(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     platform: Optional[str] = None,
     category: Optional[str] = None,
     difficulty: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    estimate_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all writeups with optional filtering"""
-    query = db.query(Writeup)
+    """
+    Get all writeups with optional filtering, newest first.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the following page;
+    every page then costs the same however deep it is. ``skip`` still works
+    (and is ignored when a cursor is given). Cursor pages skip the total unless
+    ``estimate_total`` is set, which also swaps the exact count for the query
+    planner's estimate on skip-based requests.
+
+    Answers ``If-None-Match`` with 304 from the response cache until a
+    writeup changes.
+    """
+    cached = await response_cache.lookup(request, ("writeups",))
+    if cached.response:
+        return cached.response
     
+    conditions = [Writeup.processing_status == "ready"]
     if platform:
-        query = query.filter(Writeup.platform == platform)
+        conditions.append(Writeup.platform == platform)
     if category:
-        query = query.filter(Writeup.category == category)
+        conditions.append(Writeup.category == category)
     if difficulty:
-        query = query.filter(Writeup.difficulty == difficulty)
+        conditions.append(Writeup.difficulty == difficulty)
     if search:
-        query = query.filter(Writeup.title.ilike(f"%{search}%"))
+        conditions.append(Writeup.title.ilike(f"%{search}%"))
     
-    # Order by creation date descending (newest first)
-    query = query.order_by(Writeup.created_at.desc())
+    if estimate_total:
+        total = await estimate_count(db, select(Writeup.id).where(*conditions))
+    elif cursor is None:
+        total = await db.scalar(select(func.count(Writeup.id)).where(*conditions))
+    else:
+        total = None
     
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
+    # Newest first; id breaks ties so the order (and the cursor) is total.
+    # Served by ix_writeups_created_at_id.
+    query = (
+        select(Writeup)
+        .options(load_only(*SUMMARY_COLUMNS, raiseload=True), selectinload(Writeup.tags))
+        .where(*conditions)
+        .order_by(Writeup.created_at.desc(), Writeup.id.desc())
+    )
+    if cursor is not None:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(tuple_(Writeup.created_at, Writeup.id) < tuple_(created_at, last_id))
+    else:
+        query = query.offset(skip)
     
-    return {
+    # One extra row tells us whether there is a next page
+    items = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    
+    return cached.store({
         "items": items,
         "total": total,
-        "page": skip // limit + 1,
-        "page_size": limit
-    }
+        "page": skip // limit + 1 if cursor is None else None,
+        "page_size": limit,
+        "next_cursor": next_cursor
+    }, WriteupList)
 
 @router.get("/{writeup_id}", response_model=WriteupSchema)
 @router.get("/{writeup_id}")
-async def get_writeup(writeup_id: int, db: Session = Depends(get_db)):
+async def get_writeup(writeup_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get a specific writeup by ID"""
-    writeup = db.query(Writeup).filter(Writeup.id == writeup_id).first()
+    cached = await response_cache.lookup(request, (f"writeup:{writeup_id}",))
+    if cached.response:
+        return cached.response
+    
+    writeup = await db.get(Writeup, writeup_id, options=[selectinload(Writeup.tags)])
     if not writeup:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Writeup not found"
         )
-    return writeup
+    return cached.store(writeup, WriteupSchema)
 
 @router.get("/{writeup_id}/content")
-async def get_writeup_content(writeup_id: int, db: Session = Depends(get_db)):
+async def get_writeup_content(writeup_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get markdown content of a writeup (if available)"""
-    writeup = db.query(Writeup).filter(Writeup.id == writeup_id).first()
+    writeup = await db.get(Writeup, writeup_id)
     if not writeup:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,12 +171,12 @@ async def get_writeup_content(writeup_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/{writeup_id}/download-url")
-async def get_writeup_download_url(writeup_id: int, db: Session = Depends(get_db)):
+async def get_writeup_download_url(writeup_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a time-limited signed URL for downloading the writeup PDF.
     URL expires after 1 hour. Public endpoint—no authentication required.
     """
-    writeup = db.query(Writeup).filter(Writeup.id == writeup_id).first()
+    writeup = await db.get(Writeup, writeup_id)
     if not writeup:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -170,20 +231,15 @@ async def create_writeup(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Upload a new writeup (Admin only) - supports both PDF and ZIP files"""
+    """
+    Upload a new writeup (Admin only) - supports both PDF and ZIP files.
+
+    Returns at once with the writeup in ``processing_status='processing'``;
+    poll ``/uploads/{upload_job_id}`` for progress. It is listed publicly
+    once processing succeeds and removed if it fails.
+    """
     
     try:
-        # Read file content
-        file_content = await file.read()
-
-        # Virus scan
-        clean, reason = scan_bytes_for_viruses(file_content)
-        if not clean:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Upload blocked by virus scan: {reason}"
-            )
-
         # Determine file type
         is_zip = file.filename.endswith('.zip')
         is_pdf = file.filename.endswith('.pdf')
@@ -194,102 +250,13 @@ async def create_writeup(
                 detail="Only PDF and ZIP files are allowed"
             )
 
-        # Process based on file type
-        if is_zip:
-            # Process ZIP file (README + images)
-            try:
-                readme_content, images, metadata = await extract_and_process_zip(file_content)
-            except ValueError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=str(e)
-                )
-            
-            # Validate README
-            valid, error = validate_readme_structure(readme_content)
-            if not valid:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid README: {error}"
-                )
-            
-            # Create directory for this writeup
-            safe_title = "".join(c if c.isalnum() or c in (' ', '_') else '_' for c in title)
-            writeup_dir = os.path.join(settings.UPLOAD_DIR, safe_title.replace(" ", "_"))
-            os.makedirs(writeup_dir, exist_ok=True)
-            
-            # Save images locally, preserving directory structure
-            for img_name, img_content in images.items():
-                # Full path where image will be saved
-                img_path = os.path.join(writeup_dir, img_name)
-                # Create parent directories if needed
-                os.makedirs(os.path.dirname(img_path), exist_ok=True)
-                with open(img_path, 'wb') as f:
-                    f.write(img_content)
-            
-            # Update image references in markdown to point to backend URLs
-            # Convert backslashes to forward slashes and replace relative paths
-            final_content = readme_content
-            safe_title_underscore = safe_title.replace(' ', '_')
-            for img_name in images.keys():
-                # Convert backslashes to forward slashes
-                url_path = img_name.replace('\\', '/')
-                # Replace in markdown with backend URL (unencoded - browser will handle encoding)
-                final_content = final_content.replace(
-                    img_name,
-                    f"/uploads/writeups/{safe_title_underscore}/{url_path}"
-                )
-                # Also handle forward slash versions
-                final_content = final_content.replace(
-                    url_path,
-                    f"/uploads/writeups/{safe_title_underscore}/{url_path}"
-                )
-            
-            # Use auto-generated summary from first paragraph of README
-            auto_summary = extract_summary_from_markdown(readme_content)
-            final_summary = summary or auto_summary
-            
-            content_type = "markdown"
-            writeup_url = None
-            thumbnail_url = None
-
-        else:
-            # Process PDF file (existing logic)
-            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-            temp_filename = f"temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-            temp_file_path = os.path.join(settings.UPLOAD_DIR, temp_filename)
-
-            with open(temp_file_path, "wb") as buffer:
-                buffer.write(file_content)
-
-            pdf_metadata = extract_metadata_from_pdf(temp_file_path)
-            full_text, extracted_summary = extract_text_and_summary(temp_file_path)
-            suggested_tags_list = suggest_tags(temp_file_path)
-
-            # Clean up temp file
-            os.remove(temp_file_path)
-
-            # Upload to Cloudinary
-            cloudinary_url, thumbnail_url = await upload_pdf_to_cloudinary(file_content, file.filename)
-
-            final_summary = summary or pdf_metadata.get('summary') or extracted_summary or ''
-            content_type = "pdf"
-            writeup_url = cloudinary_url
-            suggested_tags_list = suggested_tags_list or []
-            tags = tags + "," + ",".join(suggested_tags_list)
-
-        # Parse and create tags
-        tag_names = [t.strip() for t in tags.split(',') if t.strip()]
-        tag_names = list(set(tag_names))
+        # Store the raw file; virus scan, parsing and Cloudinary run in the
+        # upload pipeline and fill in the writeup when they finish
+        file_content = await file.read()
+        upload_path = await asyncio.to_thread(upload_pipeline.store_upload, file_content, file.filename)
 
         # Create or get tags
-        tag_objects = []
-        for tag_name in tag_names:
-            tag = db.query(Tag).filter(Tag.name == tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.add(tag)
-            tag_objects.append(tag)
+        tag_objects = get_or_create_tags(db, tags.split(','))
 
         # Create writeup
         writeup = Writeup(
@@ -299,11 +266,9 @@ async def create_writeup(
             category=category,
             date=date,
             time_spent=time_spent,
-            summary=final_summary,
-            writeup_url=writeup_url,
-            writeup_content=readme_content if is_zip else None,
-            content_type=content_type,
-            thumbnail_url=thumbnail_url,
+            summary=summary or '',
+            content_type="markdown" if is_zip else "pdf",
+            processing_status="processing",
             tags=tag_objects,
             methodology=json.dumps([
                 s.strip() for s in re.split(r"[\n,]", methodology or "") if s.strip()
@@ -314,7 +279,11 @@ async def create_writeup(
         db.add(writeup)
         db.commit()
         db.refresh(writeup)
-        return writeup
+        return await _queue_upload(
+            db, writeup, current_user, upload_path,
+            filename=file.filename, mode="create", title=title,
+            summary_provided=bool(summary), suggest_tags=True,
+        )
 
     except HTTPException:
         raise
@@ -342,15 +311,7 @@ async def update_writeup(
     # Update fields
     update_data = writeup_data.dict(exclude_unset=True)
     if 'tags' in update_data:
-        tag_names = update_data.pop('tags')
-        tag_objects = []
-        for tag_name in tag_names:
-            tag = db.query(Tag).filter(Tag.name == tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.add(tag)
-            tag_objects.append(tag)
-        writeup.tags = tag_objects
+        writeup.tags = get_or_create_tags(db, update_data.pop('tags'))
     
     # Handle tools_used conversion from comma-separated string or list to JSON
     if 'tools_used' in update_data:
@@ -384,6 +345,7 @@ async def update_writeup(
 
     db.commit()
     db.refresh(writeup)
+    await response_cache.invalidate("writeups", f"writeup:{writeup.id}")
     return writeup
 
 @router.put("/{writeup_id}/upload", response_model=WriteupSchema)
@@ -403,7 +365,12 @@ async def update_writeup_with_file(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Update a writeup with optional new file upload (Admin only)"""
+    """
+    Update a writeup with optional new file upload (Admin only).
+
+    Field changes apply immediately; a new file is processed in the
+    background and replaces the current one when done (see ``upload_job_id``).
+    """
     writeup = db.query(Writeup).filter(Writeup.id == writeup_id).first()
     if not writeup:
         raise HTTPException(
@@ -412,7 +379,9 @@ async def update_writeup_with_file(
         )
     
     try:
-        # If new file uploaded, validate, scan, and process
+        # If a new file is uploaded, validate and store it; the upload
+        # pipeline scans and processes it after the other fields are saved
+        upload_path = None
         if file and file.filename:
             # Validate file type
             is_pdf = file.filename.endswith('.pdf')
@@ -424,94 +393,13 @@ async def update_writeup_with_file(
                     detail="Only PDF and ZIP files are allowed"
                 )
             
-            # Read file content
             file_content = await file.read()
-
-            # Virus scan
-            clean, reason = scan_bytes_for_viruses(file_content)
-            if not clean:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Upload blocked by virus scan: {reason}"
-                )
-            
-            if is_zip:
-                # Handle ZIP file with markdown content
-                # Extract and process the ZIP
-                markdown_content, images, _ = await extract_and_process_zip(file_content)
-                
-                # Create a unique folder for this writeup's images
-                safe_title = "".join(c if c.isalnum() or c in (' ', '_') else '_' for c in (title or writeup.title))
-                writeup_folder = os.path.join(settings.UPLOAD_DIR, safe_title.replace(' ', '_'))
-                os.makedirs(writeup_folder, exist_ok=True)
-                
-                # Save images locally, preserving directory structure from ZIP
-                for img_path, img_content in images.items():
-                    # Full path where image will be saved
-                    full_img_path = os.path.join(writeup_folder, img_path)
-                    # Create parent directories if needed
-                    os.makedirs(os.path.dirname(full_img_path), exist_ok=True)
-                    # Write the image file
-                    with open(full_img_path, "wb") as img_file:
-                        img_file.write(img_content)
-                
-                # Update markdown content image references to point to uploaded location
-                # Replace all relative image paths with the correct upload URL
-                safe_title_underscore = safe_title.replace(' ', '_')
-                for img_path in images.keys():
-                    # Convert backslashes to forward slashes for URLs
-                    url_path = img_path.replace('\\', '/')
-                    # Store plain path without encoding - frontend will handle URL encoding
-                    markdown_content = markdown_content.replace(
-                        img_path,
-                        f"/uploads/writeups/{safe_title_underscore}/{url_path}"
-                    )
-                    # Also handle forward slash versions
-                    markdown_content = markdown_content.replace(
-                        url_path,
-                        f"/uploads/writeups/{safe_title_underscore}/{url_path}"
-                    )
-                
-                # Update writeup fields for markdown
-                writeup.writeup_content = markdown_content
-                writeup.content_type = "markdown"
-                writeup.writeup_url = None
-                
-                # Extract summary if not provided
-                if not summary:
-                    summary = extract_summary_from_markdown(markdown_content)
-                
-            else:  # is_pdf
-                # Delete old file from Cloudinary if it exists
-                if writeup.writeup_url and "cloudinary.com" in writeup.writeup_url:
-                    await delete_pdf_from_cloudinary(writeup.writeup_url)
-                
-                # Upload new file to Cloudinary
-                cloudinary_url, thumbnail_url = await upload_pdf_to_cloudinary(file_content, file.filename)
-                writeup.writeup_url = cloudinary_url
-                writeup.thumbnail_url = thumbnail_url
-                writeup.content_type = "pdf"
-                writeup.writeup_content = None
-                
-                # Extract metadata and suggest tags if not provided
-                if not tags:
-                    # Use a temporary file for metadata extraction
-                    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-                    temp_filename = f"temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-                    temp_file_path = os.path.join(settings.UPLOAD_DIR, temp_filename)
-                    
-                    with open(temp_file_path, "wb") as buffer:
-                        buffer.write(file_content)
-                    
-                    pdf_metadata = extract_metadata_from_pdf(temp_file_path)
-                    _, extracted_summary = extract_text_and_summary(temp_file_path)
-                    suggested_tags = suggest_tags(temp_file_path)
-                    tags = ",".join(suggested_tags)
-                    if not summary:
-                        summary = pdf_metadata.get('summary') or extracted_summary
-                    
-                    # Clean up temp file
-                    os.remove(temp_file_path)
+            upload_path = await asyncio.to_thread(upload_pipeline.store_upload, file_content, file.filename)
+            old_url = writeup.writeup_url
+            # A file uploaded without tags gets suggested ones once processed
+            suggest_tags = not tags
+            if suggest_tags:
+                tags = None
         
         # Update other fields
         if title is not None:
@@ -543,21 +431,20 @@ async def update_writeup_with_file(
         
         # Handle tags
         if tags is not None:
-            tag_names = [t.strip() for t in tags.split(',') if t.strip()]
-            tag_objects = []
-            for tag_name in tag_names:
-                tag = db.query(Tag).filter(Tag.name == tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.add(tag)
-                tag_objects.append(tag)
-            writeup.tags = tag_objects
+            writeup.tags = get_or_create_tags(db, tags.split(','))
         
         # Update timestamp to track edits, but don't affect ordering
         writeup.updated_at = datetime.now()
         
         db.commit()
         db.refresh(writeup)
+        await response_cache.invalidate("writeups", f"writeup:{writeup.id}")
+        if upload_path:
+            writeup = await _queue_upload(
+                db, writeup, current_user, upload_path,
+                filename=file.filename, mode="update", title=writeup.title,
+                summary_provided=bool(summary), suggest_tags=suggest_tags, old_url=old_url,
+            )
         return writeup
         
     except HTTPException:
@@ -585,30 +472,45 @@ async def delete_writeup(
     # Delete PDF from Cloudinary if it exists
     if writeup.writeup_url and "cloudinary.com" in writeup.writeup_url:
         try:
-            await delete_pdf_from_cloudinary(writeup.writeup_url)
+            await asyncio.to_thread(delete_pdf_from_cloudinary, writeup.writeup_url)
         except:
             pass  # Continue even if deletion fails
     
     db.delete(writeup)
     db.commit()
+    await response_cache.invalidate("writeups", f"writeup:{writeup_id}")
+    await asyncio.to_thread(tag_model.forget_writeup, writeup_id)
     return None
 
-@router.get("/search/", response_model=WriteupList)
+@router.get("/uploads/{job_id}")
+async def get_upload_status(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Progress of an upload: status, each stage's state and duration, and the error if it failed (Admin only)"""
+    job = await upload_pipeline.upload_jobs.get(job_id)
+    if not job or job["kind"] != upload_pipeline.KIND:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return upload_pipeline.upload_status(job)
+
+@router.get("/search/", response_model=WriteupSearchList)
 async def search_writeups(
     q: str,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Full-text search across writeups"""
-    query = db.query(Writeup).filter(
-        Writeup.title.ilike(f"%{q}%") |
-        Writeup.summary.ilike(f"%{q}%") |
-        Writeup.category.ilike(f"%{q}%")
-    )
-    
-    total = query.count()
-    items = query.offset(skip).limit(limit).all()
+    """Full-text search across writeups, best matches first"""
+    hits, total = await writeup_search.search_writeups(db, q, skip, limit)
+    items = []
+    for writeup, rank, snippet in hits:
+        item = WriteupSearchResult.model_validate(writeup)
+        item.rank = rank
+        item.snippet = snippet
+        items.append(item)
     
     return {
         "items": items,
@@ -684,6 +586,7 @@ async def generate_ai_content(
         
         db.commit()
         db.refresh(writeup)
+        await response_cache.invalidate("writeups", f"writeup:{writeup.id}")
         return writeup
         
     except Exception as e:
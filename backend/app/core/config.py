@@ -41,6 +41,11 @@ class Settings(BaseSettings):
     # File Upload
     UPLOAD_DIR: str = "uploads/writeups"
     MAX_FILE_SIZE: int = 10485760  # 10MB
+    UPLOAD_JOB_WORKERS: int = 2  # upload pipelines running at once per process
+    UPLOAD_PROCESS_WORKERS: int = 2  # processes for PDF analysis and ZIP extraction
+    UPLOAD_MAX_QUEUED_JOBS: int = 20
+    UPLOAD_MAX_ACTIVE_JOBS_PER_USER: int = 10
+    TAG_MODEL_PATH: str = "uploads/tag_model.npz"  # corpus statistics for tag suggestions
     
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str = ""
@@ -50,6 +55,25 @@ class Settings(BaseSettings):
     # Rate limiting
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = 60
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "redis" (REDIS_URL, shared by workers)
+    RATE_LIMIT_MAX_KEYS: int = 100000  # in-memory store: idle keys beyond this are evicted LRU-first
+    
+    # Conditional GET cache for public writeup/comment reads (ETag + 304)
+    RESPONSE_CACHE_BACKEND: str = "memory"  # where resource versions live: "memory" (per process) or "redis"
+    RESPONSE_CACHE_SIZE: int = 512  # cached response bodies per process, LRU-evicted
+    RESPONSE_CACHE_TTL: int = 30  # seconds; bounds staleness across workers with the memory backend
+    
+    # Prometheus metrics (/metrics; restrict access to it at the proxy)
+    METRICS_ENABLED: bool = True
+    
+    # Event loop blocking detector (logs the blocking stack, totals per route in /metrics)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL: float = 0.1  # heartbeat period, seconds
+    LOOP_MONITOR_THRESHOLD: float = 0.1  # stalls longer than this are logged, seconds
+    
+    # Background import of lazily loaded dependencies after startup
+    WARMUP_ENABLED: bool = True
+    WARMUP_DELAY: float = 1.0  # seconds after startup, so the server is listening first
     
     # hCaptcha
     HCAPTCHA_SECRET_KEY: str = Field(default="")
@@ -63,6 +87,27 @@ class Settings(BaseSettings):
     SCANNER_ALLOW_PRIVATE: bool = False
     SCANNER_MAX_SCANS_PER_USER: int = 5
     SCANNER_RATE_WINDOW_MINUTES: int = 60
+    SCANNER_HTTP_TIMEOUT: float = 8.0
+    SCANNER_HTTP_MAX_CONNECTIONS: int = 100
+    SCANNER_HTTP_MAX_KEEPALIVE: int = 20
+    SCANNER_HTTP_PER_HOST_LIMIT: int = 6
+    SCANNER_JOB_WORKERS: int = 4
+    SCANNER_MAX_QUEUED_JOBS: int = 100
+    SCANNER_MAX_ACTIVE_JOBS_PER_USER: int = 2
+    SCANNER_JOB_STALE_SECONDS: int = 300
+    SCANNER_DNS_CACHE_SIZE: int = 2048
+    SCANNER_DNS_TIMEOUT: float = 3.0
+    SCANNER_DNS_MIN_TTL: int = 5
+    SCANNER_DNS_MAX_TTL: int = 3600
+    SCANNER_DNS_DEFAULT_TTL: int = 60
+    SCANNER_DNS_NEGATIVE_TTL: int = 30
+    SCANNER_TLS_CACHE_TTL: int = 900
+    SCANNER_TLS_CACHE_SIZE: int = 1024
+    SCANNER_BULK_MAX_TARGETS: int = 500
+    SCANNER_BULK_CONCURRENCY: int = 10
+    SCANNER_BULK_PER_HOST_CONCURRENCY: int = 1
+    # Local NVD mirror; empty means the main DATABASE_URL
+    CVE_DATABASE_URL: str = ""
     
     # Resend Email
     RESEND_API_KEY: str = Field(default="")
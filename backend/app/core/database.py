@@ -1,8 +1,38 @@
+import time
+from typing import Optional, Tuple
+
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.utils.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CHECKOUT_TIMEOUTS, register_pool
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
 
 # Configure engine with connection pool settings optimized for Neon Postgres
 # - pool_pre_ping: Test connections before using them (handles dropped connections)
@@ -11,7 +41,7 @@ from app.core.config import settings
 # - max_overflow: Additional connections allowed beyond pool_size
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,  # Check if connection is alive before using
     pool_recycle=300,    # Recycle connections every 5 minutes
     pool_size=5,         # Keep 5 connections in the pool
@@ -25,6 +55,8 @@ engine = create_engine(
     }
 )
 
+register_pool(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -37,3 +69,77 @@ def get_db():
     finally:
         db.close()
 
+
+# Async engine (asyncpg) for handlers that should not block the event loop.
+# Created on first use so scripts and workers that only need the sync engine
+# don't open a second pool.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> Tuple[str, dict]:
+    """
+    Map DATABASE_URL to its async driver, returning (url, connect_args).
+
+    asyncpg rejects libpq-only query options, so Neon's ``sslmode`` becomes
+    asyncpg's ``ssl`` argument and ``channel_binding`` is dropped.
+    """
+    parsed = make_url(url)
+    backend = parsed.drivername.split("+", 1)[0]
+    parsed = parsed.set(drivername=ASYNC_DRIVERS.get(backend, parsed.drivername))
+
+    connect_args = {}
+    if parsed.drivername == "postgresql+asyncpg":
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            connect_args["ssl"] = sslmode
+        connect_args["timeout"] = 10  # Connection timeout in seconds
+        parsed = parsed.set(query=query)
+    return parsed.render_as_string(hide_password=False), connect_args
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        url, connect_args = async_database_url(settings.DATABASE_URL)
+        # Same Neon-friendly pool settings as the sync engine
+        _async_engine = create_async_engine(
+            url,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_pre_ping=True,
+            pool_recycle=300,
+            pool_size=5,
+            max_overflow=10,
+            connect_args=connect_args,
+        )
+        register_pool(_async_engine.sync_engine, "async")
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def get_async_db():
+    """Dependency for an AsyncSession; relationships must be eager-loaded (selectinload)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_sessionmaker = None
+
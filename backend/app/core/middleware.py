@@ -0,0 +1,146 @@
+"""
+Pure ASGI middleware for the API.
+
+These wrap the ASGI app directly instead of subclassing ``BaseHTTPMiddleware``,
+so requests are not moved to a separate task and response bodies (including
+streaming responses and background tasks) pass through untouched.
+"""
+import math
+import time
+from typing import Iterable, List, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import HTTP_IN_PROGRESS, HTTP_LATENCY, HTTP_REQUESTS
+from app.utils.rate_limit import RateLimiter
+from app.utils.loop_monitor import loop_monitor
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Content-Security-Policy": "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'; img-src 'self' data: https:; font-src 'self'; connect-src 'self' https:;",
+}
+
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class SecurityHeadersMiddleware:
+    """Set the security headers on every HTTP response, replacing any the app set."""
+
+    def __init__(self, app: ASGIApp, headers: dict = SECURITY_HEADERS):
+        self.app = app
+        self.headers: List[Tuple[bytes, bytes]] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()
+        ]
+        self._names = {name for name, _ in self.headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                raw = [(k, v) for k, v in message.get("headers", []) if k.lower() not in self._names]
+                message["headers"] = raw + self.headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class RateLimitMiddleware:
+    """Rate limit requests to the given path prefixes per client IP; other paths pass straight through."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate_limit: int = 5,
+        window: int = 60,
+        paths: Iterable[str] = ("/api/auth/login",),
+    ):
+        self.app = app
+        self.paths = tuple(paths)
+        self.limiter = RateLimiter("login", rate_limit, window)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        allowed, retry_after = await self.limiter.hit(client_ip)
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests. Please try again later."},
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """Record request count, latency and in-flight requests per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Labelled children are cached; .labels() takes a lock on every call
+        self._in_progress = {method: HTTP_IN_PROGRESS.labels(method) for method in HTTP_METHODS | {"OTHER"}}
+        self._latency: dict = {}
+        self._requests: dict = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = self._in_progress[method]
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            # The router stores the matched route in the scope; label by its
+            # template ("/api/writeups/{writeup_id}") so cardinality stays bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            latency = self._latency.get((method, route))
+            if latency is None:
+                latency = self._latency[(method, route)] = HTTP_LATENCY.labels(method, route)
+            latency.observe(elapsed)
+            requests = self._requests.get((method, route, status_code))
+            if requests is None:
+                requests = self._requests[(method, route, status_code)] = HTTP_REQUESTS.labels(
+                    method, route, str(status_code)
+                )
+            requests.inc()
+
+
+class LoopMonitorMiddleware:
+    """Run requests through the event loop monitor, so stalls are attributed to their route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        await loop_monitor.serve(self.app, scope, receive, send)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Text, DateTime, Float, JSON, Index
+from datetime import datetime
+from app.core.database import Base
+
+class Cve(Base):
+    """Local mirror of NVD CVE records, loaded by ingest_nvd.py."""
+    __tablename__ = "cves"
+
+    id = Column(String(32), primary_key=True)  # e.g. CVE-2024-3094
+    description = Column(Text, nullable=False, default="")
+    vuln_status = Column(String(32), nullable=True)  # Analyzed, Modified, Rejected, ...
+    published = Column(DateTime, nullable=True)
+    last_modified = Column(DateTime, nullable=True)
+    cvss_version = Column(String(8), nullable=True)  # 3.1, 3.0 or 2.0
+    cvss_score = Column(Float, nullable=True)
+    severity = Column(String(16), nullable=True)  # CRITICAL, HIGH, MEDIUM, LOW, NONE
+    cvss_vector = Column(String(128), nullable=True)
+    cwes = Column(JSON, nullable=True)  # ["CWE-79", ...]
+    references = Column(JSON, nullable=True)  # reference URLs
+    ingested_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Full-text index lives outside the ORM: a generated tsvector column with a
+    # GIN index on Postgres, an FTS5 table on SQLite (see app/utils/cve_store.py)
+    __table_args__ = (
+        Index("ix_cves_severity_score", "severity", "cvss_score"),
+        Index("ix_cves_published", "published"),
+    )
+
+    def __repr__(self):
+        return f"<Cve(id={self.id}, severity={self.severity}, score={self.cvss_score})>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Text, DateTime, JSON
+from datetime import datetime
+from app.core.database import Base
+
+class ScanJob(Base):
+    __tablename__ = "scan_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    owner = Column(String, nullable=False, index=True)  # username that submitted the job
+    kind = Column(String(32), nullable=False)  # 'scan', 'advanced-scan' or 'writeup-upload'
+    target = Column(String, nullable=False)
+    params = Column(JSON, nullable=False)  # request payload, used to re-run after a restart
+    status = Column(String(16), nullable=False, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    findings = Column(JSON)  # findings reported so far (partial while running)
+    timings = Column(JSON)  # per-stage durations in seconds; null while a stage runs (or if it failed)
+    result = Column(JSON)  # final scan response once completed
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # heartbeat of the owning worker
+
+    def __repr__(self):
+        return f"<ScanJob(id={self.id}, kind={self.kind}, status={self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum as SQLEnum, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum as SQLEnum, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -24,6 +24,10 @@ class Difficulty(str, enum.Enum):
 
 class Writeup(Base):
     __tablename__ = "writeups"
+    __table_args__ = (
+        # Newest-first listing and keyset pagination on (created_at, id)
+        Index("ix_writeups_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
@@ -38,6 +42,11 @@ class Writeup(Base):
     thumbnail_url = Column(String, nullable=True)
     summary = Column(Text)
     
+    # Upload processing: 'processing' until the upload pipeline has filled in
+    # the content, then 'ready'. Only ready writeups are listed publicly.
+    processing_status = Column(String(16), nullable=False, default="ready", server_default="ready")
+    upload_job_id = Column(String(32), nullable=True)  # scan_jobs id of the latest upload
+    
     # AI-generated content fields
     methodology = Column(Text, nullable=True)  # JSON array of methodology steps
     tools_used = Column(Text, nullable=True)  # JSON array of tools
@@ -50,11 +59,24 @@ class Writeup(Base):
     # Relationships
     tags = relationship("Tag", secondary=writeup_tags, back_populates="writeups")
 
+# Columns behind WriteupSummary: list and search results load only these
+# (plus tags), leaving the markdown body and AI text columns unread
+SUMMARY_COLUMNS = (
+    Writeup.id, Writeup.title, Writeup.platform, Writeup.difficulty, Writeup.category,
+    Writeup.date, Writeup.time_spent, Writeup.summary, Writeup.thumbnail_url,
+    Writeup.writeup_url, Writeup.content_type, Writeup.tools_used,
+    Writeup.created_at, Writeup.updated_at,
+)
+
 class Tag(Base):
     __tablename__ = "tags"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False, index=True)
+    __table_args__ = (
+        # Tags are unique regardless of case (see app.utils.tag_repository)
+        Index("ix_tags_name_lower", func.lower(name), unique=True),
+    )
     
     # Relationships
     writeups = relationship("Writeup", secondary=writeup_tags, back_populates="tags")
@@ -1,8 +1,17 @@
 from pydantic import BaseModel, field_validator
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 import json
 
+def parse_json_list(v):
+    """AI-generated fields are stored as JSON text; parse them to lists"""
+    if isinstance(v, str):
+        try:
+            return json.loads(v)
+        except json.JSONDecodeError:
+            return None
+    return v
+
 class TagBase(BaseModel):
     name: str
 
@@ -56,23 +65,58 @@ class Writeup(WriteupBase):
     tags: List[Tag]
     created_at: datetime
     updated_at: Optional[datetime] = None
+    processing_status: Literal["processing", "ready"] = "ready"  # 'processing' while an upload is being processed
+    upload_job_id: Optional[str] = None  # poll GET /api/writeups/uploads/{upload_job_id}
 
     @field_validator('methodology', 'tools_used', 'key_findings', 'lessons_learned', mode='before')
     @classmethod
     def parse_json_fields(cls, v):
         """Parse JSON strings to lists"""
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return None
-        return v
+        return parse_json_list(v)
+
+    class Config:
+        from_attributes = True
+
+class WriteupSummary(BaseModel):
+    """Card fields for list and search results; the full body comes from GET /{id}"""
+    id: int
+    title: str
+    platform: str
+    difficulty: str
+    category: str
+    date: str
+    time_spent: str
+    summary: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    writeup_url: Optional[str] = None
+    content_type: str = "pdf"
+    tools_used: Optional[List[str]] = None
+    tags: List[Tag]
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    @field_validator('tools_used', mode='before')
+    @classmethod
+    def parse_json_fields(cls, v):
+        """Parse JSON strings to lists"""
+        return parse_json_list(v)
 
     class Config:
         from_attributes = True
 
 class WriteupList(BaseModel):
-    items: List[Writeup]
+    items: List[WriteupSummary]
+    total: Optional[int] = None  # None for cursor pages unless estimate_total is set
+    page: Optional[int] = None  # None for cursor pages
+    page_size: int
+    next_cursor: Optional[str] = None  # None on the last page
+
+class WriteupSearchResult(WriteupSummary):
+    rank: Optional[float] = None  # ts_rank relevance (Postgres only)
+    snippet: Optional[str] = None  # HTML-escaped excerpt with <mark> around matches
+
+class WriteupSearchList(BaseModel):
+    items: List[WriteupSearchResult]
     total: int
     page: int
     page_size: int
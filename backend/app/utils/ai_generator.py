@@ -1,31 +1,44 @@
+from functools import lru_cache
 from typing import Dict, List
 import json
 import logging
 from app.core.config import settings
+from app.utils.metrics import track_dependency
 
 logger = logging.getLogger(__name__)
 
-# Lazy import to avoid errors if package not installed
-try:
-    import google.generativeai as genai  # type: ignore
-    GENAI_AVAILABLE = True
+
+@lru_cache(maxsize=None)
+def _genai():
+    """
+    Import and configure google-generativeai on first use; None if it is not
+    installed. The import takes a few hundred milliseconds, so it is kept off
+    the startup path (app.utils.warmup loads it in the background).
+    """
+    try:
+        import google.generativeai as genai  # type: ignore
+    except ImportError:
+        logger.warning("google-generativeai not installed. AI features will be disabled.")
+        return None
     # Configure Gemini
     if settings.GEMINI_API_KEY:
         genai.configure(api_key=settings.GEMINI_API_KEY)
-except ImportError:
-    GENAI_AVAILABLE = False
-    genai = None
-    logger.warning("google-generativeai not installed. AI features will be disabled.")
+    return genai
 
 class AIContentGenerator:
     """Generate writeup content using Google Gemini AI"""
     
     def __init__(self):
-        if GENAI_AVAILABLE and genai:
-            # Use a current, supported Gemini model (latest alias)
-            self.model = genai.GenerativeModel('gemini-1.5-pro-latest')
-        else:
-            self.model = None
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            genai = _genai()
+            if genai is not None:
+                # Use a current, supported Gemini model (latest alias)
+                self._model = genai.GenerativeModel('gemini-1.5-pro-latest')
+        return self._model
     
     async def generate_writeup_content(
         self,
@@ -47,20 +60,21 @@ class AIContentGenerator:
         Returns:
             Dict with keys: methodology, tools_used, key_findings, lessons_learned
         """
-        if not GENAI_AVAILABLE or not self.model:
-            logger.warning("AI generation not available - package not installed")
-            return self._get_fallback_content(category, difficulty)
-        
         if not settings.AI_GENERATION_ENABLED or not settings.GEMINI_API_KEY:
             logger.warning("AI generation is not enabled or API key not configured")
             return self._get_fallback_content(category, difficulty)
         
+        if not self.model:
+            logger.warning("AI generation not available - package not installed")
+            return self._get_fallback_content(category, difficulty)
+        
         try:
             prompt = self._build_comprehensive_prompt(
                 title, category, difficulty, platform, summary, tools_hint or [], methodology_hint or [], writeup_content
             )
             
-            response = self.model.generate_content(prompt)
+            with track_dependency("gemini", "generate_content"):
+                response = self.model.generate_content(prompt)
             content = self._parse_ai_response(response.text)
             
             logger.info(f"Successfully generated AI content for writeup: {title}")
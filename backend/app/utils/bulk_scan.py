@@ -0,0 +1,73 @@
+"""
+Scheduling helpers for bulk (multi-target) scans.
+
+Targets are scanned concurrently under two limits: a global cap on scans in
+flight and a per-host cap keyed by resolved IP, so many domains hosted on the
+same server are not hit all at once. Results are yielded as each target
+finishes, for NDJSON streaming.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class PolitenessScheduler:
+    """Global and per-host concurrency limits for bulk scans."""
+
+    def __init__(self, concurrency: int, per_host: int):
+        self.per_host = max(1, per_host)
+        self._global = asyncio.Semaphore(max(1, concurrency))
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        """Hold a per-host slot, then a global one (so waiting on a busy host never blocks other hosts)."""
+        host_slot = self._hosts.get(host)
+        if host_slot is None:
+            host_slot = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        async with host_slot:
+            async with self._global:
+                yield
+
+
+async def stream_as_completed(coros: Iterable[Awaitable[T]]) -> AsyncIterator[T]:
+    """
+    Run coroutines as separate tasks and yield their results in completion order.
+
+    Each coroutine gets its own task (and so its own context, e.g. IP pins).
+    Remaining tasks are cancelled if the consumer stops early, such as when a
+    streaming client disconnects.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def parse_target_list(content: str) -> List[str]:
+    """
+    Read targets from an uploaded file.
+
+    Accepts a JSON array, a JSON object with a "targets" array, or plain text
+    with one target per line (commas also separate; "#" starts a comment).
+    """
+    content = content.strip()
+    if content.startswith("[") or content.startswith("{"):
+        data: Any = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get("targets", [])
+        if not isinstance(data, list):
+            raise ValueError("JSON target list must be an array")
+        return [str(item).strip() for item in data if str(item).strip()]
+
+    targets = []
+    for line in content.splitlines():
+        line = line.split("#", 1)[0]
+        targets.extend(part.strip() for part in line.split(",") if part.strip())
+    return targets
@@ -1,73 +1,158 @@
 """
 Cloudinary file upload handler for PDFs
 """
-import cloudinary
-import cloudinary.uploader
+from functools import lru_cache
 from app.core.config import settings
+from app.utils.metrics import track_dependency
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Configure cloudinary
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET
-)
 
+@lru_cache(maxsize=None)
+def get_cloudinary():
+    """Import and configure the SDK on first use, off the startup path"""
+    import cloudinary
+    import cloudinary.uploader
 
-async def upload_pdf_to_cloudinary(file_content: bytes, filename: str) -> tuple[str, str]:
+    cloudinary.config(
+        cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+        api_key=settings.CLOUDINARY_API_KEY,
+        api_secret=settings.CLOUDINARY_API_SECRET
+    )
+    return cloudinary
+
+
+def pdf_public_id(filename: str) -> str:
+    """Public ID upload_pdf gives a file; uploads with the same name overwrite each other"""
+    return "writeups/" + filename.replace(".pdf", "")
+
+
+def public_id_from_url(file_url: str) -> str:
+    """Public ID of a PDF from its Cloudinary URL, folder included"""
+    # Format: https://res.cloudinary.com/{cloud_name}/raw/upload/v{version}/{public_id}
+    parts = file_url.split("/")
+    public_id = parts[-1].replace(".pdf", "")
+
+    # If there's a folder, include it
+    if len(parts) > 5 and parts[-2] != "upload":
+        folder = parts[-2]
+        public_id = f"{folder}/{public_id}"
+    return public_id
+
+
+def upload_pdf(file, filename: str) -> str:
     """
-    Upload a PDF file to Cloudinary and return (inline_pdf_url, thumbnail_url).
+    Upload a PDF (bytes or a local path) to Cloudinary as a raw resource and
+    return its inline URL. Blocking; the upload pipeline runs it in a thread.
     """
+    cloudinary = get_cloudinary()
     try:
         public_id = filename.replace(".pdf", "")
-        from cloudinary.utils import cloudinary_url
 
         # Upload PDF as raw resource type (standard PDF upload)
-        result = cloudinary.uploader.upload(
-            file_content,
-            resource_type="raw",
-            folder="writeups",
-            public_id=public_id,
-            overwrite=True,
-            use_filename=True,
-            unique_filename=False
-        )
+        with track_dependency("cloudinary", "upload"):
+            result = cloudinary.uploader.upload(
+                file,
+                resource_type="raw",
+                folder="writeups",
+                public_id=public_id,
+                overwrite=True,
+                use_filename=True,
+                unique_filename=False
+            )
 
+        logger.info(f"Successfully uploaded {filename} to Cloudinary")
         # Get the base URL - use it directly for viewing
-        pdf_url = result["secure_url"]
+        return result["secure_url"]
 
-        # For thumbnail, upload a copy as image type to enable page extraction
-        # This creates a separate asset for thumbnail generation
-        try:
-            thumb_result = cloudinary.uploader.upload(
-                file_content,
+    except Exception as e:
+        logger.error(f"Error uploading to Cloudinary: {str(e)}")
+        raise
+
+
+def upload_pdf_thumbnail(file, filename: str) -> str:
+    """
+    Upload a copy of the PDF as an image asset and return a first-page PNG
+    thumbnail URL, or "" if that fails. Independent of upload_pdf, so both
+    can run at once.
+    """
+    cloudinary = get_cloudinary()
+    public_id = filename.replace(".pdf", "")
+
+    # Uploaded as image type to enable page extraction; this creates a
+    # separate asset for thumbnail generation
+    try:
+        with track_dependency("cloudinary", "upload"):
+            cloudinary.uploader.upload(
+                file,
                 resource_type="image",
                 folder="writeups/thumbs",
                 public_id=public_id,
                 overwrite=True,
                 format="pdf"
             )
-            
-            # Generate thumbnail from first page
-            thumb_url, _ = cloudinary_url(
-                f"writeups/thumbs/{public_id}",
-                resource_type="image",
-                format="png",
-                page=1,
-                transformation=[{"width": 800, "crop": "scale", "quality": "auto"}]
-            )
-        except Exception as thumb_error:
-            logger.warning(f"Thumbnail generation failed: {thumb_error}, using placeholder")
-            thumb_url = ""
 
-        logger.info(f"Successfully uploaded {filename} to Cloudinary")
-        return pdf_url, thumb_url
+        return _thumbnail_url(public_id)
+    except Exception as thumb_error:
+        logger.warning(f"Thumbnail generation failed: {thumb_error}, using placeholder")
+        return ""
 
-    except Exception as e:
-        logger.error(f"Error uploading to Cloudinary: {str(e)}")
-        raise
+
+def _thumbnail_url(public_id: str, version=None) -> str:
+    """First-page PNG of a thumbnail asset; a version busts CDN caches after an overwrite"""
+    from cloudinary.utils import cloudinary_url
+
+    thumb_url, _ = cloudinary_url(
+        f"writeups/thumbs/{public_id}",
+        resource_type="image",
+        format="png",
+        page=1,
+        version=version,
+        transformation=[{"width": 800, "crop": "scale", "quality": "auto"}]
+    )
+    return thumb_url
+
+
+def rename_pdf(from_filename: str, to_filename: str) -> str:
+    """
+    Move a PDF uploaded by upload_pdf to another name, replacing any file
+    there, and return its new URL. Blocking; call it from a thread.
+    """
+    cloudinary = get_cloudinary()
+    with track_dependency("cloudinary", "rename"):
+        result = cloudinary.uploader.rename(
+            pdf_public_id(from_filename),
+            pdf_public_id(to_filename),
+            resource_type="raw",
+            overwrite=True,
+            invalidate=True
+        )
+    return result["secure_url"]
+
+
+def rename_pdf_thumbnail(from_filename: str, to_filename: str) -> str:
+    """
+    Move a thumbnail uploaded by upload_pdf_thumbnail to another name and
+    return its URL, or "" if that fails (the source asset is then deleted).
+    """
+    cloudinary = get_cloudinary()
+    from_id = from_filename.replace(".pdf", "")
+    to_id = to_filename.replace(".pdf", "")
+    try:
+        with track_dependency("cloudinary", "rename"):
+            result = cloudinary.uploader.rename(
+                f"writeups/thumbs/{from_id}",
+                f"writeups/thumbs/{to_id}",
+                resource_type="image",
+                overwrite=True,
+                invalidate=True
+            )
+        return _thumbnail_url(to_id, result.get("version"))
+    except Exception as thumb_error:
+        logger.warning(f"Thumbnail rename failed: {thumb_error}, using placeholder")
+        delete_pdf_thumbnail(from_filename)
+        return ""
 
 
 def generate_signed_url(public_id: str, expiration_hours: int = 1) -> str:
@@ -82,6 +167,7 @@ def generate_signed_url(public_id: str, expiration_hours: int = 1) -> str:
     Returns:
         A signed URL valid for the specified duration
     """
+    get_cloudinary()
     try:
         from cloudinary.utils import cloudinary_url
         from time import time
@@ -107,9 +193,9 @@ def generate_signed_url(public_id: str, expiration_hours: int = 1) -> str:
         raise
 
 
-async def delete_pdf_from_cloudinary(file_url: str) -> bool:
+def delete_pdf_from_cloudinary(file_url: str) -> bool:
     """
-    Delete a PDF from Cloudinary
+    Delete a PDF from Cloudinary (blocking; call it from a thread)
     
     Args:
         file_url: The Cloudinary URL of the file
@@ -117,33 +203,28 @@ async def delete_pdf_from_cloudinary(file_url: str) -> bool:
     Returns:
         True if deleted successfully, False otherwise
     """
+    cloudinary = get_cloudinary()
     try:
-        # Extract public ID from URL
-        # Format: https://res.cloudinary.com/{cloud_name}/raw/upload/v{version}/{public_id}
         if "cloudinary.com" not in file_url:
             return False
             
         # Extract the public ID from the URL
-        parts = file_url.split("/")
-        public_id = parts[-1].replace(".pdf", "")
-        
-        # If there's a folder, include it
-        if len(parts) > 5 and parts[-2] != "upload":
-            folder = parts[-2]
-            public_id = f"{folder}/{public_id}"
+        public_id = public_id_from_url(file_url)
         
         # Delete the main PDF
-        result = cloudinary.uploader.destroy(
-            public_id,
-            resource_type="raw"
-        )
+        with track_dependency("cloudinary", "destroy"):
+            result = cloudinary.uploader.destroy(
+                public_id,
+                resource_type="raw"
+            )
         
         # Also try to delete thumbnail copy if it exists
         try:
-            cloudinary.uploader.destroy(
-                f"writeups/thumbs/{public_id.split('/')[-1]}",
-                resource_type="image"
-            )
+            with track_dependency("cloudinary", "destroy"):
+                cloudinary.uploader.destroy(
+                    f"writeups/thumbs/{public_id.split('/')[-1]}",
+                    resource_type="image"
+                )
         except:
             pass
         
@@ -153,3 +234,16 @@ async def delete_pdf_from_cloudinary(file_url: str) -> bool:
     except Exception as e:
         logger.error(f"Error deleting from Cloudinary: {str(e)}")
         return False
+
+
+def delete_pdf_thumbnail(filename: str) -> None:
+    """Delete the thumbnail asset upload_pdf_thumbnail created (blocking; call it from a thread)"""
+    cloudinary = get_cloudinary()
+    try:
+        with track_dependency("cloudinary", "destroy"):
+            cloudinary.uploader.destroy(
+                f"writeups/thumbs/{filename.replace('.pdf', '')}",
+                resource_type="image"
+            )
+    except Exception as e:
+        logger.error(f"Error deleting thumbnail from Cloudinary: {str(e)}")
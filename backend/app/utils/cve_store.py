@@ -0,0 +1,390 @@
+"""
+Local CVE store built from NVD JSON feeds.
+
+``ingest_nvd.py`` loads NVD feed files (JSON 2.0 ``vulnerabilities`` or the
+legacy 1.1 ``CVE_Items`` format, plain, .gz or .zip) into the ``cves`` table;
+re-running it with the "modified" feed only rewrites records that changed.
+``search`` answers /api/scanner/cve/search from the full-text index, so no
+request ever waits on services.nvd.nist.gov.
+
+The store lives in the application database unless CVE_DATABASE_URL points it
+elsewhere (e.g. ``sqlite:///cves.db`` to keep the ~250k records out of Neon).
+Full-text search uses a weighted tsvector column with a GIN index on Postgres
+and an FTS5 table on SQLite; other databases fall back to ILIKE.
+"""
+import gzip
+import json
+import logging
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, literal_column, select, table, column, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core import database
+from app.models.cve import Cve
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "NONE")
+CVE_ID_PATTERN = re.compile(r"^CVE-\d{4}-\d{4,}$", re.IGNORECASE)
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE cves ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', id), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_cves_search_vector ON cves USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS cves_fts USING fts5(
+        id, description, content='cves', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cves_fts_insert AFTER INSERT ON cves BEGIN
+        INSERT INTO cves_fts(rowid, id, description) VALUES (new.rowid, new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cves_fts_delete AFTER DELETE ON cves BEGIN
+        INSERT INTO cves_fts(cves_fts, rowid, id, description) VALUES ('delete', old.rowid, old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cves_fts_update AFTER UPDATE ON cves BEGIN
+        INSERT INTO cves_fts(cves_fts, rowid, id, description) VALUES ('delete', old.rowid, old.id, old.description);
+        INSERT INTO cves_fts(rowid, id, description) VALUES (new.rowid, new.id, new.description);
+    END
+    """,
+]
+
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        url = settings.CVE_DATABASE_URL
+        if not url:
+            _engine = database.engine
+        elif url.startswith("sqlite"):
+            _engine = create_engine(url, connect_args={"check_same_thread": False})
+        else:
+            _engine = create_engine(url, pool_pre_ping=True)
+    return _engine
+
+
+def get_session() -> Session:
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory()
+
+
+def ensure_schema(engine: Optional[Engine] = None) -> None:
+    """Create the cves table and its full-text index if they do not exist."""
+    engine = engine or get_engine()
+    Cve.__table__.create(engine, checkfirst=True)
+    ddl = {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}.get(engine.dialect.name, [])
+    with engine.begin() as conn:
+        for statement in ddl:
+            conn.execute(text(statement))
+
+
+# ---------------------------------------------------------------------------
+# Feed parsing
+# ---------------------------------------------------------------------------
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def _english(entries: Iterable[Dict[str, Any]], key: str = "value") -> str:
+    entries = list(entries or [])
+    for entry in entries:
+        if entry.get("lang") == "en":
+            return entry.get(key, "")
+    return entries[0].get(key, "") if entries else ""
+
+
+def _parse_v2(cve: Dict[str, Any]) -> Dict[str, Any]:
+    """Record from an NVD JSON 2.0 ``vulnerabilities[].cve`` object."""
+    metrics = cve.get("metrics", {})
+    version = score = severity = vector = None
+    for key in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+        entries = metrics.get(key) or []
+        if not entries:
+            continue
+        # Prefer NVD's own (Primary) score over CNA-supplied ones
+        metric = next((m for m in entries if m.get("type") == "Primary"), entries[0])
+        data = metric.get("cvssData", {})
+        version = data.get("version")
+        score = data.get("baseScore")
+        severity = data.get("baseSeverity") or metric.get("baseSeverity")
+        vector = data.get("vectorString")
+        break
+
+    cwes = sorted({
+        desc.get("value")
+        for weakness in cve.get("weaknesses", [])
+        for desc in weakness.get("description", [])
+        if desc.get("value", "").startswith("CWE-")
+    })
+    return {
+        "id": cve.get("id"),
+        "description": _english(cve.get("descriptions")),
+        "vuln_status": cve.get("vulnStatus"),
+        "published": _parse_datetime(cve.get("published")),
+        "last_modified": _parse_datetime(cve.get("lastModified")),
+        "cvss_version": version,
+        "cvss_score": score,
+        "severity": severity.upper() if severity else None,
+        "cvss_vector": vector,
+        "cwes": cwes,
+        "references": [ref.get("url") for ref in cve.get("references", []) if ref.get("url")],
+    }
+
+
+def _parse_v1(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Record from a legacy NVD JSON 1.1 ``CVE_Items[]`` entry."""
+    cve = item.get("cve", {})
+    impact = item.get("impact", {})
+    version = score = severity = vector = None
+    if impact.get("baseMetricV3"):
+        data = impact["baseMetricV3"].get("cvssV3", {})
+        version, score = data.get("version"), data.get("baseScore")
+        severity, vector = data.get("baseSeverity"), data.get("vectorString")
+    elif impact.get("baseMetricV2"):
+        metric = impact["baseMetricV2"]
+        data = metric.get("cvssV2", {})
+        version, score = data.get("version"), data.get("baseScore")
+        severity, vector = metric.get("severity"), data.get("vectorString")
+
+    description = _english(cve.get("description", {}).get("description_data"))
+    cwes = sorted({
+        desc.get("value")
+        for problem in cve.get("problemtype", {}).get("problemtype_data", [])
+        for desc in problem.get("description", [])
+        if desc.get("value", "").startswith("CWE-")
+    })
+    return {
+        "id": cve.get("CVE_data_meta", {}).get("ID"),
+        "description": description,
+        "vuln_status": "Rejected" if description.startswith("** REJECT **") else None,
+        "published": _parse_datetime(item.get("publishedDate")),
+        "last_modified": _parse_datetime(item.get("lastModifiedDate")),
+        "cvss_version": version,
+        "cvss_score": score,
+        "severity": severity.upper() if severity else None,
+        "cvss_vector": vector,
+        "cwes": cwes,
+        "references": [
+            ref.get("url") for ref in cve.get("references", {}).get("reference_data", []) if ref.get("url")
+        ],
+    }
+
+
+def parse_feed(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield normalised CVE records from a decoded NVD feed document."""
+    if "vulnerabilities" in data:
+        for item in data["vulnerabilities"]:
+            record = _parse_v2(item.get("cve", {}))
+            if record["id"]:
+                yield record
+    elif "CVE_Items" in data:
+        for item in data["CVE_Items"]:
+            record = _parse_v1(item)
+            if record["id"]:
+                yield record
+    else:
+        raise ValueError("Unrecognised NVD feed format (expected 'vulnerabilities' or 'CVE_Items')")
+
+
+def load_feed_file(path: Path) -> Dict[str, Any]:
+    """Decode an NVD feed stored as .json, .json.gz or .json.zip."""
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            name = next(n for n in archive.namelist() if n.endswith(".json"))
+            with archive.open(name) as f:
+                return json.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def upsert_cves(session: Session, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Insert new records and update ones whose last_modified moved forward.
+
+    Returns (records_seen, rows_written); unchanged records are skipped by the
+    database, so replaying a feed is cheap.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    seen = written = 0
+    batch: Dict[str, Dict[str, Any]] = {}
+
+    def flush() -> int:
+        if not batch:
+            return 0
+        rows = list(batch.values())
+        batch.clear()
+        if insert is None:
+            for row in rows:
+                session.merge(Cve(**row))
+            return len(rows)
+        stmt = insert(Cve.__table__).values(rows)
+        updatable = {c: stmt.excluded[c] for c in rows[0] if c != "id"}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_=updatable,
+            where=(Cve.__table__.c.last_modified.is_(None))
+            | (Cve.__table__.c.last_modified < stmt.excluded.last_modified),
+        )
+        return session.execute(stmt).rowcount or 0
+
+    for record in records:
+        seen += 1
+        # Feeds can repeat an id; keep the latest revision within a batch
+        current = batch.get(record["id"])
+        if current is None or (record["last_modified"] or datetime.min) >= (current["last_modified"] or datetime.min):
+            batch[record["id"]] = record
+        if len(batch) >= batch_size:
+            written += flush()
+            session.commit()
+    written += flush()
+    session.commit()
+    return seen, written
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+def _fts5_query(query: str) -> str:
+    """Quote each term so user input cannot inject FTS5 syntax; terms are ANDed."""
+    terms = re.findall(r"[\w.]+", query)
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _to_dict(cve: Cve) -> Dict[str, Any]:
+    return {
+        "id": cve.id,
+        "description": cve.description,
+        "published": cve.published.isoformat() if cve.published else None,
+        "modified": cve.last_modified.isoformat() if cve.last_modified else None,
+        "severity": cve.severity,
+        "score": cve.cvss_score,
+        "cvss_version": cve.cvss_version,
+        "vector": cve.cvss_vector,
+        "cwes": cve.cwes or [],
+        "references": (cve.references or [])[:5],
+    }
+
+
+def search(
+    session: Session,
+    query: str,
+    severities: Optional[List[str]] = None,
+    min_score: Optional[float] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Full-text search over the local store.
+
+    Results are ordered by text rank, then CVSS score and publication date.
+    Returns (page of results, total matches).
+    """
+    dialect = session.get_bind().dialect.name
+    severity_col, score_col = Cve.severity, Cve.cvss_score
+    if dialect == "sqlite":
+        # Unary + keeps SQLite from driving the join from the severity index
+        # instead of the (far more selective) FTS match
+        severity_col = literal_column("+cves.severity")
+        score_col = literal_column("+cves.cvss_score")
+
+    filters = [func.coalesce(Cve.vuln_status, "") != "Rejected"]
+    if severities:
+        filters.append(severity_col.in_(severities))
+    if min_score is not None:
+        filters.append(score_col >= min_score)
+
+    from_clause = None
+    rank_order = []
+    if CVE_ID_PATTERN.match(query):
+        filters.append(Cve.id == query.upper())
+        stmt = select(Cve, literal_column("1.0").label("rank")).where(*filters)
+    elif dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", query)
+        vector = literal_column("cves.search_vector")
+        rank = func.ts_rank_cd(vector, tsquery)
+        filters.append(vector.op("@@")(tsquery))
+        stmt = select(Cve, rank.label("rank")).where(*filters)
+        rank_order = [rank.desc()]
+    elif dialect == "sqlite":
+        fts_query = _fts5_query(query)
+        if not fts_query:
+            return [], 0
+        fts = table("cves_fts", column("rowid"))
+        from_clause = fts.join(Cve.__table__, fts.c.rowid == literal_column("cves.rowid"))
+        # bm25() is lower-is-better
+        rank = func.bm25(literal_column("cves_fts"))
+        filters.append(text("cves_fts MATCH :fts_query").bindparams(fts_query=fts_query))
+        stmt = select(Cve, rank.label("rank")).select_from(from_clause).where(*filters)
+        rank_order = [rank.asc()]
+    else:
+        filters.append(Cve.description.ilike(f"%{query}%"))
+        stmt = select(Cve, literal_column("1.0").label("rank")).where(*filters)
+
+    count_stmt = select(func.count()).select_from(from_clause if from_clause is not None else Cve.__table__).where(*filters)
+    total = session.execute(count_stmt).scalar() or 0
+    if total == 0:
+        return [], 0
+
+    stmt = stmt.order_by(
+        *rank_order,
+        Cve.cvss_score.desc().nulls_last(),
+        Cve.published.desc().nulls_last(),
+    ).limit(limit).offset(offset)
+    rows = session.execute(stmt).all()
+    results = []
+    for cve, rank in rows:
+        item = _to_dict(cve)
+        item["rank"] = round(abs(float(rank)), 4) if rank is not None else None
+        results.append(item)
+    return results, total
+
+
+def is_empty(session: Session) -> bool:
+    return session.execute(select(Cve.id).limit(1)).first() is None
@@ -0,0 +1,139 @@
+"""
+Async DNS resolution with a TTL-aware cache for scanner target validation.
+
+Lookups go through dnspython's async resolver when it is installed (A and AAAA
+queried concurrently, record TTLs honoured) and fall back to the event loop's
+``getaddrinfo`` otherwise, or when DNS has no answer (e.g. names only present in
+/etc/hosts). Results, including "does not resolve", are kept in a bounded LRU
+cache so repeated scans of popular targets skip the lookup entirely, and
+concurrent lookups of the same name share one query.
+"""
+import asyncio
+import ipaddress
+import logging
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import dns.asyncresolver
+    import dns.exception
+    import dns.resolver
+    DNSPYTHON_AVAILABLE = True
+except ImportError:
+    DNSPYTHON_AVAILABLE = False
+
+
+class ResolutionError(Exception):
+    """Raised when a hostname does not resolve to any address."""
+
+
+# Cached value: tuple of addresses, or None for a negative (NXDOMAIN) entry
+_cache: TTLCache[Optional[Tuple[str, ...]]] = TTLCache(settings.SCANNER_DNS_CACHE_SIZE)
+_inflight: Dict[str, "asyncio.Future[Tuple[Tuple[str, ...], float]]"] = {}
+_resolver: Optional[Any] = None
+
+
+def _get_resolver():
+    global _resolver
+    if _resolver is None:
+        _resolver = dns.asyncresolver.Resolver()
+        _resolver.lifetime = settings.SCANNER_DNS_TIMEOUT
+    return _resolver
+
+
+def _clamp_ttl(ttl: float) -> float:
+    return max(settings.SCANNER_DNS_MIN_TTL, min(ttl, settings.SCANNER_DNS_MAX_TTL))
+
+
+async def _query_dns(hostname: str) -> Tuple[Tuple[str, ...], float]:
+    """Query A and AAAA concurrently; returns (addresses, ttl). Empty when DNS has no answer."""
+    resolver = _get_resolver()
+
+    async def query(rdtype: str):
+        try:
+            return await resolver.resolve(hostname, rdtype)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers):
+            return None
+
+    answers = await asyncio.gather(query("A"), query("AAAA"))
+    addresses: List[str] = []
+    ttls: List[float] = []
+    for answer in answers:
+        if answer is None:
+            continue
+        ttls.append(answer.rrset.ttl)
+        addresses.extend(rdata.address for rdata in answer)
+    return tuple(addresses), (min(ttls) if ttls else 0)
+
+
+async def _query_system(hostname: str) -> Tuple[str, ...]:
+    """Resolve through getaddrinfo (honours /etc/hosts); empty if the name does not exist."""
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(hostname, None, type=socket.SOCK_STREAM),
+            timeout=settings.SCANNER_DNS_TIMEOUT,
+        )
+    except socket.gaierror:
+        return ()
+    # A records first, then AAAA, without duplicates
+    infos.sort(key=lambda info: info[0] != socket.AF_INET)
+    return tuple(dict.fromkeys(info[4][0] for info in infos))
+
+
+async def _lookup(hostname: str) -> Tuple[Tuple[str, ...], float]:
+    addresses: Tuple[str, ...] = ()
+    ttl = 0.0
+    if DNSPYTHON_AVAILABLE:
+        try:
+            addresses, ttl = await _query_dns(hostname)
+        except dns.exception.DNSException as e:
+            logger.warning(f"DNS query for {hostname} failed, using system resolver: {e}")
+    if not addresses:
+        addresses = await _query_system(hostname)
+        ttl = settings.SCANNER_DNS_DEFAULT_TTL
+    return addresses, ttl
+
+
+async def resolve_host(hostname: str) -> List[str]:
+    """
+    Resolve hostname to all of its A/AAAA addresses (IPv4 first).
+
+    IP literals are returned as-is. Raises ResolutionError when the name does
+    not exist; that answer is cached for SCANNER_DNS_NEGATIVE_TTL seconds.
+    Transient failures (timeouts) propagate and are not cached.
+    """
+    try:
+        return [str(ipaddress.ip_address(hostname.strip("[]")))]
+    except ValueError:
+        pass
+
+    key = hostname.rstrip(".").lower()
+    cached = _cache.get(key)
+    if cached is not None:
+        addresses = cached[0]
+        if addresses is None:
+            raise ResolutionError(f"{hostname} does not resolve")
+        return list(addresses)
+
+    pending = _inflight.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_lookup(key))
+        _inflight[key] = pending
+        pending.add_done_callback(lambda _: _inflight.pop(key, None))
+    addresses, ttl = await asyncio.shield(pending)
+
+    if not addresses:
+        _cache.set(key, None, settings.SCANNER_DNS_NEGATIVE_TTL)
+        raise ResolutionError(f"{hostname} does not resolve")
+    _cache.set(key, addresses, _clamp_ttl(ttl))
+    return list(addresses)
+
+
+def clear_dns_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,213 @@
+"""
+Shared async HTTP client for outbound scanner probes.
+
+One ``httpx.AsyncClient`` is created at application startup and closed at
+shutdown, so probes reuse keep-alive connections (HTTP/2 when ``h2`` is
+installed) instead of opening a new connection per request. A per-host
+semaphore keeps a single target from monopolising the pool. Connections are
+dialled through ``PinningNetworkBackend`` so hosts pinned with
+``ip_pinning.pin_host`` go to their validated address; the client's
+transport builds its httpcore pool around that backend with public APIs only.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpcore
+import httpx
+
+from app.core.config import settings
+from app.utils.ip_pinning import PinningNetworkBackend
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "PortCyberScanner/1.0"
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class _HostSlot:
+    """Per-host semaphore and the number of requests holding or waiting for it."""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+_host_slots: Dict[str, _HostSlot] = {}
+
+
+# httpcore errors as the httpx ones callers expect; subclasses before their bases
+_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def _httpx_errors(request: httpx.Request):
+    try:
+        yield
+    except Exception as e:
+        for core_error, httpx_error in _ERRORS:
+            if isinstance(e, core_error):
+                raise httpx_error(str(e), request=request) from e
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_errors(self._request):
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class PinningTransport(httpx.AsyncBaseTransport):
+    """httpx transport over an httpcore pool that dials through PinningNetworkBackend."""
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=PinningNetworkBackend(),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors(request):
+            response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+def _build_client() -> httpx.AsyncClient:
+    # Scans must never share cookies between targets, so the client-level jar
+    # refuses every cookie; per-response cookies are still parsed by httpx.
+    no_cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    transport = PinningTransport(
+        limits=httpx.Limits(
+            max_connections=settings.SCANNER_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SCANNER_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=30.0,
+        ),
+        http2=HTTP2_AVAILABLE,
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(settings.SCANNER_HTTP_TIMEOUT, connect=5.0),
+        headers={"User-Agent": USER_AGENT},
+        cookies=no_cookies,
+    )
+
+
+async def start_http_client() -> None:
+    """Create the shared client (FastAPI startup hook)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info(f"Scanner HTTP client started (http2={HTTP2_AVAILABLE})")
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections (FastAPI shutdown hook)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_slots.clear()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside the app lifecycle (scripts, tests)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+@asynccontextmanager
+async def _host_slot(host: str):
+    """Limit concurrent requests per target host."""
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = _HostSlot(settings.SCANNER_HTTP_PER_HOST_LIMIT)
+    slot.users += 1
+    try:
+        async with slot.semaphore:
+            yield
+    finally:
+        slot.users -= 1
+        # Drop idle slots so the table only holds hosts with requests in flight or queued
+        if slot.users == 0 and _host_slots.get(host) is slot:
+            _host_slots.pop(host, None)
+
+
+async def request(
+    method: str,
+    url: str,
+    timeout: Optional[float] = None,
+    follow_redirects: bool = True,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Send a request through the shared client, honouring the per-host limit."""
+    client = get_http_client()
+    host = httpx.URL(url).host
+    request_timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0)) if timeout else client.timeout
+    async with _host_slot(host):
+        return await client.request(
+            method,
+            url,
+            timeout=request_timeout,
+            follow_redirects=follow_redirects,
+            **kwargs,
+        )
@@ -0,0 +1,71 @@
+"""
+Resolve-once IP pinning for scanner probes.
+
+A scan validates its target by resolving the hostname once and checking the
+addresses. ``pin_host`` records the validated address so every probe made
+afterwards in the same task (HTTP requests through the shared client, TLS
+handshakes, TCP port checks, nmap) connects to that address instead of
+resolving the name again. This removes redundant lookups and the DNS-rebinding
+window between validation and connection. TLS SNI and the HTTP Host header
+still use the hostname, so virtual hosts and certificate checks are unaffected.
+
+Pins live in a ``ContextVar``: they follow the request or job task into
+``asyncio.gather`` subtasks and ``asyncio.to_thread`` calls, and vanish with
+the task. Hosts that were never pinned (e.g. redirect targets) resolve normally.
+"""
+import typing
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import httpcore
+
+_pins: ContextVar[Dict[str, str]] = ContextVar("scanner_ip_pins", default={})
+
+
+def _key(hostname: str) -> str:
+    return hostname.rstrip(".").lower()
+
+
+def pin_host(hostname: str, address: str) -> None:
+    """Pin hostname to a validated address for the rest of the current task."""
+    pins = dict(_pins.get())
+    pins[_key(hostname)] = address
+    _pins.set(pins)
+
+
+def pinned_address(hostname: str) -> str:
+    """Address to connect to for hostname: the pinned IP, or the hostname itself."""
+    return _pins.get().get(_key(hostname), hostname)
+
+
+def get_pin(hostname: str) -> Optional[str]:
+    return _pins.get().get(_key(hostname))
+
+
+class PinningNetworkBackend(httpcore.AsyncNetworkBackend):
+    """httpcore backend that dials pinned addresses; TLS still uses the origin hostname for SNI."""
+
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[typing.Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_tcp(
+            pinned_address(host),
+            port,
+            timeout=timeout,
+            local_address=local_address,
+            socket_options=socket_options,
+        )
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
@@ -0,0 +1,124 @@
+"""
+Event-loop blocking detector (opt-in with ``LOOP_MONITOR_ENABLED``).
+
+A heartbeat task sleeps for ``LOOP_MONITOR_INTERVAL`` seconds at a time and
+records how late it wakes up; that lateness is the event-loop lag. A watchdog
+thread checks the heartbeat and, when it is overdue by more than
+``LOOP_MONITOR_THRESHOLD``, captures the loop thread's current stack - the
+code that is blocking - and logs it together with the route of the request
+being served. Once the loop recovers, the whole stall is added to that
+route's blocking totals in /metrics.
+
+Requests pass through ``LoopMonitor.serve`` (from ``LoopMonitorMiddleware``),
+so while a request's code runs that frame is on the loop thread's stack; the
+watchdog finds the route by walking the captured stack up to it.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from types import FrameType
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.utils.metrics import LOOP_BLOCKED_SECONDS, LOOP_BLOCKS, LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._tick: Optional[float] = None
+        # Route of the stall the watchdog is currently reporting, if any
+        self._stalled_route: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event loop monitor started (interval {self.interval * 1000:.0f}ms, "
+            f"threshold {self.threshold * 1000:.0f}ms)"
+        )
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._heartbeat.cancel()
+        try:
+            await self._heartbeat
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat = None
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    async def serve(self, app: ASGIApp, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a request; this frame marks the loop thread's stack as serving ``scope``."""
+        await app(scope, receive, send)
+
+    async def _beat(self) -> None:
+        while True:
+            self._tick = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - self._tick - self.interval, 0.0)
+            LOOP_LAG.observe(lag)
+            route, self._stalled_route = self._stalled_route, None
+            if route is not None:
+                LOOP_BLOCKED_SECONDS.labels(route).inc(lag)
+                LOOP_BLOCKS.labels(route).inc()
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms in {route}")
+
+    @staticmethod
+    def _running_route(frame: Optional[FrameType]) -> str:
+        while frame is not None:
+            if frame.f_code is _SERVE_CODE:
+                route = getattr(frame.f_locals["scope"].get("route"), "path", None)
+                return route or "unmatched"
+            frame = frame.f_back
+        return "background"
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._stop.wait(self.threshold / 2):
+            tick = self._tick
+            if tick is None or tick == reported_tick:
+                continue
+            overdue = time.monotonic() - tick - self.interval
+            if overdue < self.threshold:
+                continue
+
+            reported_tick = tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            route = self._running_route(frame)
+            self._stalled_route = route
+            stack = "".join(traceback.format_stack(frame)) if frame else "(stack unavailable)\n"
+            logger.warning(
+                f"Event loop blocked for more than {overdue * 1000:.0f}ms in {route}; "
+                f"loop thread stack:\n{stack}"
+            )
+
+
+_SERVE_CODE = LoopMonitor.serve.__code__
+
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_MONITOR_THRESHOLD)
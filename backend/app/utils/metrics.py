@@ -0,0 +1,171 @@
+"""
+Prometheus metrics for the API.
+
+Metric objects live here so any module can record into them; the ASGI
+middleware in ``app.core.middleware`` records HTTP traffic and ``/metrics`` in
+``main.py`` exposes everything. Recording is a lock-protected counter update,
+a few microseconds per call; pool gauges are read only when scraped.
+
+Under gunicorn with several workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an
+empty directory so every worker's samples are aggregated at scrape time.
+"""
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up waiting for a connection",
+)
+
+OUTBOUND_LATENCY = Histogram(
+    "outbound_request_duration_seconds",
+    "Duration of calls to external services",
+    ["service", "operation"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+OUTBOUND_ERRORS = Counter(
+    "outbound_request_errors_total",
+    "Failed calls to external services",
+    ["service", "operation"],
+)
+
+SCAN_STAGE_LATENCY = Histogram(
+    "scanner_stage_duration_seconds",
+    "Duration of individual scanner checks",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+SCAN_STAGE_ERRORS = Counter(
+    "scanner_stage_errors_total",
+    "Scanner checks that raised",
+    ["stage"],
+)
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop monitor's heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LOOP_BLOCKED_SECONDS = Counter(
+    "event_loop_blocked_seconds_total",
+    "Time the event loop was blocked, by the route running at the time",
+    ["route"],
+)
+LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Event loop stalls longer than LOOP_MONITOR_THRESHOLD, by route",
+    ["route"],
+)
+
+
+class track_dependency:
+    """
+    Time a call to an external service and count it as an error if it raises.
+
+        with track_dependency("resend", "send_email"):
+            resend.Emails.send(...)
+
+    Callers that swallow failures themselves can call ``mark_error()``.
+    """
+
+    __slots__ = ("service", "operation", "_start", "_failed")
+
+    def __init__(self, service: str, operation: str = "call"):
+        self.service = service
+        self.operation = operation
+        self._failed = False
+
+    def mark_error(self) -> None:
+        self._failed = True
+
+    def __enter__(self) -> "track_dependency":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        OUTBOUND_LATENCY.labels(self.service, self.operation).observe(time.perf_counter() - self._start)
+        if exc_type is not None or self._failed:
+            OUTBOUND_ERRORS.labels(self.service, self.operation).inc()
+        return False
+
+
+class _PoolCollector:
+    """Reports SQLAlchemy pool occupancy at scrape time (nothing on the request path)."""
+
+    STATS = {"size": "size", "checked_out": "checkedout", "checked_in": "checkedin", "overflow": "overflow"}
+
+    def __init__(self):
+        self.engines = {}
+
+    def collect(self):
+        families = {
+            stat: GaugeMetricFamily(f"db_pool_{stat}", f"SQLAlchemy pool {stat.replace('_', ' ')}", labels=["pool"])
+            for stat in self.STATS
+        }
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            for stat, method in self.STATS.items():
+                families[stat].add_metric([name], getattr(pool, method, lambda: 0)())
+        yield from families.values()
+
+
+_pool_collector = _PoolCollector()
+
+
+def register_pool(engine, name: str = "main") -> None:
+    """Expose pool occupancy gauges for an engine (once per name)."""
+    if not _pool_collector.engines:
+        REGISTRY.register(_pool_collector)
+    _pool_collector.engines.setdefault(name, engine)
+
+
+def render_metrics() -> tuple:
+    """Return (body, content type) for the /metrics endpoint."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def observe_stage(stage: str, seconds: float, error: Optional[BaseException] = None) -> None:
+    SCAN_STAGE_LATENCY.labels(stage).observe(seconds)
+    if error is not None:
+        SCAN_STAGE_ERRORS.labels(stage).inc()
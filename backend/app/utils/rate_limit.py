@@ -0,0 +1,206 @@
+"""
+Shared rate limiting for the API.
+
+Limits are sliding-window counters: each key keeps a count for the current
+fixed window and the previous one, and the previous count is weighted by how
+much of it still overlaps the sliding window. That is O(1) time and memory per
+key, unlike keeping every request timestamp.
+
+Two stores are available, selected with ``RATE_LIMIT_BACKEND``:
+
+- ``memory``: per-process, with idle keys evicted LRU-first once
+  ``RATE_LIMIT_MAX_KEYS`` is reached
+- ``redis``: shared by every worker via ``REDIS_URL``; if Redis is unreachable
+  the in-process store is used until it comes back
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import List, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis_asyncio
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - redis is in requirements.txt
+    redis_asyncio = None
+    RedisError = Exception
+    REDIS_AVAILABLE = False
+
+# (allowed, seconds until the caller should retry; 0 when allowed)
+RateLimitResult = Tuple[bool, float]
+
+# Check or record one hit on a sliding-window counter.
+# KEYS: current window key, previous window key
+# ARGV: previous-window weight, limit, mode ("hit" | "peek" | "add"), key TTL
+_REDIS_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimate = previous * tonumber(ARGV[1]) + current
+local mode = ARGV[3]
+if mode == 'add' or (mode == 'hit' and estimate < tonumber(ARGV[2])) then
+    redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return {1, previous, current}
+end
+if mode == 'peek' and estimate < tonumber(ARGV[2]) then
+    return {1, previous, current}
+end
+return {0, previous, current}
+"""
+
+
+def _window_position(window: float, now: float) -> Tuple[int, float]:
+    """Index of the fixed window containing now, and the weight of the previous one."""
+    index = int(now // window)
+    elapsed = now - index * window
+    return index, 1.0 - elapsed / window
+
+
+def _retry_after(previous: float, current: float, weight: float, limit: int, window: float) -> float:
+    """Seconds until the estimate drops below limit (assuming no new hits)."""
+    elapsed = (1.0 - weight) * window
+    if current >= limit or previous <= 0:
+        return round(window - elapsed, 3)
+    # Solve previous * (1 - (elapsed + t) / window) + current < limit for t
+    needed = window * (1.0 - (limit - current) / previous) - elapsed
+    return round(min(max(needed, 0.0), window - elapsed), 3)
+
+
+class MemoryRateLimitStore:
+    """In-process sliding-window counters with LRU eviction of idle keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [window index, current count, previous count]
+        self._counters: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def _counter(self, key: str, index: int) -> List[float]:
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = [index, 0, 0]
+            self._counters[key] = counter
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        else:
+            self._counters.move_to_end(key)
+            if counter[0] != index:
+                # Roll forward; anything older than one window no longer counts
+                counter[2] = counter[1] if counter[0] == index - 1 else 0
+                counter[1] = 0
+                counter[0] = index
+        return counter
+
+    async def hit(self, key: str, limit: int, window: float, mode: str = "hit") -> RateLimitResult:
+        index, weight = _window_position(window, time.time())
+        counter = self._counter(key, index)
+        estimate = counter[2] * weight + counter[1]
+        allowed = mode == "add" or estimate < limit
+        if allowed and mode != "peek":
+            counter[1] += 1
+        if allowed:
+            return True, 0.0
+        return False, _retry_after(counter[2], counter[1], weight, limit, window)
+
+    def clear(self) -> None:
+        self._counters.clear()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class RedisRateLimitStore:
+    """Sliding-window counters in Redis, shared across workers and hosts."""
+
+    RETRY_SECONDS = 30
+
+    def __init__(self, url: str, fallback: MemoryRateLimitStore, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self.fallback = fallback
+        self._client = redis_asyncio.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._script = self._client.register_script(_REDIS_SCRIPT)
+        self._down_until = 0.0
+
+    async def hit(self, key: str, limit: int, window: float, mode: str = "hit") -> RateLimitResult:
+        now = time.time()
+        if now < self._down_until:
+            return await self.fallback.hit(key, limit, window, mode)
+
+        index, weight = _window_position(window, now)
+        keys = [f"{self.prefix}:{key}:{index}", f"{self.prefix}:{key}:{index - 1}"]
+        try:
+            allowed, previous, current = await self._script(
+                keys=keys, args=[weight, limit, mode, math.ceil(window * 2)]
+            )
+        except (RedisError, OSError) as e:
+            logger.warning(f"Rate limit store unavailable, using in-process limits: {e}")
+            self._down_until = now + self.RETRY_SECONDS
+            return await self.fallback.hit(key, limit, window, mode)
+
+        if allowed:
+            return True, 0.0
+        return False, _retry_after(previous, current, weight, limit, window)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_store = None
+
+
+def get_store():
+    """The process-wide rate limit store (created on first use)."""
+    global _store
+    if _store is None:
+        memory = MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+        if settings.RATE_LIMIT_BACKEND == "redis" and REDIS_AVAILABLE:
+            _store = RedisRateLimitStore(settings.REDIS_URL, fallback=memory)
+        else:
+            if settings.RATE_LIMIT_BACKEND == "redis":
+                logger.warning("RATE_LIMIT_BACKEND=redis but the redis package is missing; using memory")
+            _store = memory
+    return _store
+
+
+async def close_store() -> None:
+    global _store
+    if isinstance(_store, RedisRateLimitStore):
+        await _store.close()
+    _store = None
+
+
+class RateLimiter:
+    """
+    A named limit of ``limit`` hits per ``window`` seconds per key.
+
+    ``hit`` checks and records in one step. ``check`` only looks, and
+    ``record`` always counts, for callers that must pass several limits
+    (or finish the request) before a hit should count.
+    """
+
+    def __init__(self, name: str, limit: int, window: float, store=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self._store = store
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else get_store()
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def hit(self, key: str) -> RateLimitResult:
+        return await self.store.hit(self._key(key), self.limit, self.window, "hit")
+
+    async def check(self, key: str) -> RateLimitResult:
+        return await self.store.hit(self._key(key), self.limit, self.window, "peek")
+
+    async def record(self, key: str) -> None:
+        await self.store.hit(self._key(key), self.limit, self.window, "add")
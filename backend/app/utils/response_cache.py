@@ -0,0 +1,172 @@
+"""
+Conditional GET caching for public read endpoints.
+
+Each cached response depends on one or more resource versions (``writeups``,
+``writeup:12``, ``comments:12``) that write paths bump with ``invalidate``.
+A response body is built once per combination of versions and kept in a
+bounded LRU; its strong ETag is a hash of the body, so every worker produces
+the same tag for the same data. A matching ``If-None-Match`` gets a 304 from
+memory without opening a database connection.
+
+Versions live in-process by default (``RESPONSE_CACHE_BACKEND=memory``). With
+several workers a write is then only seen immediately by the worker that
+handled it; the others serve their cached copy for at most
+``RESPONSE_CACHE_TTL`` seconds. ``RESPONSE_CACHE_BACKEND=redis`` keeps the
+versions in Redis so every worker invalidates at once; if Redis is unreachable
+the in-process versions are used until it comes back.
+"""
+import hashlib
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.utils.rate_limit import REDIS_AVAILABLE, RedisError, redis_asyncio
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "public, no-cache"  # clients may store, but must revalidate
+
+
+class MemoryVersionStore:
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, resources: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(resource, 0) for resource in resources)
+
+    async def bump(self, resources: Sequence[str]) -> None:
+        for resource in resources:
+            self._versions[resource] = self._versions.get(resource, 0) + 1
+
+
+class RedisVersionStore:
+    RETRY_SECONDS = 30
+
+    def __init__(self, url: str, fallback: MemoryVersionStore, prefix: str = "respcache"):
+        self.prefix = prefix
+        self.fallback = fallback
+        self._client = redis_asyncio.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._down_until = 0.0
+
+    def _unavailable(self, e: Exception) -> None:
+        logger.warning(f"Response cache version store unavailable, using in-process versions: {e}")
+        self._down_until = time.time() + self.RETRY_SECONDS
+
+    async def get(self, resources: Sequence[str]) -> Tuple[int, ...]:
+        if time.time() < self._down_until:
+            return await self.fallback.get(resources)
+        try:
+            values = await self._client.mget([f"{self.prefix}:{resource}" for resource in resources])
+        except (RedisError, OSError) as e:
+            self._unavailable(e)
+            return await self.fallback.get(resources)
+        return tuple(int(value or 0) for value in values)
+
+    async def bump(self, resources: Sequence[str]) -> None:
+        # Always bump locally too, so this worker is correct even if Redis is down
+        await self.fallback.bump(resources)
+        if time.time() < self._down_until:
+            return
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for resource in resources:
+                    pipe.incr(f"{self.prefix}:{resource}")
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._unavailable(e)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_cache: TTLCache[Tuple[str, bytes]] = TTLCache(settings.RESPONSE_CACHE_SIZE)
+_versions = None
+
+
+def get_version_store():
+    global _versions
+    if _versions is None:
+        memory = MemoryVersionStore()
+        if settings.RESPONSE_CACHE_BACKEND == "redis" and REDIS_AVAILABLE:
+            _versions = RedisVersionStore(settings.REDIS_URL, fallback=memory)
+        else:
+            if settings.RESPONSE_CACHE_BACKEND == "redis":
+                logger.warning("RESPONSE_CACHE_BACKEND=redis but the redis package is missing; using memory")
+            _versions = memory
+    return _versions
+
+
+async def close_version_store() -> None:
+    global _versions
+    if isinstance(_versions, RedisVersionStore):
+        await _versions.close()
+    _versions = None
+
+
+async def invalidate(*resources: str) -> None:
+    """Mark resources as changed; call after the write has been committed."""
+    await get_version_store().bump(resources)
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison, as RFC 9110 specifies for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class CachedRead:
+    """Result of ``lookup``: a ready response on a hit, otherwise ``store``."""
+
+    def __init__(self, key: tuple, response: Optional[Response], if_none_match: Optional[str]):
+        self.key = key
+        self.response = response
+        self.if_none_match = if_none_match
+
+    def store(self, content: Any, response_model: Any) -> Response:
+        """
+        Serialize what the handler would have returned, validated against
+        ``response_model`` as FastAPI would, cache it and answer the request.
+        """
+        adapter = _adapter(response_model)
+        data = adapter.dump_python(adapter.validate_python(content, from_attributes=True), mode="json")
+        body = json.dumps(data, separators=(",", ":")).encode()
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        _cache.set(self.key, (etag, body), settings.RESPONSE_CACHE_TTL)
+        return _respond(etag, body, self.if_none_match)
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _respond(etag: str, body: bytes, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def lookup(request: Request, resources: Sequence[str]) -> CachedRead:
+    """
+    Check the cache for a public GET that depends on ``resources``.
+
+    On a hit ``.response`` is a 200 or 304 built without touching the
+    database; otherwise run the queries and return ``.store(result, Model)``.
+    """
+    versions = await get_version_store().get(resources)
+    key = (request.url.path, str(request.query_params), versions)
+    if_none_match = request.headers.get("if-none-match")
+    cached = _cache.get(key)
+    response = _respond(*cached[0], if_none_match) if cached is not None else None
+    return CachedRead(key, response, if_none_match)
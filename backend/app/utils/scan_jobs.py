@@ -0,0 +1,537 @@
+"""
+Background scan job queue.
+
+Scans submitted through the API are persisted to the ``scan_jobs`` table and
+executed by a bounded pool of asyncio workers, so the HTTP request returns a
+job id immediately. Runners report findings and stage timings as they go;
+every checkpoint is written to the database, which lets any worker answer
+polling requests and lets finished work survive a restart. Jobs whose owning
+worker stops heart-beating are re-queued by the next worker that notices.
+
+The same queue runs writeup upload processing (``app.utils.upload_pipeline``)
+as a second manager with its own workers and limits; each manager only claims
+and recovers the job kinds it has runners for.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.scan_job import ScanJob
+from app.utils.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobQueueFull(Exception):
+    """Raised when the global job queue cannot take more work."""
+
+
+class UserJobLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of active jobs."""
+
+
+class ScanJobError(Exception):
+    """Raised by runners to fail a job with a user-facing message."""
+
+
+class ScanJobContext:
+    """Handle passed to job runners for reporting partial findings and stage timings."""
+
+    def __init__(self, manager: "ScanJobManager", job_id: str, params: Dict[str, Any]):
+        self.job_id = job_id
+        self.params = params
+        self.findings: List[Dict[str, Any]] = []
+        self.timings: Dict[str, Optional[float]] = {}
+        self._manager = manager
+        # Stages may run concurrently; write checkpoints one at a time so an
+        # older snapshot never lands after a newer one
+        self._checkpoint_lock = asyncio.Lock()
+
+    def add_findings(self, findings: List[Dict[str, Any]]) -> None:
+        self.findings.extend(findings)
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """
+        Time a stage and checkpoint progress when it starts and finishes.
+
+        A started stage is recorded in timings as None until it completes, so
+        pollers on any worker can tell which stages are running (or, once the
+        job has finished, which stage failed).
+        """
+        self.timings[name] = None
+        async with self._checkpoint_lock:
+            await self._manager._checkpoint(self)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if error is None:
+                self.timings[name] = round(elapsed, 3)
+            observe_stage(name, elapsed, error)
+        async with self._checkpoint_lock:
+            await self._manager._checkpoint(self)
+
+
+Runner = Callable[[ScanJobContext], Awaitable[Dict[str, Any]]]
+
+
+def _job_to_dict(job: ScanJob) -> Dict[str, Any]:
+    duration = None
+    if job.started_at:
+        duration = round(((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds(), 3)
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "owner": job.owner,
+        "target": job.target,
+        "status": job.status,
+        "findings": job.findings or [],
+        "timings": job.timings or {},
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "duration": duration,
+    }
+
+
+class ScanJobManager:
+    """Bounded in-process worker pool backed by the scan_jobs table."""
+
+    def __init__(
+        self,
+        label: str = "scan",
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        max_active_per_owner: Optional[int] = None,
+    ):
+        # Limits default to the SCANNER_* settings, read when they are used
+        self.label = label
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_active_per_owner = max_active_per_owner
+        self._runners: Dict[str, Runner] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._maintenance: Optional[asyncio.Task] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._contexts: Dict[str, ScanJobContext] = {}
+        self._local: Set[str] = set()  # job ids queued or running in this process
+        # Queue slots held by submits still inserting their job
+        self._reserved = 0
+        self._stopping = False
+
+    def register(self, kind: str, runner: Runner) -> None:
+        """Register the coroutine that executes jobs of the given kind."""
+        self._runners[kind] = runner
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start workers and pick up jobs orphaned by a previous process (startup hook)."""
+        if self._workers:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_queued or settings.SCANNER_MAX_QUEUED_JOBS)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers or settings.SCANNER_JOB_WORKERS)
+        ]
+        self._maintenance = asyncio.create_task(self._maintenance_loop())
+        try:
+            await self._recover_orphans()
+        except Exception as e:
+            logger.error(f"{self.label.capitalize()} job recovery failed: {e}")
+
+    async def stop(self) -> None:
+        """Stop workers and hand unfinished jobs back to the queue (shutdown hook)."""
+        self._stopping = True
+        tasks = [*self._workers, *self._tasks.values()]
+        if self._maintenance:
+            tasks.append(self._maintenance)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._local:
+            try:
+                await asyncio.to_thread(self._release, list(self._local))
+            except Exception as e:
+                logger.error(f"Could not release unfinished {self.label} jobs: {e}")
+        self._workers = []
+        self._maintenance = None
+        self._queue = None
+        self._reserved = 0
+        self._tasks.clear()
+        self._contexts.clear()
+        self._local.clear()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(self, owner: str, kind: str, target: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a new job and enqueue it; raises when limits are exceeded."""
+        if kind not in self._runners:
+            raise ValueError(f"Unknown {self.label} job kind: {kind}")
+        await self.start()
+        # Hold the queue slot across the database round-trip, so concurrent
+        # submits cannot all pass the check and overfill the queue
+        if self._free_slots() <= 0:
+            raise JobQueueFull(f"{self.label.capitalize()} queue is full. Please try again shortly.")
+        queue = self._queue
+        self._reserved += 1
+        try:
+            job_id = uuid.uuid4().hex
+            job = await asyncio.to_thread(
+                self._insert,
+                job_id,
+                owner,
+                kind,
+                target,
+                params,
+                list(self._runners),
+                self.max_active_per_owner or settings.SCANNER_MAX_ACTIVE_JOBS_PER_USER,
+                self.label,
+            )
+        finally:
+            self._reserved -= 1
+        if queue is not self._queue:
+            # Stopped while inserting: the job is persisted, hand it to the next worker's recovery
+            await asyncio.to_thread(self._release, [job_id])
+            return job
+        self._local.add(job_id)
+        self._queue.put_nowait(job_id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job state, including partial findings while it runs."""
+        job = await asyncio.to_thread(self._load, job_id)
+        if job is None:
+            return None
+        ctx = self._contexts.get(job_id)
+        if ctx is not None and job["status"] == "running":
+            # In-memory progress is fresher than the last checkpoint
+            job["findings"] = list(ctx.findings)
+            job["timings"] = dict(ctx.timings)
+        return job
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it had already finished."""
+        cancelled = await asyncio.to_thread(self._mark_cancelled, job_id)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        return cancelled
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._execute(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.label.capitalize()} job {job_id} crashed the worker: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job_id: str) -> None:
+        claimed = await asyncio.to_thread(self._claim, job_id)
+        if claimed is None:
+            # Cancelled while queued or picked up by another worker
+            self._local.discard(job_id)
+            return
+
+        kind, params = claimed
+        ctx = ScanJobContext(self, job_id, params)
+        self._contexts[job_id] = ctx
+        task = asyncio.create_task(self._runners[kind](ctx))
+        self._tasks[job_id] = task
+
+        result = None
+        error = None
+        try:
+            result = await task
+            status = "completed"
+        except asyncio.CancelledError:
+            if self._stopping or not task.done():
+                # The worker itself is shutting down; stop() releases the job
+                task.cancel()
+                raise
+            status = "cancelled"
+        except ScanJobError as e:
+            status, error = "failed", str(e)
+        except Exception as e:
+            logger.error(f"{self.label.capitalize()} job {job_id} failed: {e}")
+            status, error = "failed", f"{self.label.capitalize()} failed: {str(e)}"
+        finally:
+            self._tasks.pop(job_id, None)
+            self._contexts.pop(job_id, None)
+
+        await asyncio.to_thread(
+            self._finish, job_id, status, list(ctx.findings), dict(ctx.timings), result, error
+        )
+        self._local.discard(job_id)
+
+    async def _checkpoint(self, ctx: ScanJobContext) -> None:
+        still_running = await asyncio.to_thread(
+            self._save_progress, ctx.job_id, list(ctx.findings), dict(ctx.timings)
+        )
+        if not still_running:
+            # Cancelled through another worker; stop doing work for it
+            raise asyncio.CancelledError()
+
+    async def _maintenance_loop(self) -> None:
+        interval = max(5, settings.SCANNER_JOB_STALE_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._local:
+                    await asyncio.to_thread(self._touch, list(self._local))
+                await self._recover_orphans()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.label.capitalize()} job maintenance failed: {e}")
+
+    def _free_slots(self) -> int:
+        return self._queue.maxsize - self._queue.qsize() - self._reserved
+
+    async def _recover_orphans(self) -> None:
+        free = self._free_slots()
+        if free <= 0:
+            return
+        queue = self._queue
+        job_ids = await asyncio.to_thread(self._requeue_stale, free, list(self._local), list(self._runners))
+        # Submits may have taken the free slots meanwhile; hand back what no longer fits
+        recovered, overflow = [], []
+        for job_id in job_ids:
+            if queue is self._queue and self._free_slots() > 0:
+                self._local.add(job_id)
+                self._queue.put_nowait(job_id)
+                recovered.append(job_id)
+            else:
+                overflow.append(job_id)
+        if overflow:
+            await asyncio.to_thread(self._release, overflow)
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} orphaned {self.label} jobs")
+
+    # ------------------------------------------------------------------
+    # Persistence (run in worker threads)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _insert(
+        job_id: str,
+        owner: str,
+        kind: str,
+        target: str,
+        params: Dict[str, Any],
+        kinds: List[str],
+        max_active: int,
+        label: str,
+    ) -> Dict[str, Any]:
+        """Insert a queued job unless the owner is at the active-job limit (one transaction)."""
+        db = SessionLocal()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                # Serialise count-then-insert per owner across workers; released at commit
+                digest = hashlib.blake2b(f"scan_jobs:{owner}".encode(), digest_size=8).digest()
+                db.execute(select(func.pg_advisory_xact_lock(int.from_bytes(digest, "big", signed=True))))
+            active = db.query(func.count(ScanJob.id)).filter(
+                ScanJob.owner == owner,
+                ScanJob.kind.in_(kinds),
+                ScanJob.status.in_(ACTIVE_STATUSES),
+            ).scalar()
+            if active >= max_active:
+                raise UserJobLimitExceeded(
+                    f"You already have {active} {label}s in progress. Wait for one to finish or cancel it."
+                )
+            job = ScanJob(
+                id=job_id,
+                owner=owner,
+                kind=kind,
+                target=target,
+                params=params,
+                status="queued",
+                findings=[],
+                timings={},
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return _job_to_dict(job)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _load(job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.query(ScanJob).filter(ScanJob.id == job_id).first()
+            return _job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def _claim(job_id: str) -> Optional[tuple]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            claimed = db.execute(
+                update(ScanJob)
+                .where(ScanJob.id == job_id, ScanJob.status == "queued")
+                .values(status="running", started_at=now, updated_at=now)
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return None
+            job = db.query(ScanJob).filter(ScanJob.id == job_id).first()
+            return job.kind, job.params or {}
+        finally:
+            db.close()
+
+    @staticmethod
+    def _save_progress(job_id: str, findings: List[Dict[str, Any]], timings: Dict[str, float]) -> bool:
+        db = SessionLocal()
+        try:
+            updated = db.execute(
+                update(ScanJob)
+                .where(ScanJob.id == job_id, ScanJob.status == "running")
+                .values(findings=findings, timings=timings, updated_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish(
+        job_id: str,
+        status: str,
+        findings: List[Dict[str, Any]],
+        timings: Dict[str, float],
+        result: Optional[Dict[str, Any]],
+        error: Optional[str],
+    ) -> None:
+        db = SessionLocal()
+        try:
+            # A job cancelled through the API keeps its cancelled status but
+            # still records whatever it had found before stopping.
+            allowed = ("running", "cancelled") if status == "cancelled" else ("running",)
+            now = datetime.utcnow()
+            db.execute(
+                update(ScanJob)
+                .where(ScanJob.id == job_id, ScanJob.status.in_(allowed))
+                .values(
+                    status=status,
+                    findings=findings,
+                    timings=timings,
+                    result=result,
+                    error=error,
+                    finished_at=now,
+                    updated_at=now,
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _mark_cancelled(job_id: str) -> bool:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            cancelled = db.execute(
+                update(ScanJob)
+                .where(ScanJob.id == job_id, ScanJob.status.in_(ACTIVE_STATUSES))
+                .values(status="cancelled", finished_at=now, updated_at=now)
+            ).rowcount
+            db.commit()
+            return bool(cancelled)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _touch(job_ids: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ScanJob)
+                .where(ScanJob.id.in_(job_ids), ScanJob.status.in_(ACTIVE_STATUSES))
+                .values(updated_at=datetime.utcnow())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _release(job_ids: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            # Back-date the heartbeat so the next worker picks the jobs up immediately
+            stale = datetime.utcnow() - timedelta(seconds=settings.SCANNER_JOB_STALE_SECONDS + 1)
+            db.execute(
+                update(ScanJob)
+                .where(ScanJob.id.in_(job_ids), ScanJob.status.in_(ACTIVE_STATUSES))
+                .values(status="queued", started_at=None, updated_at=stale)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _requeue_stale(limit: int, exclude: List[str], kinds: List[str]) -> List[str]:
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.SCANNER_JOB_STALE_SECONDS)
+            query = db.query(ScanJob.id, ScanJob.updated_at).filter(
+                ScanJob.kind.in_(kinds),
+                ScanJob.status.in_(ACTIVE_STATUSES),
+                ScanJob.updated_at < cutoff,
+            )
+            if exclude:
+                query = query.filter(ScanJob.id.notin_(exclude))
+            candidates = query.order_by(ScanJob.created_at.asc()).limit(limit).all()
+
+            recovered = []
+            for job_id, seen_at in candidates:
+                # Compare-and-set on the heartbeat so only one worker adopts each job
+                adopted = db.execute(
+                    update(ScanJob)
+                    .where(ScanJob.id == job_id, ScanJob.updated_at == seen_at)
+                    .values(status="queued", started_at=None, updated_at=datetime.utcnow())
+                ).rowcount
+                if adopted:
+                    recovered.append(job_id)
+            db.commit()
+            return recovered
+        finally:
+            db.close()
+
+
+scan_jobs = ScanJobManager()
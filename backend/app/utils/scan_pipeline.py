@@ -0,0 +1,96 @@
+"""
+Dependency-aware stage runner for multi-probe scans.
+
+Each stage is an async callable that receives the results of the stages that
+already finished. A stage starts as soon as every stage it depends on has
+completed, so independent probes overlap instead of running back to back.
+If any stage fails, the remaining ones are cancelled and the error is raised.
+"""
+import asyncio
+import time
+from typing import (
+    Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple,
+)
+
+from app.utils.metrics import observe_stage
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class PipelineStage:
+    """A named unit of scan work and the stages whose results it needs."""
+
+    def __init__(self, name: str, run: StageFunc, depends_on: Iterable[str] = ()):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+
+async def iter_pipeline(
+    stages: List[PipelineStage],
+    wrap: Optional[Callable[[str], AsyncContextManager]] = None,
+) -> AsyncIterator[Tuple[str, Any, float]]:
+    """
+    Run stages concurrently, yielding each one as soon as it finishes.
+
+    Args:
+        stages: Stages in declaration order; dependencies must be declared first
+        wrap: Optional context manager factory entered around each stage
+            (e.g. ``ScanJobContext.stage`` for progress checkpoints)
+
+    Yields:
+        (stage name, stage result, seconds spent in the stage) in completion order.
+        Closing the iterator early cancels the stages still running.
+    """
+    results: Dict[str, Any] = {}
+    tasks: Dict[str, "asyncio.Task[Tuple[str, Any, float]]"] = {}
+
+    async def execute(stage: PipelineStage) -> Tuple[str, Any, float]:
+        if stage.depends_on:
+            await asyncio.gather(*(tasks[name] for name in stage.depends_on))
+        start = time.perf_counter()
+        if wrap is not None:
+            # The wrapper times the stage itself (and records its metrics)
+            async with wrap(stage.name):
+                value = await stage.run(results)
+        else:
+            try:
+                value = await stage.run(results)
+            except Exception as e:
+                observe_stage(stage.name, time.perf_counter() - start, e)
+                raise
+            observe_stage(stage.name, time.perf_counter() - start)
+        results[stage.name] = value
+        return stage.name, value, round(time.perf_counter() - start, 3)
+
+    for stage in stages:
+        missing = [name for name in stage.depends_on if name not in tasks]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on undeclared stages: {missing}")
+        tasks[stage.name] = asyncio.ensure_future(execute(stage))
+
+    try:
+        for next_done in asyncio.as_completed(list(tasks.values())):
+            yield await next_done
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+async def run_pipeline(
+    stages: List[PipelineStage],
+    wrap: Optional[Callable[[str], AsyncContextManager]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run stages concurrently, respecting dependencies.
+
+    Returns:
+        (results by stage name, seconds spent in each stage)
+    """
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    async for name, value, elapsed in iter_pipeline(stages, wrap):
+        results[name] = value
+        timings[name] = elapsed
+    return results, timings
@@ -0,0 +1,304 @@
+"""
+Tag suggestions weighted by the whole writeup corpus.
+
+``TagModel`` keeps the document frequency of every term seen across the
+writeups, so a new document is scored with real TF-IDF weights: terms that
+are frequent in it but rare in the corpus win, and words every writeup uses
+("target", "machine", "flag") sink. The previous approach fit a fresh
+TfidfVectorizer on the single uploaded document, where every term has the
+same IDF and the "top" terms came out in alphabetical order.
+
+The model is updated incrementally - ``record_writeup`` when an upload is
+ready, ``forget_writeup`` when a writeup is deleted - and saved to
+``TAG_MODEL_PATH``. It is loaded lazily on first use; if the file is missing
+it is fit from the database (markdown bodies, and title + summary for PDFs,
+whose full text only exists at upload time). Rebuild it by hand with::
+
+    python -m app.utils.tag_model
+
+Each process keeps its own copy and reloads the file when another process
+has saved a newer one before applying an update.
+"""
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.writeup import Writeup
+
+logger = logging.getLogger(__name__)
+
+CTF_KEYWORDS = {
+    "sql": "sql-injection",
+    "xss": "xss",
+    "privilege escalation": "privesc",
+    "buffer overflow": "buffer-overflow",
+    "reverse shell": "reverse-shell",
+    "port scanning": "port-scanning",
+    "web": "web",
+    "linux": "linux",
+    "windows": "windows",
+    "network": "network",
+    "forensics": "forensics",
+    "crypto": "cryptography",
+    "steganography": "steganography",
+    "enumeration": "enumeration",
+    "exploit": "exploit",
+    "metasploit": "metasploit",
+    "nmap": "nmap",
+    "burp": "burp-suite",
+    "wireshark": "wireshark",
+    "john": "password-cracking",
+    "hashcat": "password-cracking",
+    "hydra": "brute-force",
+    "gobuster": "directory-bruteforce",
+    "suid": "suid",
+    "cron": "cron",
+    "docker": "docker",
+    "kubernetes": "kubernetes",
+}
+
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")  # TfidfVectorizer's default token pattern
+MAX_TERM_LENGTH = 30
+MAX_DF = 0.5  # terms in more than half the writeups are not suggested...
+MIN_DOCS_FOR_MAX_DF = 10  # ...once the corpus is big enough for that to mean something
+
+
+@lru_cache(maxsize=1)
+def _stop_words() -> frozenset:
+    # scikit-learn takes about a second to import; only its word list is used
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+    return ENGLISH_STOP_WORDS
+
+
+def tokenize(text: str) -> List[str]:
+    stop_words = _stop_words()
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if token not in stop_words and not token.isdigit() and len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+class TagModel:
+    """Corpus term statistics: vocabulary, document frequencies and each document's terms."""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.df = np.zeros(1024, dtype=np.int32)  # grown by doubling; only len(terms) entries used
+        self.doc_terms: Dict[int, np.ndarray] = {}
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_terms)
+
+    def _index(self, term: str) -> int:
+        index = self.vocabulary.get(term)
+        if index is None:
+            index = len(self.terms)
+            self.vocabulary[term] = index
+            self.terms.append(term)
+            if index >= len(self.df):
+                self.df = np.concatenate([self.df, np.zeros(len(self.df), dtype=np.int32)])
+        return index
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Count a document, replacing its previous version if it was already counted."""
+        self.remove(doc_id)
+        indices = np.fromiter((self._index(term) for term in set(tokenize(text))), dtype=np.int32)
+        self.df[indices] += 1
+        self.doc_terms[doc_id] = indices
+
+    def remove(self, doc_id: int) -> None:
+        indices = self.doc_terms.pop(doc_id, None)
+        if indices is not None:
+            self.df[indices] -= 1
+
+    def top_terms(self, text: str, n: int, exclude: Iterable[str] = ()) -> List[str]:
+        """The n terms of ``text`` with the highest TF-IDF weight against the corpus."""
+        counts = Counter(tokenize(text))
+        # Terms the corpus has never seen must occur twice, to keep out typos
+        # and extraction debris that would otherwise get the maximum IDF
+        candidates = [term for term, count in counts.items() if count > 1 or term in self.vocabulary]
+        if not candidates:
+            return []
+        indices = np.array([self.vocabulary.get(term, -1) for term in candidates], dtype=np.int64)
+        tf = np.array([counts[term] for term in candidates], dtype=np.float64)
+        df = np.where(indices >= 0, self.df[np.maximum(indices, 0)], 0)
+
+        n_docs = self.n_docs
+        scores = (1.0 + np.log(tf)) * (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0)
+        if n_docs >= MIN_DOCS_FOR_MAX_DF:
+            scores[df > MAX_DF * n_docs] = 0.0
+
+        excluded = set(exclude)
+        result: List[str] = []
+        # Stable sort: ties keep their order of first appearance in the text
+        for i in np.argsort(-scores, kind="stable"):
+            if len(result) >= n or scores[i] <= 0.0:
+                break
+            if candidates[i] not in excluded:
+                result.append(candidates[i])
+        return result
+
+    def save(self, path: str) -> None:
+        """Write atomically, so other processes never load a partial file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        doc_ids = np.fromiter(self.doc_terms.keys(), dtype=np.int64, count=len(self.doc_terms))
+        lengths = [len(indices) for indices in self.doc_terms.values()]
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        doc_indices = np.concatenate(list(self.doc_terms.values())) if self.doc_terms else np.zeros(0, np.int32)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                terms=np.array(self.terms, dtype=str),
+                df=self.df[:len(self.terms)],
+                doc_ids=doc_ids,
+                doc_indptr=indptr,
+                doc_indices=doc_indices.astype(np.int32),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TagModel":
+        model = cls()
+        with np.load(path, allow_pickle=False) as data:
+            model.terms = data["terms"].tolist()
+            model.vocabulary = {term: i for i, term in enumerate(model.terms)}
+            model.df = np.zeros(max(1024, 2 * len(model.terms)), dtype=np.int32)
+            model.df[:len(model.terms)] = data["df"]
+            indptr, doc_indices = data["doc_indptr"], data["doc_indices"]
+            for i, doc_id in enumerate(data["doc_ids"].tolist()):
+                model.doc_terms[doc_id] = doc_indices[indptr[i]:indptr[i + 1]]
+        return model
+
+
+def writeup_text(writeup) -> str:
+    """What the corpus knows of a stored writeup."""
+    return " ".join(part for part in (writeup.title, writeup.summary, writeup.writeup_content) if part)
+
+
+def fit_from_db(db) -> TagModel:
+    model = TagModel()
+    rows = (
+        db.query(Writeup.id, Writeup.title, Writeup.summary, Writeup.writeup_content)
+        .filter(Writeup.processing_status == "ready")
+        .yield_per(500)
+    )
+    for row in rows:
+        model.add(row.id, writeup_text(row))
+    return model
+
+
+# ----------------------------------------------------------------------
+# Process-wide model
+# ----------------------------------------------------------------------
+
+_model: Optional[TagModel] = None
+_loaded_mtime = 0.0
+_lock = threading.RLock()
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _save(model: TagModel) -> None:
+    global _loaded_mtime
+    try:
+        model.save(settings.TAG_MODEL_PATH)
+        _loaded_mtime = _mtime(settings.TAG_MODEL_PATH)
+    except OSError as e:
+        logger.warning(f"Could not save tag model to {settings.TAG_MODEL_PATH}: {e}")
+
+
+def _fit() -> TagModel:
+    db = SessionLocal()
+    try:
+        model = fit_from_db(db)
+    finally:
+        db.close()
+    logger.info(f"Tag model fit on {model.n_docs} writeups, {len(model.terms)} terms")
+    _save(model)
+    return model
+
+
+def get_tag_model() -> TagModel:
+    """The loaded model; blocking (file or database I/O on first use)."""
+    global _model, _loaded_mtime
+    with _lock:
+        path = settings.TAG_MODEL_PATH
+        mtime = _mtime(path)
+        if _model is not None and mtime <= _loaded_mtime:
+            return _model
+        if mtime:
+            try:
+                _model, _loaded_mtime = TagModel.load(path), mtime
+                return _model
+            except Exception as e:
+                logger.warning(f"Tag model at {path} is unreadable, refitting: {e}")
+        try:
+            _model = _fit()
+        except Exception as e:
+            # No database (yet): suggest from term frequency alone
+            logger.warning(f"Could not fit tag model: {e}")
+            _model = TagModel()
+        return _model
+
+
+def suggest_tags(text: str, max_tags: int = 5, model: Optional[TagModel] = None) -> List[str]:
+    """Suggest tags: known CTF keywords first, then the corpus-weighted top terms."""
+    if not text:
+        return []
+    tags: List[str] = []
+    matched = set()
+    text_lower = text.lower()
+    for keyword, tag in CTF_KEYWORDS.items():
+        if keyword in text_lower and tag not in tags:
+            tags.append(tag)
+            matched.update(keyword.split())
+            if len(tags) >= max_tags:
+                return tags
+
+    model = model if model is not None else get_tag_model()
+    # Skip the words a keyword tag already covers ("sql" next to "sql-injection")
+    tags.extend(model.top_terms(text, max_tags - len(tags), exclude=matched.union(tags)))
+    return tags
+
+
+def record_writeup(writeup_id: int, text: str) -> None:
+    """Add (or replace) a writeup's text in the corpus and persist the model."""
+    with _lock:
+        model = get_tag_model()
+        model.add(writeup_id, text)
+        _save(model)
+
+
+def forget_writeup(writeup_id: int) -> None:
+    with _lock:
+        model = get_tag_model()
+        if writeup_id in model.doc_terms:
+            model.remove(writeup_id)
+            _save(model)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with _lock:
+        _model = _fit()
+    print(f"Saved tag model for {_model.n_docs} writeups to {settings.TAG_MODEL_PATH}")
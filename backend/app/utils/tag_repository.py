@@ -0,0 +1,84 @@
+"""
+Tag lookups shared by the writeup endpoints, the upload pipeline and the
+seed scripts.
+
+``get_or_create_tags`` resolves any number of names in two round-trips: one
+``SELECT ... WHERE lower(name) IN (...)`` for the tags that exist and one
+``INSERT ... ON CONFLICT DO NOTHING RETURNING`` for the rest. A tag created
+by a concurrent request between the two is skipped by the insert instead of
+failing on the unique index, and picked up by a final select (only in that
+case).
+
+Tags match case-insensitively ("Linux" finds an existing "linux") and keep
+the spelling they were first created with; the unique index on
+``lower(name)`` enforces one tag per name.
+"""
+from typing import Iterable, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.writeup import Tag
+
+
+def normalize_tag_name(name: str) -> str:
+    """Trim and collapse inner whitespace: " Port  Scanning" -> "Port Scanning"."""
+    return " ".join(name.split())
+
+
+def tag_key(name: str) -> str:
+    """What tags are compared by: the normalised name, lowercased."""
+    return normalize_tag_name(name).lower()
+
+
+def normalize_tag_names(names: Iterable[str]) -> List[str]:
+    """Normalised names without blanks or case-insensitive duplicates, first spelling and order kept."""
+    unique = {}
+    for name in map(normalize_tag_name, names):
+        if name:
+            unique.setdefault(name.lower(), name)
+    return list(unique.values())
+
+
+def _insert_ignoring_duplicates(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    # No conflict target: the unique index is on lower(name), not a column
+    return dialect_insert(Tag).on_conflict_do_nothing()
+
+
+def _find(db: Session, keys: List[str]) -> dict:
+    return {tag.name.lower(): tag for tag in db.scalars(select(Tag).where(func.lower(Tag.name).in_(keys)))}
+
+
+def get_or_create_tags(db: Session, names: Iterable[str]) -> List[Tag]:
+    """
+    Tag objects for ``names`` (normalised, deduplicated, in order), creating
+    the missing ones. New tags are inserted immediately, in the caller's
+    transaction; they are committed or rolled back with it.
+    """
+    names = normalize_tag_names(names)
+    if not names:
+        return []
+    keys = [name.lower() for name in names]
+
+    found = _find(db, keys)
+    missing = [name for name, key in zip(names, keys) if key not in found]
+    if missing:
+        stmt = _insert_ignoring_duplicates(db)
+        if stmt is None:
+            # No ON CONFLICT support: plain insert, a race fails on the constraint
+            stmt = insert(Tag)
+        for tag in db.scalars(stmt.returning(Tag), [{"name": name} for name in missing]):
+            found[tag.name.lower()] = tag
+
+        raced = [key for key in keys if key not in found]
+        if raced:
+            found.update(_find(db, raced))
+
+    return [found[key] for key in keys]
@@ -0,0 +1,89 @@
+"""
+Cache of TLS inspection results for the public TLS check.
+
+Certificates change rarely, but popular domains get checked over and over when
+a scanner link is shared. Results are cached per (host, port) for
+SCANNER_TLS_CACHE_TTL seconds, never past the certificate's ``notAfter``, and
+concurrent checks of the same endpoint share a single handshake.
+"""
+import asyncio
+import logging
+import ssl
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, int]
+
+# Cached value: (tls details, monotonic time of the handshake)
+_cache: TTLCache[Tuple[Dict[str, Any], float]] = TTLCache(settings.SCANNER_TLS_CACHE_SIZE)
+_inflight: Dict[Key, "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+def _ttl_for(tls_info: Dict[str, Any]) -> float:
+    """Configured TTL, capped by the time left until the certificate expires."""
+    ttl = float(settings.SCANNER_TLS_CACHE_TTL)
+    not_after = tls_info.get("notAfter")
+    if not_after:
+        try:
+            ttl = min(ttl, ssl.cert_time_to_seconds(not_after) - time.time())
+        except ValueError:
+            pass
+    return ttl
+
+
+async def get_tls_details_cached(
+    hostname: str,
+    port: int,
+    fetch: Callable[[str, int], Awaitable[Dict[str, Any]]],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Return (tls_info, cache_metadata) for hostname:port.
+
+    ``fetch`` is the async inspection function; it runs only on a miss, and at
+    most once at a time per key. Failed handshakes are not cached.
+    """
+    key = (hostname.rstrip(".").lower(), port)
+    cached = _cache.get(key)
+    if cached is not None:
+        (tls_info, checked_at), remaining = cached
+        return tls_info, {
+            "hit": True,
+            "coalesced": False,
+            "age": round(time.monotonic() - checked_at, 3),
+            "expires_in": round(remaining, 3),
+        }
+
+    pending = _inflight.get(key)
+    coalesced = pending is not None
+    if pending is None:
+        pending = asyncio.ensure_future(fetch(hostname, port))
+        _inflight[key] = pending
+        pending.add_done_callback(lambda _: _inflight.pop(key, None))
+        pending.add_done_callback(lambda fut: _store(key, fut))
+    tls_info = await asyncio.shield(pending)
+
+    entry = _cache.get(key)
+    return tls_info, {
+        "hit": False,
+        "coalesced": coalesced,
+        "age": 0.0,
+        "expires_in": round(entry[1], 3) if entry else 0.0,
+    }
+
+
+def _store(key: Key, fut: "asyncio.Future[Dict[str, Any]]") -> None:
+    if fut.cancelled() or fut.exception() is not None:
+        return
+    tls_info = fut.result()
+    if "error" in tls_info:
+        return
+    _cache.set(key, (tls_info, time.monotonic()), _ttl_for(tls_info))
+
+
+def clear_tls_cache() -> None:
+    _cache.clear()
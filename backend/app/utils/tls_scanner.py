@@ -0,0 +1,165 @@
+"""
+Concurrent TLS protocol and cipher-family enumeration.
+
+A single default handshake only shows what the client and server prefer. To
+find out what a server *accepts*, one handshake is attempted per protocol
+version and per TLS <= 1.2 cipher family, all at once, under a shared deadline,
+so the whole matrix costs roughly one round trip instead of one per probe.
+Certificates are not validated here; ``_get_tls_details`` does that.
+"""
+import asyncio
+import ssl
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.ip_pinning import pinned_address
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_CONCURRENCY = 16
+
+PROTOCOLS: List[Tuple[str, ssl.TLSVersion]] = [
+    ("TLSv1", ssl.TLSVersion.TLSv1),
+    ("TLSv1.1", ssl.TLSVersion.TLSv1_1),
+    ("TLSv1.2", ssl.TLSVersion.TLSv1_2),
+    ("TLSv1.3", ssl.TLSVersion.TLSv1_3),
+]
+LEGACY_PROTOCOLS = ("TLSv1", "TLSv1.1")
+
+# OpenSSL cipher strings per family, probed with TLS 1.2 as the maximum version
+# (TLS 1.3 suites are all AEAD and cannot be restricted through the ssl module)
+CIPHER_FAMILIES: Dict[str, Tuple[str, str]] = {
+    "AEAD with forward secrecy": ("ECDHE+AESGCM:ECDHE+CHACHA20:DHE+AESGCM:DHE+CHACHA20", "strong"),
+    "CBC mode": ("AES:CAMELLIA:!AESGCM:!AESCCM", "medium"),
+    "RSA key exchange (no forward secrecy)": ("kRSA", "medium"),
+    "3DES": ("3DES", "weak"),
+    "RC4": ("RC4", "weak"),
+    "DES": ("DES", "weak"),
+    "EXPORT": ("EXPORT", "weak"),
+    "NULL encryption": ("eNULL", "weak"),
+    "Anonymous key exchange": ("aNULL", "weak"),
+}
+
+
+def _client_context(
+    min_version: ssl.TLSVersion,
+    max_version: ssl.TLSVersion,
+    ciphers: Optional[str] = None,
+) -> Optional[ssl.SSLContext]:
+    """Context for one probe; None when the local OpenSSL cannot offer it."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        with warnings.catch_warnings():
+            # TLS 1.0/1.1 are deprecated, which is exactly what we probe for
+            warnings.simplefilter("ignore", DeprecationWarning)
+            context.minimum_version = min_version
+            context.maximum_version = max_version
+        # Security level 0 lets OpenSSL offer legacy protocols and ciphers
+        context.set_ciphers(f"{ciphers or 'ALL:COMPLEMENTOFALL'}:@SECLEVEL=0")
+    except (ssl.SSLError, ValueError):
+        return None
+    return context
+
+
+async def _handshake(
+    address: str,
+    hostname: str,
+    port: int,
+    context: Optional[ssl.SSLContext],
+    deadline: float,
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    """Attempt one handshake; supported is True/False, or None if untestable or timed out."""
+    if context is None:
+        return {"supported": None, "error": "not supported by local OpenSSL"}
+
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return {"supported": None, "error": "timeout"}
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    address, port, ssl=context, server_hostname=hostname,
+                    ssl_handshake_timeout=remaining,
+                ),
+                timeout=remaining,
+            )
+        except asyncio.TimeoutError:
+            return {"supported": None, "error": "timeout"}
+        except (ssl.SSLError, ConnectionResetError, asyncio.IncompleteReadError, EOFError) as exc:
+            # The server refused the hello: alert, reset or closed connection
+            return {"supported": False, "error": str(exc) or type(exc).__name__}
+        except OSError as exc:
+            return {"supported": None, "error": str(exc)}
+
+    ssl_object = writer.get_extra_info("ssl_object")
+    result = {
+        "supported": True,
+        "protocol": ssl_object.version() if ssl_object else None,
+        "cipher": ssl_object.cipher()[0] if ssl_object and ssl_object.cipher() else None,
+    }
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return result
+
+
+async def enumerate_tls(
+    hostname: str,
+    port: int = 443,
+    timeout: float = DEFAULT_TIMEOUT,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Enumerate supported protocol versions and cipher families concurrently.
+
+    Args:
+        hostname: Server name (sent as SNI; the connection uses the pinned address if any)
+        port: TLS port
+        timeout: Shared deadline for all probes, in seconds
+        concurrency: Maximum simultaneous handshakes
+
+    Returns:
+        Dict with per-protocol and per-family results plus summary lists
+    """
+    loop = asyncio.get_running_loop()
+    address = pinned_address(hostname)
+    deadline = loop.time() + timeout
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    start = time.perf_counter()
+
+    probes: Dict[Tuple[str, str], Optional[ssl.SSLContext]] = {}
+    for name, version in PROTOCOLS:
+        probes[("protocol", name)] = _client_context(version, version)
+    for family, (ciphers, _) in CIPHER_FAMILIES.items():
+        probes[("cipher", family)] = _client_context(
+            ssl.TLSVersion.TLSv1, ssl.TLSVersion.TLSv1_2, ciphers
+        )
+
+    results = await asyncio.gather(
+        *(_handshake(address, hostname, port, ctx, deadline, semaphore) for ctx in probes.values())
+    )
+    by_probe = dict(zip(probes.keys(), results))
+
+    protocols = {name: by_probe[("protocol", name)] for name, _ in PROTOCOLS}
+    families = {}
+    for family, (_, strength) in CIPHER_FAMILIES.items():
+        families[family] = {**by_probe[("cipher", family)], "strength": strength}
+
+    return {
+        "host": hostname,
+        "port": port,
+        "protocols": protocols,
+        "cipher_families": families,
+        "supported_protocols": [name for name, r in protocols.items() if r["supported"]],
+        "legacy_protocols": [name for name in LEGACY_PROTOCOLS if protocols[name]["supported"]],
+        "weak_ciphers": [f for f, r in families.items() if r["supported"] and r["strength"] == "weak"],
+        "medium_ciphers": [f for f, r in families.items() if r["supported"] and r["strength"] == "medium"],
+        "duration": round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,382 @@
+"""
+Writeup upload processing, off the request.
+
+``create_writeup`` and ``update_writeup_with_file`` only store the raw upload
+under ``UPLOAD_DIR/incoming``, save the writeup (a new one as
+``processing_status='processing'``, hidden from public lists until ready) and
+submit a ``writeup-upload`` job. Jobs run on ``upload_jobs``, a ScanJobManager
+with its own workers and limits, so they are persisted, polled through
+``GET /api/writeups/uploads/{job_id}`` and recovered after a restart exactly
+like scans (the raw file must be on a disk the recovering worker can read).
+
+CPU-bound stages - PDF text extraction and ZIP extraction - run in a process
+pool; blocking I/O - virus scan, Cloudinary, image files, the database - runs
+in threads. PDF analysis overlaps the Cloudinary uploads. New files are
+staged - PDFs under a temporary Cloudinary public ID, ZIP images in a folder
+under ``INCOMING_DIR`` - and moved to their final names in the save stage,
+so the writeup's current file is untouched until processing has succeeded.
+A replaced PDF is deleted only once the writeup points at the new one; a
+failed run deletes what it staged or published. Tags are suggested from the extracted text with the
+corpus model in app.utils.tag_model, which then records the text.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.writeup import Writeup
+from app.utils import response_cache, tag_model
+from app.utils.cloudinary_handler import (
+    delete_pdf_from_cloudinary,
+    delete_pdf_thumbnail,
+    pdf_public_id,
+    public_id_from_url,
+    rename_pdf,
+    rename_pdf_thumbnail,
+    upload_pdf,
+    upload_pdf_thumbnail,
+)
+from app.utils.pdf_processor import analyze_pdf
+from app.utils.scan_jobs import ACTIVE_STATUSES, ScanJobContext, ScanJobError, ScanJobManager
+from app.utils.tag_repository import get_or_create_tags
+from app.utils.virus_scan import scan_bytes_for_viruses
+from app.utils.zip_processor import (
+    extract_summary_from_markdown,
+    image_dir_name,
+    prepare_markdown_upload,
+    publish_images,
+    save_images,
+)
+
+logger = logging.getLogger(__name__)
+
+KIND = "writeup-upload"
+INCOMING_DIR = os.path.join(settings.UPLOAD_DIR, "incoming")
+
+upload_jobs = ScanJobManager(
+    "upload",
+    workers=settings.UPLOAD_JOB_WORKERS,
+    max_queued=settings.UPLOAD_MAX_QUEUED_JOBS,
+    max_active_per_owner=settings.UPLOAD_MAX_ACTIVE_JOBS_PER_USER,
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the server process has a running loop and threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.UPLOAD_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def _in_process(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_process_pool(), fn, *args)
+
+
+async def start() -> None:
+    await upload_jobs.start()
+
+
+async def stop() -> None:
+    global _pool
+    await upload_jobs.stop()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def store_upload(data: bytes, filename: str) -> str:
+    """Save a raw upload for the pipeline; returns its path."""
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    path = os.path.join(INCOMING_DIR, uuid.uuid4().hex + os.path.splitext(filename)[1].lower())
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def discard_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def submit_upload(
+    owner: str,
+    writeup_id: int,
+    path: str,
+    filename: str,
+    mode: str,
+    title: str,
+    summary_provided: bool,
+    suggest_tags: bool,
+    old_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Queue processing of a stored upload. ``mode`` is 'create' (the writeup is
+    pending and removed if processing fails) or 'update' (the writeup keeps
+    its current file until processing succeeds). Raises JobQueueFull or
+    UserJobLimitExceeded like scan submission.
+    """
+    params = {
+        "writeup_id": writeup_id,
+        "path": path,
+        "filename": filename,
+        "is_zip": filename.endswith(".zip"),
+        "mode": mode,
+        "title": title,
+        "summary_provided": summary_provided,
+        "suggest_tags": suggest_tags,
+        "old_url": old_url,
+    }
+    return await upload_jobs.submit(owner, KIND, f"writeup:{writeup_id}", params)
+
+
+def upload_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job state with each stage's progress, in the order the stages started"""
+    stages = []
+    for name, duration in (job["timings"] or {}).items():
+        if duration is not None:
+            state = "completed"
+        elif job["status"] in ACTIVE_STATUSES:
+            state = "running"
+        else:
+            state = job["status"]  # failed or cancelled while this stage ran
+        stages.append({"name": name, "status": state, "duration": duration})
+    return {
+        "job_id": job["job_id"],
+        "writeup_id": int(job["target"].split(":", 1)[1]),
+        "status": job["status"],
+        "stages": stages,
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "duration": job["duration"],
+    }
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+async def _run_upload(ctx: ScanJobContext) -> Dict[str, Any]:
+    p = ctx.params
+    created: Dict[str, Any] = {}  # Files and Cloudinary assets this run created
+    try:
+        result = await _process(ctx, p, created)
+    except asyncio.CancelledError:
+        # Shutdown or cancellation: keep the raw file so the job can be resumed
+        # (a resumed run stages under the same names again)
+        raise
+    except Exception:
+        if p["mode"] == "create":
+            await asyncio.to_thread(_discard_writeup, p["writeup_id"])
+        await asyncio.to_thread(_discard_created, p, created, ctx.job_id)
+        await asyncio.to_thread(discard_upload, p["path"])
+        raise
+    await asyncio.to_thread(discard_upload, p["path"])
+    return result
+
+
+async def _gather_all(*aws):
+    """Like gather, but raises only once every awaitable has finished, so no
+    upload is still in flight when a failed job cleans up"""
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+def _replaces_in_place(p: Dict[str, Any]) -> bool:
+    """The new PDF has the old one's public ID, so publishing it overwrites the old one"""
+    old_url = p["old_url"]
+    return bool(old_url) and public_id_from_url(old_url) == pdf_public_id(p["filename"])
+
+
+def _staged_name(job_id: str) -> str:
+    """Temporary Cloudinary name (upload_pdf's filename) of a job's PDF until it is saved"""
+    return f"pending-{job_id}.pdf"
+
+
+async def _process(ctx: ScanJobContext, p: Dict[str, Any], created: Dict[str, Any]) -> Dict[str, Any]:
+    path, filename = p["path"], p["filename"]
+    staged = _staged_name(ctx.job_id)
+
+    async with ctx.stage("virus_scan"):
+        try:
+            data = await asyncio.to_thread(_read, path)
+        except FileNotFoundError:
+            raise ScanJobError("The uploaded file is no longer available; upload it again")
+        clean, reason = await asyncio.to_thread(scan_bytes_for_viruses, data)
+        if not clean:
+            raise ScanJobError(f"Upload blocked by virus scan: {reason}")
+    del data
+
+    fields: Dict[str, Any] = {}
+    suggested: List[str] = []
+    if p["is_zip"]:
+        dir_name = image_dir_name(p["title"])
+        async with ctx.stage("zip_extract"):
+            try:
+                markdown_content, images = await _in_process(
+                    prepare_markdown_upload, path, dir_name, p["mode"] == "create"
+                )
+            except ValueError as e:
+                raise ScanJobError(str(e))
+        async with ctx.stage("save_images"):
+            created["staging_dir"] = os.path.join(INCOMING_DIR, f"{ctx.job_id}-images")
+            await asyncio.to_thread(save_images, INCOMING_DIR, f"{ctx.job_id}-images", images)
+        fields.update(writeup_content=markdown_content, content_type="markdown", writeup_url=None)
+        if not p["summary_provided"]:
+            fields["summary"] = extract_summary_from_markdown(markdown_content)
+        text = markdown_content
+    else:
+        async def analyze():
+            async with ctx.stage("pdf_analysis"):
+                return await _in_process(analyze_pdf, path)
+
+        async def pdf():
+            async with ctx.stage("cloudinary_pdf"):
+                created["writeup_url"] = await asyncio.to_thread(upload_pdf, path, staged)
+
+        async def thumbnail():
+            async with ctx.stage("cloudinary_thumbnail"):
+                thumbnail_url = await asyncio.to_thread(upload_pdf_thumbnail, path, staged)
+                if thumbnail_url:
+                    created["thumbnail_url"] = thumbnail_url
+
+        # The text is always extracted: it also goes into the tag model's corpus
+        (pdf_summary, text), _, _ = await _gather_all(analyze(), pdf(), thumbnail())
+        fields.update(content_type="pdf", writeup_content=None)
+        if not p["summary_provided"]:
+            fields["summary"] = pdf_summary or ""
+
+    if p["suggest_tags"]:
+        async with ctx.stage("tag_suggestion"):
+            suggested = await asyncio.to_thread(tag_model.suggest_tags, text)
+
+    async with ctx.stage("save"):
+        # Swap the staged files in under their final names
+        if p["is_zip"]:
+            writeup_folder = os.path.join(settings.UPLOAD_DIR, dir_name)
+            if await asyncio.to_thread(publish_images, created["staging_dir"], writeup_folder):
+                created["image_dir"] = writeup_folder
+            del created["staging_dir"]
+        else:
+            created["writeup_url"] = await asyncio.to_thread(rename_pdf, staged, filename)
+            created["published"] = True
+            if "thumbnail_url" in created:
+                created["thumbnail_url"] = await asyncio.to_thread(rename_pdf_thumbnail, staged, filename)
+            fields.update(writeup_url=created["writeup_url"], thumbnail_url=created.get("thumbnail_url", ""))
+
+        # New writeups keep the admin's tags and gain the suggestions; a
+        # replaced PDF uploaded without tags takes the suggestions instead
+        saved = await asyncio.to_thread(
+            _save, p["writeup_id"], fields, suggested, p["mode"] == "create", p["mode"] == "update"
+        )
+        if not saved:
+            raise ScanJobError("Writeup was deleted while its upload was processing")
+    await response_cache.invalidate("writeups", f"writeup:{p['writeup_id']}")
+
+    # The old PDF goes only now that the writeup points at the new one
+    old_url = p["old_url"]
+    if not p["is_zip"] and old_url and "cloudinary.com" in old_url and not _replaces_in_place(p):
+        async with ctx.stage("cloudinary_delete"):
+            try:
+                await asyncio.to_thread(delete_pdf_from_cloudinary, old_url)
+            except Exception as e:
+                # The job has succeeded; failing now would discard the new file
+                logger.warning(f"Could not delete replaced PDF {old_url}: {e}")
+    try:
+        await asyncio.to_thread(tag_model.record_writeup, p["writeup_id"], f"{p['title']} {text}")
+    except Exception as e:
+        logger.warning(f"Could not add writeup {p['writeup_id']} to the tag model: {e}")
+
+    return {
+        "writeup_id": p["writeup_id"],
+        "content_type": fields["content_type"],
+        "suggested_tags": suggested,
+    }
+
+
+upload_jobs.register(KIND, _run_upload)
+
+
+# ----------------------------------------------------------------------
+# Blocking helpers (run in worker threads)
+# ----------------------------------------------------------------------
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _save(writeup_id: int, fields: Dict[str, Any], tag_names: List[str], merge_tags: bool, touch: bool) -> bool:
+    db = SessionLocal()
+    try:
+        writeup = db.query(Writeup).filter(Writeup.id == writeup_id).first()
+        if writeup is None:
+            return False
+        for field, value in fields.items():
+            setattr(writeup, field, value)
+
+        if tag_names:
+            suggested = get_or_create_tags(db, tag_names)
+            if merge_tags:
+                current = list(writeup.tags)
+                suggested = current + [tag for tag in suggested if tag not in current]
+            writeup.tags = suggested
+
+        writeup.processing_status = "ready"
+        if touch:
+            # Track edits, as the synchronous update does
+            writeup.updated_at = datetime.now()
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def _discard_created(p: Dict[str, Any], created: Dict[str, Any], job_id: str) -> None:
+    """Remove the files and Cloudinary assets a failed run created; nothing refers to them."""
+    for folder in (created.get("staging_dir"), created.get("image_dir")):
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+    if created.get("published") and _replaces_in_place(p):
+        # Published over the writeup's current file: deleting would break it
+        return
+    if "writeup_url" in created:
+        delete_pdf_from_cloudinary(created["writeup_url"])  # removes the thumbnail copy too
+    elif "thumbnail_url" in created:
+        delete_pdf_thumbnail(p["filename"] if created.get("published") else _staged_name(job_id))
+
+
+def _discard_writeup(writeup_id: int) -> None:
+    """Remove a pending writeup whose first upload failed; it was never public."""
+    db = SessionLocal()
+    try:
+        writeup = db.query(Writeup).filter(
+            Writeup.id == writeup_id, Writeup.processing_status == "processing"
+        ).first()
+        if writeup is not None:
+            db.delete(writeup)
+            db.commit()
+    except Exception as e:
+        logger.error(f"Could not remove pending writeup {writeup_id}: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+"""
+Background warm-up of lazily imported dependencies.
+
+scikit-learn (tag suggestion), google-generativeai and the Cloudinary SDK are
+imported on first use rather than at startup, so a cold instance answers
+/health as soon as the framework is up. Shortly after startup this task loads
+them in a worker thread, so the first upload or AI request doesn't pay for
+the imports either.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+
+
+def _steps() -> List[Tuple[str, Callable[[], object]]]:
+    from app.utils import tag_model
+    from app.utils.ai_generator import ai_generator
+    from app.utils.cloudinary_handler import get_cloudinary
+
+    steps = [
+        ("scikit-learn", lambda: tag_model.tokenize("")),
+        ("tag model", tag_model.get_tag_model),
+        ("cloudinary", get_cloudinary),
+    ]
+    if settings.AI_GENERATION_ENABLED and settings.GEMINI_API_KEY:
+        steps.append(("google-generativeai", lambda: ai_generator.model))
+    return steps
+
+
+async def _run() -> None:
+    await asyncio.sleep(settings.WARMUP_DELAY)
+    for name, step in _steps():
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(step)
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {e}")
+            continue
+        logger.info(f"Warm-up: {name} loaded in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+def start() -> None:
+    global _task
+    if settings.WARMUP_ENABLED and _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,83 @@
+"""
+Ranked full-text search over writeups.
+
+On Postgres, ``writeups.search_vector`` holds a weighted tsvector - title (A),
+tags (B), summary (C), markdown content (D) - kept current by triggers and
+indexed with GIN (see the ``add_writeup_search`` migration). Queries use
+``websearch_to_tsquery`` syntax (quoted phrases, ``or``, ``-exclude``),
+results are ordered by ``ts_rank`` and each carries a highlighted snippet.
+Other databases fall back to unranked ILIKE matching.
+"""
+import html
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models.writeup import SUMMARY_COLUMNS, Writeup
+
+# ts_headline marks matches with these; they are swapped for <mark> after the
+# rest of the snippet has been HTML-escaped
+_START, _STOP = "⟦", "⟧"
+HEADLINE_OPTIONS = f'StartSel={_START}, StopSel={_STOP}, MaxFragments=2, MaxWords=30, MinWords=12, FragmentDelimiter=" … "'
+
+SearchHit = Tuple[Writeup, Optional[float], Optional[str]]
+
+
+def _snippet(headline: Optional[str]) -> Optional[str]:
+    if not headline:
+        return None
+    text = " ".join(headline.split())
+    return html.escape(text).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+async def search_writeups(db: AsyncSession, query: str, skip: int = 0, limit: int = 50) -> Tuple[List[SearchHit], int]:
+    """Return (page of (writeup, rank, snippet), total matches)."""
+    ready = Writeup.processing_status == "ready"  # uploads still processing are not public yet
+    if db.get_bind().dialect.name != "postgresql":
+        condition = and_(ready, or_(
+            Writeup.title.ilike(f"%{query}%"),
+            Writeup.summary.ilike(f"%{query}%"),
+            Writeup.category.ilike(f"%{query}%"),
+            Writeup.writeup_content.ilike(f"%{query}%"),
+        ))
+        total = await db.scalar(select(func.count(Writeup.id)).where(condition))
+        items = (await db.scalars(
+            select(Writeup)
+            .options(load_only(*SUMMARY_COLUMNS, raiseload=True), selectinload(Writeup.tags))
+            .where(condition)
+            .order_by(Writeup.created_at.desc()).offset(skip).limit(limit)
+        )).all()
+        return [(writeup, None, None) for writeup in items], total
+
+    tsquery = func.websearch_to_tsquery("english", query)
+    vector = literal_column("writeups.search_vector")
+    match = and_(vector.op("@@")(tsquery), ready)
+
+    total = await db.scalar(select(func.count()).select_from(Writeup).where(match))
+    if not total:
+        return [], 0
+
+    # Rank and page on the index first, so ts_headline (which re-parses the
+    # document) only runs for the rows actually returned
+    rank = func.ts_rank(vector, tsquery)
+    page = (
+        select(Writeup.id, rank.label("rank"))
+        .where(match)
+        .order_by(rank.desc(), Writeup.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+    # The default parser treats "<...>" as HTML tags and stops highlighting
+    # after inline HTML in markdown, so angle brackets are swapped out first
+    document = func.translate(func.concat_ws(" … ", Writeup.summary, Writeup.writeup_content), "<>", "‹›")
+    headline = func.ts_headline("english", document, tsquery, HEADLINE_OPTIONS)
+    rows = (await db.execute(
+        select(Writeup, page.c.rank, headline)
+        .join(page, page.c.id == Writeup.id)
+        .options(load_only(*SUMMARY_COLUMNS, raiseload=True), selectinload(Writeup.tags))
+        .order_by(page.c.rank.desc(), Writeup.id.desc())
+    )).all()
+    return [(writeup, round(float(score), 4), _snippet(text)) for writeup, score, text in rows], total
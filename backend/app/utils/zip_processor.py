@@ -1,10 +1,11 @@
 import zipfile
 import os
+import re
 import tempfile
-from typing import Tuple, Optional, List
+from typing import Dict, Tuple, Optional
 import shutil
 
-async def extract_and_process_zip(file_content: bytes) -> Tuple[str, List[bytes], dict]:
+def extract_and_process_zip(file_content: bytes) -> Tuple[str, Dict[str, bytes], dict]:
     """
     Extract zip file containing markdown and images.
     
@@ -93,3 +94,78 @@ def validate_readme_structure(readme_content: str) -> Tuple[bool, Optional[str]]
         return False, "README.md content is too short (minimum 50 characters)"
     
     return True, None
+
+
+def extract_summary_from_markdown(content: str, max_length: int = 200) -> str:
+    """Extract first non-heading paragraph from markdown as summary"""
+    lines = content.split('\n')
+    for line in lines:
+        # Skip empty lines and headings
+        line = line.strip()
+        if line and not line.startswith('#'):
+            # Remove markdown formatting
+            text = re.sub(r'[*_`\[\]()]', '', line)
+            return text[:max_length]
+    return ""
+
+
+def image_dir_name(title: str) -> str:
+    """Folder under UPLOAD_DIR (and /uploads/writeups/) for a writeup's images"""
+    safe_title = "".join(c if c.isalnum() or c in (' ', '_') else '_' for c in title)
+    return safe_title.replace(' ', '_')
+
+
+def prepare_markdown_upload(zip_path: str, dir_name: str, validate: bool = True) -> Tuple[str, Dict[str, bytes]]:
+    """
+    Extract a ZIP upload from disk and point its image references at
+    /uploads/writeups/{dir_name}/. Runs in the upload process pool.
+
+    Returns (markdown_content, images by relative path); raises ValueError
+    for a bad archive or, with ``validate``, an unusable README.
+    """
+    with open(zip_path, "rb") as f:
+        markdown_content, images, _ = extract_and_process_zip(f.read())
+
+    if validate:
+        valid, error = validate_readme_structure(markdown_content)
+        if not valid:
+            raise ValueError(f"Invalid README: {error}")
+
+    for img_path in images.keys():
+        # Convert backslashes to forward slashes for URLs
+        url_path = img_path.replace('\\', '/')
+        # Store plain path without encoding - frontend will handle URL encoding
+        markdown_content = markdown_content.replace(img_path, f"/uploads/writeups/{dir_name}/{url_path}")
+        # Also handle forward slash versions (same path on POSIX; replacing
+        # it twice would prefix the URL twice)
+        if url_path != img_path:
+            markdown_content = markdown_content.replace(url_path, f"/uploads/writeups/{dir_name}/{url_path}")
+
+    return markdown_content, images
+
+
+def save_images(upload_dir: str, dir_name: str, images: Dict[str, bytes]) -> None:
+    """Write extracted images under upload_dir/dir_name, preserving the ZIP's structure"""
+    writeup_folder = os.path.join(upload_dir, dir_name)
+    os.makedirs(writeup_folder, exist_ok=True)
+    for img_path, img_content in images.items():
+        full_img_path = os.path.join(writeup_folder, img_path)
+        os.makedirs(os.path.dirname(full_img_path), exist_ok=True)
+        with open(full_img_path, "wb") as img_file:
+            img_file.write(img_content)
+
+
+def publish_images(staging_folder: str, writeup_folder: str) -> bool:
+    """
+    Move images written by save_images from staging_folder into
+    writeup_folder, replacing files with the same path. Returns whether
+    writeup_folder was created by this call.
+    """
+    created = not os.path.isdir(writeup_folder)
+    for root, _, files in os.walk(staging_folder):
+        dest = os.path.normpath(os.path.join(writeup_folder, os.path.relpath(root, staging_folder)))
+        os.makedirs(dest, exist_ok=True)
+        for name in files:
+            os.replace(os.path.join(root, name), os.path.join(dest, name))
+    shutil.rmtree(staging_folder, ignore_errors=True)
+    return created
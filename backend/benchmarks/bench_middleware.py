@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark: BaseHTTPMiddleware vs pure ASGI middleware.
+
+Builds the same app twice - /health plus the writeups router, behind CORS,
+rate limit and security header middleware - once with the previous
+``BaseHTTPMiddleware`` implementations (reproduced below) and once with
+``app.core.middleware``. Requests are driven in-process through
+``httpx.ASGITransport`` so the numbers reflect framework and middleware cost,
+not sockets. The writeups list reads from a throwaway SQLite database seeded
+with --writeups rows.
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests 1000] [--concurrency 20] [--writeups 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import AsyncAdaptedQueuePool  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.api import writeups  # noqa: E402
+from app.core import middleware  # noqa: E402
+from app.core.database import Base, get_async_db  # noqa: E402
+from app.models.writeup import Writeup, Tag, Platform, Difficulty  # noqa: E402
+from app.utils.rate_limit import RateLimiter  # noqa: E402
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in middleware.SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, rate_limit: int = 5, window: int = 60):
+        super().__init__(app)
+        self.limiter = RateLimiter("bench-login", rate_limit, window)
+
+    async def dispatch(self, request: Request, call_next):
+        if not request.url.path.startswith("/api/auth/login"):
+            return await call_next(request)
+        allowed, _ = await self.limiter.hit(request.client.host)
+        if not allowed:
+            raise HTTPException(status_code=429, detail="Too many requests. Please try again later.")
+        return await call_next(request)
+
+
+def _session_factory(path: str, rows: int, concurrency: int) -> async_sessionmaker:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        tags = [Tag(name=name) for name in ("web", "linux", "privesc", "ad", "crypto")]
+        for i in range(rows):
+            db.add(Writeup(
+                title=f"Machine {i}",
+                platform=Platform.HACK_THE_BOX,
+                difficulty=Difficulty.MEDIUM,
+                category="Web",
+                date="2024-01-01",
+                time_spent="2h",
+                summary="Benchmark writeup " * 10,
+                tags=tags[: 1 + i % len(tags)],
+            ))
+        db.commit()
+    engine.dispose()
+
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=concurrency,
+        max_overflow=concurrency,
+    )
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def build_app(kind: str, factory: async_sessionmaker) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    async def bench_db():
+        async with factory() as db:
+            yield db
+
+    app.include_router(writeups.router, prefix="/api/writeups")
+    app.dependency_overrides[get_async_db] = bench_db
+
+    if kind == "legacy":
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware)
+    else:
+        app.add_middleware(middleware.SecurityHeadersMiddleware)
+        app.add_middleware(middleware.RateLimitMiddleware)
+    app.add_middleware(CORSMiddleware, allow_origins=["http://localhost:5173"])
+    return app
+
+
+async def _load(app: FastAPI, path: str, total: int, concurrency: int) -> tuple:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # warm up
+            (await client.get(path)).raise_for_status()
+
+        remaining = iter(range(total))
+
+        async def worker() -> None:
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200 or "x-frame-options" not in response.headers:
+                    raise RuntimeError(f"{path}: unexpected response {response.status_code}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return total / elapsed, statistics.median(latencies), p99
+
+
+async def _run(apps: dict, factory: async_sessionmaker, total: int, concurrency: int) -> None:
+    # One event loop for every run: pooled aiosqlite connections belong to it
+    print(f"{'endpoint':<18}{'middleware':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for path in ("/health", "/api/writeups/"):
+        results = {}
+        for kind, app in apps.items():
+            results[kind] = await _load(app, path, total, concurrency)
+            rps, p50, p99 = results[kind]
+            label = "BaseHTTP" if kind == "legacy" else "ASGI"
+            print(f"{path:<18}{label:<12}{rps:>10.0f}{p50 * 1000:>10.2f}{p99 * 1000:>10.2f}")
+        print(f"{'':<18}{'speedup':<12}{results['asgi'][0] / results['legacy'][0]:>9.2f}x"
+              f"{'':>10}{results['legacy'][2] / results['asgi'][2]:>9.2f}x\n")
+    await factory.kw["bind"].dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint and variant")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent in-flight requests")
+    parser.add_argument("--writeups", type=int, default=20, help="Rows seeded into the writeups table")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = _session_factory(os.path.join(tmp, "bench.db"), args.writeups, args.concurrency)
+        apps = {kind: build_app(kind, factory) for kind in ("legacy", "asgi")}
+
+        print(f"{args.requests} requests per run, concurrency {args.concurrency}\n")
+        asyncio.run(_run(apps, factory, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF upload analysis, per-helper parsing vs one PdfAnalysis.
+
+Builds synthetic writeup PDFs of a few megabytes (--pages pages of walkthrough
+text, each with an embedded --image-kb screenshot-sized image) and times the
+analysis create_writeup runs on them:
+
+- ``legacy``: the previous flow - write the upload to a temp file, read the
+  info dictionary with PyPDF2, then extract_metadata_from_pdf,
+  extract_text_and_summary and suggest_tags each opening the file with
+  pdfplumber (three opens, since the metadata helper also extracted the summary)
+- ``single``: ``PdfAnalysis`` over the in-memory bytes - one pdfplumber open
+  limited to the pages that are read, metadata, summary and tags from it
+
+Parser opens are counted by wrapping ``pdfplumber.open`` and
+``PyPDF2.PdfReader``. PyPDF2 is no longer a dependency; without it the legacy
+flow skips that step (and is slightly faster than it really was).
+
+Usage:
+    python benchmarks/bench_pdf_analysis.py [--pages 40] [--image-kb 100] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber  # noqa: E402
+
+from app.utils import pdf_processor  # noqa: E402
+from app.utils.pdf_processor import TEXT_PAGES, PdfAnalysis  # noqa: E402
+from app.utils.tag_model import TagModel, suggest_tags  # noqa: E402
+
+try:
+    import PyPDF2
+except ImportError:  # dropped from requirements.txt along with the legacy flow
+    PyPDF2 = None
+
+WORDS = ["enumeration", "nmap", "gobuster", "reverse", "shell", "privilege", "escalation", "sudo", "suid",
+         "cron", "docker", "linux", "web", "exploit", "payload", "listener", "credentials", "database",
+         "service", "version", "vulnerable", "port", "directory", "upload", "filter", "bypass", "hash"]
+
+opens = {"pdfplumber": 0, "PyPDF2": 0}
+MODEL = TagModel()  # empty corpus: the parsing is what is compared here
+
+
+def _count(name, fn):
+    def wrapper(*args, **kwargs):
+        opens[name] += 1
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+pdfplumber.open = _count("pdfplumber", pdfplumber.open)
+if PyPDF2 is not None:
+    PyPDF2.PdfReader = _count("PyPDF2", PyPDF2.PdfReader)
+
+
+def build_pdf(pages: int, image_kb: int, seed: int = 7) -> bytes:
+    """A minimal multi-page PDF: text lines plus one incompressible image per page."""
+    rng = random.Random(seed)
+    side = int((image_kb * 1024 / 3) ** 0.5)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Title (Synthetic Box Writeup) /Author (bench) /Subject (CTF walkthrough) >>",
+    ]
+    page_ids = []
+    for number in range(1, pages + 1):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(45)]
+        text = "".join(f"({line}) Tj T* " for line in lines)
+        content = f"BT /F1 9 Tf 11 TL 40 800 Td (Step {number}) Tj T* {text}ET q 200 0 0 150 300 40 cm /Im1 Do Q"
+        stream = zlib.compress(content.encode())
+        image = rng.randbytes(side * side * 3)
+        objects.append(
+            f"<< /Type /XObject /Subtype /Image /Width {side} /Height {side} /ColorSpace /DeviceRGB "
+            f"/BitsPerComponent 8 /Length {len(image)} >>\nstream\n".encode() + image + b"\nendstream"
+        )
+        image_id = len(objects)
+        objects.append(f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {content_id} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 {image_id} 0 R >> >> >>".encode()
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 4 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _legacy_text(path: str) -> str:
+    with pdfplumber.open(path) as pdf:
+        return pdf_processor._clean_text("".join(page.extract_text() or "" for page in pdf.pages[:TEXT_PAGES]))
+
+
+def legacy(data: bytes, directory: str) -> tuple:
+    path = os.path.join(directory, "temp_upload.pdf")
+    with open(path, "wb") as buffer:
+        buffer.write(data)
+    if PyPDF2 is not None:
+        with open(path, "rb") as file:
+            PyPDF2.PdfReader(file).metadata
+    _legacy_text(path)  # extract_metadata_from_pdf's summary
+    summary = _legacy_text(path)[:600].strip()  # extract_text_and_summary
+    tags = suggest_tags(_legacy_text(path), model=MODEL)  # suggest_tags; same scoring on the text
+    os.remove(path)
+    return summary, tags
+
+
+def single(data: bytes, directory: str) -> tuple:
+    with PdfAnalysis(data) as analysis:
+        analysis.metadata
+        return analysis.summary, suggest_tags(analysis.text, model=MODEL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 40, 120], help="Page counts to test")
+    parser.add_argument("--image-kb", type=int, default=100, help="Embedded image size per page")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per document and method")
+    args = parser.parse_args()
+
+    print(f"{'pages':>6}{'size MB':>9}{'method':>8}{'pdfplumber':>12}{'PyPDF2':>8}{'p50 ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            data = build_pdf(pages, args.image_kb)
+            results = {}
+            for name, fn in (("legacy", legacy), ("single", single)):
+                results[name] = fn(data, tmp)  # warm up
+                for key in opens:
+                    opens[key] = 0
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    fn(data, tmp)
+                    timings.append(time.perf_counter() - start)
+                p50 = statistics.median(timings)
+                print(f"{pages:>6}{len(data) / 1e6:>9.1f}{name:>8}{opens['pdfplumber'] / args.repeat:>12.0f}"
+                      f"{opens['PyPDF2'] / args.repeat:>8.0f}{p50 * 1000:>10.1f}")
+            if results["legacy"] != results["single"]:
+                print("  MISMATCH between legacy and single-pass results")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential blocking port checks vs the asyncio port scanner.
+
+Spins up a local target on 127.0.0.1 with a mix of
+  - open ports (listening sockets that accept),
+  - closed ports (nothing bound, the kernel answers RST),
+  - black-holed ports (listener whose accept queue is full, so SYNs are dropped
+    and the connect attempt hangs until the deadline, like a filtered port).
+
+Usage:
+    python benchmarks/bench_port_scan.py [--open 5] [--closed 6] [--blackholed 6] [--timeout 1.5]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.port_scanner import scan_ports  # noqa: E402
+
+
+def _listener(backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(backlog)
+    return sock
+
+
+def _free_port() -> int:
+    sock = _listener(1)
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _blackhole() -> tuple:
+    """Listener with a zero backlog whose queue is pre-filled with never-accepted connections."""
+    sock = _listener(0)
+    port = sock.getsockname()[1]
+    fillers = []
+    for _ in range(4):
+        filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        filler.setblocking(False)
+        filler.connect_ex(("127.0.0.1", port))
+        fillers.append(filler)
+    time.sleep(0.2)
+    return sock, port, fillers
+
+
+def _sequential_check(host: str, port: int, timeout: float) -> str:
+    """The original blocking implementation: one socket at a time."""
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        result = sock.connect_ex((host, port))
+        sock.close()
+        return "open" if result == 0 else "closed"
+    except Exception:
+        return "filtered"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--open", type=int, default=5)
+    parser.add_argument("--closed", type=int, default=6)
+    parser.add_argument("--blackholed", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=1.5)
+    args = parser.parse_args()
+
+    keep_alive = []
+    expected = {}
+
+    for _ in range(args.open):
+        sock = _listener(128)
+        keep_alive.append(sock)
+        expected[sock.getsockname()[1]] = "open"
+    for _ in range(args.closed):
+        expected[_free_port()] = "closed"
+    for _ in range(args.blackholed):
+        sock, port, fillers = _blackhole()
+        keep_alive.append(sock)
+        keep_alive.extend(fillers)
+        expected[port] = "filtered"
+
+    ports = list(expected)
+    print(f"Target 127.0.0.1: {args.open} open, {args.closed} closed, "
+          f"{args.blackholed} black-holed ports, timeout={args.timeout}s")
+
+    start = time.perf_counter()
+    sequential = {port: _sequential_check("127.0.0.1", port, args.timeout) for port in ports}
+    sequential_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = {r["port"]: r["state"] for r in asyncio.run(scan_ports("127.0.0.1", ports, timeout=args.timeout))}
+    concurrent_elapsed = time.perf_counter() - start
+
+    mismatches = {p: (expected[p], concurrent[p]) for p in ports if concurrent[p] != expected[p]}
+
+    print(f"  sequential (blocking): {sequential_elapsed:6.2f}s")
+    print(f"  asyncio scan_ports:    {concurrent_elapsed:6.2f}s")
+    print(f"  speedup:               {sequential_elapsed / concurrent_elapsed:6.1f}x")
+    print(f"  sequential states:     {sorted(set(sequential.values()))}")
+    if mismatches:
+        print(f"  unexpected states (expected, got): {mismatches}")
+        sys.exit(1)
+    print("  all port states classified as expected")
+
+    for sock in keep_alive:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
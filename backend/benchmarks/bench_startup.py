@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start, time from process launch to the first 200 on /health.
+
+Starts ``uvicorn main:app`` in a fresh interpreter --repeat times and polls
+/health every 10 ms until it answers. Two variants:
+
+- ``lazy``: the app as it is - heavy dependencies load on first use or in the
+  background warm-up after startup
+- ``eager``: the same, but importing the dependencies that used to load at
+  import time (scikit-learn, google-generativeai, pdfplumber, Cloudinary,
+  nltk) before the app, as it did before they were made lazy
+
+With --max-seconds the script exits 1 if the lazy p50 is slower, so it can
+guard against an import creeping back onto the startup path. Needs the
+usual environment (DATABASE_URL etc.): startup recovers queued jobs.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--max-seconds 3]
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER_MODULES = [
+    "sklearn.feature_extraction.text",
+    "google.generativeai",
+    "pdfplumber",
+    "cloudinary.uploader",
+    "nltk",
+]
+
+RUNNER = """
+import importlib, sys, uvicorn
+for name in sys.argv[2:]:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+uvicorn.run("main:app", host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _healthy(port: int) -> bool:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        conn.request("GET", "/health")
+        return conn.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        conn.close()
+
+
+def time_to_health(modules, timeout: float) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", RUNNER, str(port), *modules],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("server exited during startup; check DATABASE_URL and the other settings")
+            if _healthy(port):
+                return time.perf_counter() - start
+            time.sleep(0.01)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts per variant")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Give up on a start after this many seconds")
+    parser.add_argument("--max-seconds", type=float, help="Fail if the lazy p50 exceeds this")
+    parser.add_argument("--lazy-only", action="store_true", help="Skip the eager comparison")
+    args = parser.parse_args()
+
+    variants = [("lazy", [])] if args.lazy_only else [("lazy", []), ("eager", EAGER_MODULES)]
+    p50 = {}
+    print(f"{'variant':>8}{'p50 s':>9}{'min s':>9}{'max s':>9}")
+    for name, modules in variants:
+        timings = [time_to_health(modules, args.timeout) for _ in range(args.repeat)]
+        p50[name] = statistics.median(timings)
+        print(f"{name:>8}{p50[name]:>9.2f}{min(timings):>9.2f}{max(timings):>9.2f}")
+
+    if args.max_seconds is not None and p50["lazy"] > args.max_seconds:
+        print(f"FAIL: time to first /health {p50['lazy']:.2f}s exceeds {args.max_seconds:.2f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
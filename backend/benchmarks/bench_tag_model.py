@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tag suggestion, per-document TfidfVectorizer vs the corpus TagModel.
+
+Builds a synthetic corpus of --docs writeups: common walkthrough words shared
+by every document (Zipf-distributed) plus a few topic words per document, the
+kind of terms a tag should name. Then, for new --words-word documents, times:
+
+- ``legacy``: the previous suggest_tags TF-IDF step - fit a fresh
+  TfidfVectorizer(max_features=50) on the one document and take its first
+  terms (alphabetical, since every term has the same IDF)
+- ``model``: ``TagModel.top_terms`` against the corpus statistics
+
+and how often each method's suggestions include the document's topic words.
+Fitting, incremental ``add``, and save/load of the model file are timed too.
+
+Usage:
+    python benchmarks/bench_tag_model.py [--docs 2000] [--words 3000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+from app.utils.tag_model import TagModel  # noqa: E402
+
+SUGGESTED = 5
+
+
+def _word(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(length))
+
+
+class Corpus:
+    def __init__(self, seed: int = 11):
+        self.rng = random.Random(seed)
+        self.common = [_word(self.rng, self.rng.randint(4, 9)) for _ in range(3000)]
+        self.weights = [1.0 / (rank + 1) for rank in range(len(self.common))]
+        self.topics = [_word(self.rng, self.rng.randint(5, 10)) for _ in range(400)]
+
+    def document(self, words: int):
+        topics = self.rng.sample(self.topics, 3)
+        tokens = self.rng.choices(self.common, weights=self.weights, k=words)
+        for topic in topics:
+            for _ in range(self.rng.randint(4, 12)):
+                tokens.insert(self.rng.randrange(len(tokens)), topic)
+        return " ".join(tokens), topics
+
+
+def legacy_terms(text: str) -> list:
+    vectorizer = TfidfVectorizer(max_features=50, stop_words="english")
+    vectorizer.fit_transform([text])
+    return list(vectorizer.get_feature_names_out()[:SUGGESTED])
+
+
+def p50_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000, help="Corpus size")
+    parser.add_argument("--words", type=int, default=3000, help="Words per document (about five PDF pages)")
+    parser.add_argument("--repeat", type=int, default=50, help="New documents scored per method")
+    args = parser.parse_args()
+
+    corpus = Corpus()
+    documents = [corpus.document(args.words)[0] for _ in range(args.docs)]
+    model = TagModel()
+    start = time.perf_counter()
+    for doc_id, text in enumerate(documents):
+        model.add(doc_id, text)
+    fit = time.perf_counter() - start
+    print(f"fit: {args.docs} documents, {len(model.terms)} terms in {fit:.2f}s")
+
+    new = [corpus.document(args.words) for _ in range(args.repeat)]
+    for name, fn in (("legacy", legacy_terms), ("model", lambda text: model.top_terms(text, SUGGESTED))):
+        hits = sum(len(set(fn(text)) & set(topics)) for text, topics in new)
+        texts = iter(new * 2)
+        ms = p50_ms(lambda: fn(next(texts)[0]), args.repeat)
+        print(f"{name:>7}: p50 {ms:7.2f} ms per document, topic words suggested {hits}/{3 * len(new)}")
+
+    texts = iter(new)
+    ids = iter(range(args.docs, args.docs + len(new)))
+    print(f"    add: p50 {p50_ms(lambda: model.add(next(ids), next(texts)[0]), len(new)):7.2f} ms per document")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tag_model.npz")
+        save = p50_ms(lambda: model.save(path), 5)
+        load = p50_ms(lambda: TagModel.load(path), 5)
+        print(f"   file: {os.path.getsize(path) / 1e6:.1f} MB, save p50 {save:.0f} ms, load p50 {load:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resolving a writeup's tag names to Tag rows.
+
+- ``legacy``: the previous endpoint loop - one SELECT per name, and an INSERT
+  (flushed on the next SELECT) for each missing one
+- ``bulk``: ``get_or_create_tags`` - one SELECT ... IN and one
+  INSERT ... ON CONFLICT DO NOTHING RETURNING for the missing names
+
+For each --tags count, half the names already exist. Statements are counted
+with a cursor event; --latency-ms adds a sleep per statement to stand in for
+the network round-trip to a hosted database. Rows are created under a unique
+prefix and removed afterwards.
+
+Usage:
+    python benchmarks/bench_tag_upsert.py --database-url postgresql://... [--tags 5 20 50] [--latency-ms 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.models.writeup import Tag  # noqa: E402
+from app.utils.tag_repository import get_or_create_tags  # noqa: E402
+
+
+def legacy(db: Session, names):
+    tag_objects = []
+    for tag_name in names:
+        tag = db.query(Tag).filter(Tag.name == tag_name).first()
+        if not tag:
+            tag = Tag(name=tag_name)
+            db.add(tag)
+        tag_objects.append(tag)
+    db.flush()
+    return tag_objects
+
+
+def bulk(db: Session, names):
+    return get_or_create_tags(db, names)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Database with the tags table")
+    parser.add_argument("--tags", type=int, nargs="+", default=[5, 20, 50], help="Tag counts to test")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Simulated round-trip per statement")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per count and method")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*_):
+        statements[0] += 1
+        time.sleep(args.latency_ms / 1000)
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    print(f"{'tags':>5}{'method':>8}{'statements':>12}{'p50 ms':>10}")
+    try:
+        for n in args.tags:
+            with Session(engine) as db:
+                get_or_create_tags(db, [f"{prefix}-{n}-existing-{i}" for i in range(n // 2)])
+                db.commit()
+            for name, fn in (("legacy", legacy), ("bulk", bulk)):
+                timings, counts = [], []
+                for run in range(args.repeat):
+                    names = [f"{prefix}-{n}-existing-{i}" for i in range(n // 2)]
+                    names += [f"{prefix}-{n}-{name}-{run}-new-{i}" for i in range(n - n // 2)]
+                    with Session(engine) as db:
+                        statements[0] = 0
+                        start = time.perf_counter()
+                        fn(db, names)
+                        timings.append(time.perf_counter() - start)
+                        counts.append(statements[0])
+                        db.commit()
+                print(f"{n:>5}{name:>8}{statistics.median(counts):>12.0f}{statistics.median(timings) * 1000:>10.1f}")
+    finally:
+        with Session(engine) as db:
+            db.query(Tag).filter(Tag.name.like(f"{prefix}-%")).delete(synchronize_session=False)
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: TLS protocol/cipher enumeration, one probe at a time vs all at once.
+
+Starts local ``ssl`` servers on 127.0.0.1 with different protocol and cipher
+configurations (self-signed certificate generated on the fly). Each server
+waits --latency seconds before answering a handshake to simulate a network
+round trip, so sequential enumeration costs one RTT per probe while the
+concurrent engine should finish in about one RTT per server.
+
+Usage:
+    python benchmarks/bench_tls_enum.py [--latency 0.1]
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+from app.utils.tls_scanner import enumerate_tls, PROTOCOLS, CIPHER_FAMILIES  # noqa: E402
+
+VERSIONS = dict(PROTOCOLS)
+
+SERVERS = {
+    "modern (TLS 1.2-1.3, AEAD only)": ("TLSv1.2", "TLSv1.3", "ECDHE+AESGCM:ECDHE+CHACHA20"),
+    "legacy (TLS 1.0-1.3, everything)": ("TLSv1", "TLSv1.3", "ALL:COMPLEMENTOFALL"),
+    "tls12-cbc (TLS 1.2 only, CBC/RSA)": ("TLSv1.2", "TLSv1.2", "AES:!AESGCM:!AESCCM:!aNULL"),
+}
+
+
+def _self_signed(directory: str) -> tuple:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+def _start_server(cert: str, key: str, min_version: str, max_version: str, ciphers: str, latency: float) -> int:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        context.minimum_version = VERSIONS[min_version]
+        context.maximum_version = VERSIONS[max_version]
+    context.set_ciphers(f"{ciphers}:@SECLEVEL=0")
+    context.load_cert_chain(cert, key)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(64)
+
+    def handle(conn: socket.socket) -> None:
+        time.sleep(latency)  # simulated network round trip
+        try:
+            with context.wrap_socket(conn, server_side=True) as tls:
+                tls.recv(1)
+        except (ssl.SSLError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def serve() -> None:
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+async def _enumerate(port: int, concurrency: int, timeout: float) -> tuple:
+    start = time.perf_counter()
+    result = await enumerate_tls("localhost", port, timeout=timeout, concurrency=concurrency)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1, help="Simulated RTT per handshake (seconds)")
+    args = parser.parse_args()
+
+    probes = len(PROTOCOLS) + len(CIPHER_FAMILIES)
+    print(f"{probes} probes per server, simulated RTT {args.latency * 1000:.0f}ms\n")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _self_signed(tmp)
+        for label, (min_version, max_version, ciphers) in SERVERS.items():
+            port = _start_server(cert, key, min_version, max_version, ciphers, args.latency)
+            sequential, sequential_elapsed = asyncio.run(_enumerate(port, 1, 60.0))
+            concurrent, concurrent_elapsed = asyncio.run(_enumerate(port, 16, 5.0))
+
+            expected = [name for name, _ in PROTOCOLS
+                        if VERSIONS[min_version] <= VERSIONS[name] <= VERSIONS[max_version]]
+            matches = (concurrent["supported_protocols"] == expected
+                       and sequential["supported_protocols"] == concurrent["supported_protocols"]
+                       and sequential["weak_ciphers"] == concurrent["weak_ciphers"])
+            failed = failed or not matches
+
+            print(label)
+            print(f"  sequential: {sequential_elapsed:6.2f}s   concurrent: {concurrent_elapsed:6.2f}s   "
+                  f"speedup: {sequential_elapsed / concurrent_elapsed:5.1f}x")
+            print(f"  protocols:  {', '.join(concurrent['supported_protocols'])}"
+                  f"{'' if matches else f'   MISMATCH (expected {expected})'}")
+            accepted = [f for f, r in concurrent["cipher_families"].items() if r["supported"]]
+            untestable = [f for f, r in concurrent["cipher_families"].items() if r["supported"] is None]
+            print(f"  ciphers:    {', '.join(accepted) or 'none'}")
+            if untestable:
+                print(f"  untestable: {', '.join(untestable)}")
+            print()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
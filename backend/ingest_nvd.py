@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Load NVD CVE JSON feeds into the local CVE store used by /api/scanner/cve/search.
+
+Accepts NVD JSON 2.0 feeds (nvdcve-2.0-<year>.json.gz, nvdcve-2.0-modified.json.gz)
+and legacy 1.1 feeds, as .json, .json.gz or .json.zip files or directories of them.
+Records are upserted by CVE id and only rewritten when their lastModified date moved
+forward, so the "modified" feed can be applied on a schedule for incremental updates.
+
+Usage:
+    python ingest_nvd.py feeds/                              # initial load of every feed in a directory
+    python ingest_nvd.py feeds/nvdcve-2.0-modified.json.gz   # incremental update
+
+Feeds: https://nvd.nist.gov/vuln/data-feeds
+Set CVE_DATABASE_URL to keep the store outside the application database.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import cve_store  # noqa: E402
+
+FEED_SUFFIXES = (".json", ".gz", ".zip")
+
+
+def _feed_files(paths):
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            # Year feeds sort before "modified"/"recent", so updates apply last
+            files.extend(sorted(p for p in path.iterdir() if p.suffix in FEED_SUFFIXES))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"✗ Feed not found: {path}")
+            sys.exit(1)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("feeds", nargs="+", help="Feed files or directories")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    files = _feed_files(args.feeds)
+    cve_store.ensure_schema()
+    db = cve_store.get_session()
+    total_seen = total_written = 0
+    try:
+        for path in files:
+            start = time.perf_counter()
+            records = cve_store.parse_feed(cve_store.load_feed_file(path))
+            seen, written = cve_store.upsert_cves(db, records, batch_size=args.batch_size)
+            total_seen += seen
+            total_written += written
+            print(f"✓ {path.name}: {seen} records, {written} inserted/updated ({time.perf_counter() - start:.1f}s)")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Ingestion failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"\nDone: {total_seen} records read, {total_written} written from {len(files)} feed(s)")
+
+
+if __name__ == "__main__":
+    main()
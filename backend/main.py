@@ -1,14 +1,20 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
-from collections import defaultdict
-from time import time
 import os
 
 from app.api import auth, writeups, comments, scanner, contact, newsletter
 from app.core.config import settings
+from app.core.middleware import SecurityHeadersMiddleware, RateLimitMiddleware, MetricsMiddleware, LoopMonitorMiddleware
+from app.utils.http_client import start_http_client, close_http_client
+from app.utils.scan_jobs import scan_jobs
+from app.utils import upload_pipeline, warmup
+from app.utils.rate_limit import close_store
+from app.utils.response_cache import close_version_store
+from app.utils.metrics import render_metrics
+from app.utils.loop_monitor import loop_monitor
+from app.core.database import dispose_async_engine
 
 # Load environment variables
 load_dotenv()
@@ -19,58 +25,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Security Headers Middleware
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'; img-src 'self' data: https:; font-src 'self'; connect-src 'self' https:;"
-        return response
-
-# Simple in-memory rate limiter
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, rate_limit: int = 5, window: int = 60):
-        super().__init__(app)
-        self.rate_limit = rate_limit
-        self.window = window
-        self.requests = defaultdict(list)
-    
-    async def dispatch(self, request: Request, call_next):
-        # Only rate limit auth endpoints
-        if not request.url.path.startswith("/api/auth/login"):
-            return await call_next(request)
-        
-        client_ip = request.client.host
-        current_time = time()
-        
-        # Clean old requests
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if current_time - req_time < self.window
-        ]
-        
-        # Check rate limit
-        if len(self.requests[client_ip]) >= self.rate_limit:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please try again later."
-            )
-        
-        # Add current request
-        self.requests[client_ip].append(current_time)
-        
-        return await call_next(request)
-
-# Add security headers middleware
-app.add_middleware(SecurityHeadersMiddleware)
-
-# Add rate limiting middleware
+# Add rate limiting middleware (login path only)
 if settings.RATE_LIMIT_ENABLED:
     app.add_middleware(RateLimitMiddleware)
 
+# Add security headers middleware (outside the rate limiter so 429s get them too)
+app.add_middleware(SecurityHeadersMiddleware)
+
 # CORS Configuration - restrict to allowed origins
 app.add_middleware(
     CORSMiddleware,
@@ -80,6 +41,14 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Attribute event loop stalls to routes (opt-in)
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
+
+# Request metrics (added last, so it is outermost and the time includes every other middleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Create upload directory if it doesn't exist
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
@@ -94,6 +63,26 @@ app.include_router(scanner.router, prefix="/api/scanner", tags=["Security Scanne
 app.include_router(contact.router, prefix="/api", tags=["Contact"])
 app.include_router(newsletter.router, tags=["Newsletter"])
 
+@app.on_event("startup")
+async def startup():
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await start_http_client()
+    await scan_jobs.start()
+    await upload_pipeline.start()
+    warmup.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await warmup.stop()
+    await scan_jobs.stop()
+    await upload_pipeline.stop()
+    await close_http_client()
+    await close_store()
+    await close_version_store()
+    await dispose_async_engine()
+    await loop_monitor.stop()
+
 @app.get("/")
 async def root():
     return {
@@ -106,6 +95,12 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
 print("Starting main.py")
 
 if __name__ == "__main__":
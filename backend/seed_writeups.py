@@ -11,11 +11,12 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.models.writeup import Writeup, Tag, Platform, Difficulty
+from app.models.writeup import Writeup, Platform, Difficulty
 from app.models.user import User
 from app.core.database import Base
 from app.core.config import settings
 from app.core.security import get_password_hash
+from app.utils.tag_repository import get_or_create_tags
 from datetime import datetime, timedelta
 
 # Create engine and session
@@ -157,14 +158,7 @@ def seed_database():
         
         # Add tags to writeup
         if "tags" in data:
-            for tag_name in data["tags"]:
-                # Check if tag already exists
-                tag = db.query(Tag).filter(Tag.name == tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.add(tag)
-                    db.flush()  # Ensure tag is persisted before associating
-                writeup.tags.append(tag)
+            writeup.tags.extend(get_or_create_tags(db, data["tags"]))
         
         db.add(writeup)
     
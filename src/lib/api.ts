@@ -113,6 +113,31 @@ export interface Writeup {
   tools_used?: string[];
   key_findings?: string[];
   lessons_learned?: string[];
+  // "processing" while a new writeup's upload job runs; hidden from lists until "ready"
+  processing_status?: "processing" | "ready";
+  upload_job_id?: string | null;
+}
+
+// GET /writeups/uploads/{job_id}
+export interface UploadJob {
+  job_id: string;
+  writeup_id: number;
+  status: "queued" | "running" | "completed" | "failed" | "cancelled";
+  stages: {
+    name: string;
+    status: "running" | "completed" | "failed" | "cancelled";
+    duration: number | null;
+  }[];
+  result: {
+    writeup_id: number;
+    content_type: "pdf" | "markdown";
+    suggested_tags: string[];
+  } | null;
+  error?: string | null;
+  created_at: string | null;
+  started_at: string | null;
+  finished_at: string | null;
+  duration: number | null;
 }
 
 export interface Comment {
@@ -371,6 +396,37 @@ export const updateWriteupWithFile = async (
   return data as Writeup;
 };
 
+export const getUploadJob = async (jobId: string) => {
+  const { data } = await api.get(`/writeups/uploads/${jobId}`);
+  return data as UploadJob;
+};
+
+// Uploads are processed as background jobs; poll until the job reaches a
+// final state, reporting each poll to onPoll. Throws the job's error if
+// processing failed, or a timeout error after maxWaitMs (the job keeps running).
+export const waitForUploadJob = async (
+  jobId: string,
+  onPoll?: (job: UploadJob) => void,
+  intervalMs = 1500,
+  maxWaitMs = 10 * 60 * 1000,
+) => {
+  const deadline = Date.now() + maxWaitMs;
+  for (;;) {
+    const job = await getUploadJob(jobId);
+    onPoll?.(job);
+    if (job.status === "completed") return job;
+    if (job.status === "failed" || job.status === "cancelled") {
+      throw new Error(job.error || `Upload processing ${job.status}`);
+    }
+    if (Date.now() + intervalMs > deadline) {
+      throw new Error(
+        `Upload is still processing after ${Math.round(maxWaitMs / 1000)}s; check back later`,
+      );
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 export const deleteWriteup = async (id: number) => {
   await api.delete(`/writeups/${id}`);
 };
@@ -451,11 +507,18 @@ export interface CveSearchResultItem {
   modified: string | null;
   severity?: string | null;
   score?: number | null;
+  cvss_version?: string | null;
+  vector?: string | null;
+  cwes?: string[];
+  references?: string[];
 }
 
 export interface CveSearchResponse {
   query: string;
   count: number;
+  total?: number;
+  limit?: number;
+  offset?: number;
   source?: string;
   results: CveSearchResultItem[];
   error?: string;
@@ -472,7 +535,57 @@ export const runAdvancedScan = async (params: {
     target_url: params.target_url,
     include_port_scan: params.include_port_scan ?? false,
   });
-  return data as AdvancedScanResponse;
+  const job = await waitForScanJob(data.job_id);
+  return job.result as AdvancedScanResponse;
+};
+
+export interface ScanJob {
+  job_id: string;
+  kind: string;
+  target: string;
+  status: "queued" | "running" | "completed" | "failed" | "cancelled";
+  findings: AdvancedFinding[];
+  timings: Record<string, number | null>;
+  result: any;
+  error?: string | null;
+  created_at: string | null;
+  started_at: string | null;
+  finished_at: string | null;
+  duration: number | null;
+}
+
+export const getScanJob = async (jobId: string) => {
+  const { data } = await api.get(`/scanner/jobs/${jobId}`);
+  return data as ScanJob;
+};
+
+export const cancelScanJob = async (jobId: string) => {
+  const { data } = await api.delete(`/scanner/jobs/${jobId}`);
+  return data as ScanJob;
+};
+
+// Scans run as background jobs; poll until the job reaches a final state.
+// Gives up (and cancels the job) after maxWaitMs, including time spent queued.
+export const waitForScanJob = async (
+  jobId: string,
+  intervalMs = 1500,
+  maxWaitMs = 10 * 60 * 1000,
+) => {
+  const deadline = Date.now() + maxWaitMs;
+  for (;;) {
+    const job = await getScanJob(jobId);
+    if (job.status === "completed") return job;
+    if (job.status === "failed" || job.status === "cancelled") {
+      throw new Error(job.error || `Scan ${job.status}`);
+    }
+    if (Date.now() + intervalMs > deadline) {
+      await cancelScanJob(jobId).catch(() => undefined);
+      throw new Error(
+        `Scan timed out after ${Math.round(maxWaitMs / 1000)}s (job ${job.status})`,
+      );
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
 };
 
 export const runApiAudit = async (payload: {
@@ -12,13 +12,16 @@ import {
 import AdminLayout from "../../components/AdminLayout";
 import {
   fetchWriteups,
+  fetchWriteup,
   deleteWriteup,
   createWriteup,
   updateWriteup,
   uploadWriteupFile,
   updateWriteupWithFile,
+  waitForUploadJob,
   generateAIContent,
   type Writeup,
+  type UploadJob,
   type CreateWriteupPayload,
   type UpdateWriteupPayload,
 } from "../../lib/api";
@@ -33,6 +36,8 @@ export default function AdminWriteups() {
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [uploadProgress, setUploadProgress] = useState(0);
   const [isUploading, setIsUploading] = useState(false);
+  // Stage of the upload job being polled after the file was sent
+  const [processingStage, setProcessingStage] = useState<string | null>(null);
   const [generatingAI, setGeneratingAI] = useState<number | null>(null);
   const [formData, setFormData] = useState<CreateWriteupPayload>({
     title: "",
@@ -64,6 +69,32 @@ export default function AdminWriteups() {
     }
   };
 
+  // Uploaded files are processed by a background job; wait for it so a
+  // failure (which removes a new writeup) is reported instead of lost.
+  // failureNote says what a failed job left behind.
+  const waitForProcessing = async (writeup: Writeup, failureNote: string) => {
+    if (!writeup.upload_job_id) return;
+    let lastJob: UploadJob | null = null;
+    setProcessingStage("queued");
+    try {
+      await waitForUploadJob(writeup.upload_job_id, (job) => {
+        lastJob = job;
+        const running = job.stages.find((stage) => stage.status === "running");
+        setProcessingStage(
+          running ? running.name.replace(/_/g, " ") : job.status,
+        );
+      });
+    } catch (err: any) {
+      const status = (lastJob as UploadJob | null)?.status;
+      if (status === "failed" || status === "cancelled") {
+        throw new Error(`File processing failed: ${err.message}. ${failureNote}`);
+      }
+      throw err; // timed out or could not poll; the job may still finish
+    } finally {
+      setProcessingStage(null);
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
 
@@ -118,8 +149,8 @@ export default function AdminWriteups() {
 
         try {
           if (selectedFile) {
-            // Update with new file
-            await updateWriteupWithFile(
+            // Update with new file; the current file stays until processing succeeds
+            const queued = await updateWriteupWithFile(
               editingId,
               formData,
               selectedFile,
@@ -127,7 +158,11 @@ export default function AdminWriteups() {
                 setUploadProgress(progress);
               },
             );
-            setSuccess("Writeup updated and file uploaded successfully!");
+            await waitForProcessing(
+              queued,
+              "The writeup keeps its previous file.",
+            );
+            setSuccess("Writeup updated and file processed successfully!");
           } else {
             // Update without file
             const payload: UpdateWriteupPayload = formData;
@@ -152,17 +187,17 @@ export default function AdminWriteups() {
           await load();
         }
       } else if (selectedFile) {
-        // Create with file
-        const newWriteup = await uploadWriteupFile(
+        // Create with file; the writeup is hidden until processing finishes
+        const queued = await uploadWriteupFile(
           formData,
           selectedFile,
           (progress) => {
             setUploadProgress(progress);
           },
         );
-        // Add new writeup to list immediately
-        setWriteups((prev) => [newWriteup, ...prev]);
-        setSuccess("Writeup created and file uploaded successfully!");
+        await waitForProcessing(queued, "The writeup was not created.");
+        await load();
+        setSuccess("Writeup created and file processed successfully!");
       } else {
         // Create without file (manual URL entry)
         const newWriteup = await createWriteup(formData);
@@ -227,7 +262,14 @@ export default function AdminWriteups() {
     }
   };
 
-  const handleEdit = (writeup: Writeup) => {
+  const handleEdit = async (listed: Writeup) => {
+    // List rows only carry card fields; load the full writeup for the form
+    let writeup = listed;
+    try {
+      writeup = await fetchWriteup(listed.id, { refresh: true });
+    } catch (err) {
+      console.error("Failed to load writeup details:", err);
+    }
     setFormData({
       title: writeup.title,
       platform: writeup.platform,
@@ -527,7 +569,13 @@ export default function AdminWriteups() {
                 )}
 
                 {/* Upload progress */}
-                {isUploading && uploadProgress > 0 && (
+                {processingStage && (
+                  <div className="flex items-center gap-2 text-sm text-slate-700 dark:text-slate-300">
+                    <RefreshCw className="h-4 w-4 animate-spin" />
+                    <span>Processing file: {processingStage}...</span>
+                  </div>
+                )}
+                {isUploading && !processingStage && uploadProgress > 0 && (
                   <div className="space-y-2">
                     <div className="flex justify-between text-sm">
                       <span className="text-slate-700 dark:text-slate-300">
@@ -575,11 +623,13 @@ export default function AdminWriteups() {
                   disabled={isUploading}
                   className="px-4 py-2 bg-gradient-to-r from-green-500 to-emerald-600 hover:from-green-600 hover:to-emerald-700 text-white font-medium rounded-xl transition-all disabled:opacity-50 disabled:cursor-not-allowed text-sm sm:text-base shadow-lg hover:shadow-green-500/25"
                 >
-                  {isUploading
-                    ? "Uploading..."
-                    : editingId
-                      ? "Update"
-                      : "Create"}
+                  {processingStage
+                    ? "Processing..."
+                    : isUploading
+                      ? "Uploading..."
+                      : editingId
+                        ? "Update"
+                        : "Create"}
                 </button>
                 <button
                   type="button"